@@ -4,10 +4,20 @@ import yaml
 from pathlib import Path
 from src.core.benchmark_runner import BenchmarkRunner
 
-async def _main(problem_set: str, cfg: str):
+async def _main(problem_set: str, cfg: str, resume: str = None):
     """Run the benchmark."""
     runner = BenchmarkRunner(cfg)
-    await runner.run(problem_set)
+    await runner.run(problem_set, resume=resume)
+
+async def _autotune(cfg: str, try_compile: bool = False):
+    """Benchmark the configured models on this machine and save the fastest profiles."""
+    from src.optimization.autotuner import autotune_models
+    await autotune_models(cfg, try_compile=try_compile)
+
+async def _serve(cfg: str, host: str, port: int):
+    """Serve the configured models over an OpenAI-compatible API."""
+    from src.core.inference_server import serve
+    await serve(cfg, host, port)
 
 def add_custom_prompt():
     """Interactive prompt addition."""
@@ -68,6 +78,12 @@ def main():
     parser.add_argument("--problem-set", help="Problem set to run benchmark on")
     parser.add_argument("--config", default="config/benchmark_config.json", help="Config file path")
     parser.add_argument("--add-prompt", action="store_true", help="Add new prompt interactively")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Continue an interrupted run, e.g. basic_20251121_110629")
+    parser.add_argument("--autotune", action="store_true", help="Tune dtype/quantization/threads for the configured models on this machine")
+    parser.add_argument("--compile", action="store_true", help="With --autotune, also try torch.compile")
+    parser.add_argument("--serve", action="store_true", help="Serve the configured models at /v1/completions and /v1/chat/completions")
+    parser.add_argument("--host", default="127.0.0.1", help="With --serve, address to bind")
+    parser.add_argument("--port", type=int, default=8000, help="With --serve, port to listen on")
     
     args = parser.parse_args()
     
@@ -75,10 +91,25 @@ def main():
         add_custom_prompt()
         return
     
+    if args.autotune:
+        asyncio.run(_autotune(args.config, args.compile))
+        return
+
+    if args.serve:
+        try:
+            asyncio.run(_serve(args.config, args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.resume and not args.problem_set:
+        # run ids are "<problem_set>_<YYYYmmdd>_<HHMMSS>"
+        args.problem_set = args.resume.rsplit("_", 2)[0]
+
     if not args.problem_set:
         parser.error("--problem-set is required when not using --add-prompt")
     
-    asyncio.run(_main(args.problem_set, args.config))
+    asyncio.run(_main(args.problem_set, args.config, args.resume))
 
 if __name__ == "__main__":
     main()
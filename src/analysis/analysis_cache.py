@@ -0,0 +1,57 @@
+"""Persistent cache of analysis results keyed by normalized code."""
+import re
+from typing import Any, Dict, Optional
+
+from src.analysis.analysis_context import get_context
+from src.utils.disk_cache import DiskCache
+
+_COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+
+
+def normalize_code(code: str) -> str:
+    """
+    Canonical form of a snippet: its javalang token values joined by single
+    spaces, so comments and formatting do not matter. Code the lexer
+    rejects falls back to comment stripping plus whitespace collapsing.
+    """
+    tokens = get_context(code).tokens
+    if tokens:
+        return " ".join(t.value for t in tokens)
+    return " ".join(_COMMENT.sub(" ", code).split())
+
+
+class AnalysisCache:
+    """
+    On-disk analysis results, keyed by the normalized code, the tests it was
+    run against and ``version`` (bump JavaAnalyzer.VERSION whenever metrics
+    change so stale entries stop matching).
+
+    Snippets that differ only in comments or whitespace share an entry, so
+    their diagnostics carry the line numbers of the first one analyzed.
+    """
+
+    def __init__(
+        self,
+        path: str = "data/cache/analysis",
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age_days: Optional[float] = None,
+    ):
+        self.store = DiskCache(path, max_entries, max_bytes, max_age_days)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(code: str, tests: Any, version: str) -> str:
+        return DiskCache.make_key({"code": normalize_code(code), "tests": tests, "version": version})
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        record = self.store.get(key)
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+
+    def save(self, key: str, record: Dict):
+        self.store.set(key, record)
@@ -0,0 +1,282 @@
+"""Parse-once analysis of a Java snippet, shared by every analyzer."""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import javalang
+from javalang import tree as jt
+
+_COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+_GENERIC_COLLECTIONS = {
+    "List", "ArrayList", "LinkedList", "Set", "HashSet", "TreeSet", "Map", "HashMap", "TreeMap",
+    "Queue", "Deque", "ArrayDeque", "PriorityQueue", "Optional", "Stream", "Iterator", "Collection",
+}
+
+
+class MetricVisitor:
+    """
+    One metric computed during the shared tree walk. ``visit`` is called for
+    every node that is an instance of ``node_types``; ``result`` is stored in
+    ``AnalysisContext.metrics[name]``. Instances are per snippet.
+    """
+
+    name = ""
+    node_types: Tuple[type, ...] = ()
+
+    def visit(self, path, node):
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+
+VISITORS: List[Type[MetricVisitor]] = []
+
+
+def register_visitor(cls: Type[MetricVisitor]) -> Type[MetricVisitor]:
+    VISITORS.append(cls)
+    return cls
+
+
+@register_visitor
+class ComplexityVisitor(MetricVisitor):
+    """Decision points + 1 (the JavaAnalyzer cyclomatic complexity)."""
+
+    name = "complexity"
+    node_types = (jt.IfStatement, jt.ForStatement, jt.WhileStatement, jt.SwitchStatement, jt.TernaryExpression)
+
+    def __init__(self):
+        self.decisions = 0
+
+    def visit(self, path, node):
+        self.decisions += 1
+
+    def result(self) -> int:
+        return self.decisions + 1
+
+
+@register_visitor
+class ModernFeatureVisitor(MetricVisitor):
+    name = "modern_features"
+    node_types = (jt.LambdaExpression, jt.MethodReference, jt.MethodInvocation, jt.LocalVariableDeclaration, jt.TryStatement)
+
+    def __init__(self):
+        self.counts = {"lambdas": 0, "method_references": 0, "streams": 0, "optional": 0, "var": 0, "try_with_resources": 0}
+
+    def visit(self, path, node):
+        if isinstance(node, jt.LambdaExpression):
+            self.counts["lambdas"] += 1
+        elif isinstance(node, jt.MethodReference):
+            self.counts["method_references"] += 1
+        elif isinstance(node, jt.MethodInvocation):
+            if node.member == "stream":
+                self.counts["streams"] += 1
+            elif node.qualifier == "Optional":
+                self.counts["optional"] += 1
+        elif isinstance(node, jt.LocalVariableDeclaration):
+            if getattr(node.type, "name", None) == "var":
+                self.counts["var"] += 1
+        elif node.resources:
+            self.counts["try_with_resources"] += 1
+
+    def result(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+
+@register_visitor
+class AccessModifierVisitor(MetricVisitor):
+    name = "access_modifiers"
+    node_types = (jt.FieldDeclaration, jt.MethodDeclaration, jt.ClassDeclaration)
+
+    def __init__(self):
+        self.counts = {"public_fields": 0, "private_fields": 0, "constants": 0, "package_private_members": 0, "members": 0, "methods": 0}
+
+    def visit(self, path, node):
+        mods = node.modifiers or set()
+        if isinstance(node, jt.FieldDeclaration):
+            if {"static", "final"} <= mods:
+                self.counts["constants"] += 1
+            elif "public" in mods:
+                self.counts["public_fields"] += 1
+            elif "private" in mods:
+                self.counts["private_fields"] += 1
+        elif isinstance(node, jt.MethodDeclaration):
+            self.counts["methods"] += 1
+        self.counts["members"] += 1
+        if not mods & {"public", "private", "protected"}:
+            self.counts["package_private_members"] += 1
+
+    def result(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+
+@register_visitor
+class ExceptionHandlingVisitor(MetricVisitor):
+    name = "exception_handling"
+    node_types = (jt.TryStatement, jt.CatchClause, jt.MethodDeclaration, jt.ThrowStatement)
+
+    def __init__(self):
+        self.counts = {"try_blocks": 0, "catch_clauses": 0, "generic_catches": 0, "empty_catches": 0,
+                       "throws_declarations": 0, "throw_statements": 0}
+
+    def visit(self, path, node):
+        if isinstance(node, jt.TryStatement):
+            self.counts["try_blocks"] += 1
+        elif isinstance(node, jt.CatchClause):
+            self.counts["catch_clauses"] += 1
+            if set(node.parameter.types) & {"Exception", "Throwable", "RuntimeException"}:
+                self.counts["generic_catches"] += 1
+            if not node.block:
+                self.counts["empty_catches"] += 1
+        elif isinstance(node, jt.MethodDeclaration):
+            self.counts["throws_declarations"] += len(node.throws or [])
+        else:
+            self.counts["throw_statements"] += 1
+
+    def result(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+
+@register_visitor
+class GenericsVisitor(MetricVisitor):
+    name = "generics"
+    node_types = (jt.ReferenceType, jt.TypeParameter)
+
+    def __init__(self):
+        self.counts = {"parameterized_types": 0, "wildcards": 0, "diamonds": 0, "type_parameters": 0, "raw_types": 0}
+
+    def visit(self, path, node):
+        if isinstance(node, jt.TypeParameter):
+            self.counts["type_parameters"] += 1
+        elif node.arguments:
+            self.counts["parameterized_types"] += 1
+            self.counts["wildcards"] += sum(1 for a in node.arguments if a.pattern_type or a.type is None)
+        elif node.arguments == []:
+            self.counts["diamonds"] += 1
+        elif node.name in _GENERIC_COLLECTIONS:
+            self.counts["raw_types"] += 1
+
+    def result(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+
+@register_visitor
+class NamingVisitor(MetricVisitor):
+    """Declarations that break the usual Java naming conventions."""
+
+    name = "naming"
+    node_types = (jt.TypeDeclaration, jt.MethodDeclaration, jt.VariableDeclarator)
+
+    def __init__(self):
+        self.names = 0
+        self.violations: List[str] = []
+
+    def visit(self, path, node):
+        name = node.name
+        if isinstance(node, jt.TypeDeclaration):
+            ok = name[:1].isupper() and "_" not in name
+        elif isinstance(node, jt.MethodDeclaration):
+            ok = name[:1].islower() and "_" not in name
+        else:
+            owner = next((p for p in reversed(path) if isinstance(p, jt.Declaration)), None)
+            if isinstance(owner, jt.FieldDeclaration) and {"static", "final"} <= (owner.modifiers or set()):
+                ok = name == name.upper()  # CONSTANT_CASE
+            else:
+                ok = name[:1].islower() and "_" not in name
+        self.names += 1
+        if not ok:
+            self.violations.append(node.name)
+
+    def result(self) -> Dict[str, Any]:
+        return {"names": self.names, "violations": list(self.violations)}
+
+
+class AnalysisContext:
+    """
+    Tokens, AST and metrics of one snippet, each computed at most once.
+    ``metrics`` runs every registered MetricVisitor in a single walk of the
+    tree; it is empty when the snippet does not parse (see ``syntax_errors``).
+    """
+
+    def __init__(self, code: str):
+        self.code = code
+        self._tokens: Optional[list] = None
+        self._token_error: Optional[Exception] = None
+        self._tree = None
+        self._parsed = False
+        self.syntax_errors: List[str] = []
+        self._metrics: Optional[Dict[str, Any]] = None
+        self._lock = threading.RLock()
+
+    @property
+    def tokens(self) -> list:
+        if self._tokens is None:
+            try:
+                self._tokens = list(javalang.tokenizer.tokenize(self.code))
+            except Exception as e:
+                self._tokens, self._token_error = [], e
+        return self._tokens
+
+    @property
+    def tree(self):
+        with self._lock:
+            if not self._parsed:
+                tokens = self.tokens
+                try:
+                    if self._token_error is not None:
+                        raise self._token_error
+                    self._tree = javalang.parser.Parser(tokens).parse_compilation_unit()
+                except Exception as e:
+                    self.syntax_errors = [str(e)]
+                self._parsed = True
+        return self._tree
+
+    @property
+    def parses(self) -> bool:
+        return self.tree is not None
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._metrics is None:
+                self._metrics = self._walk()
+        return self._metrics
+
+    @property
+    def comment_lines(self) -> int:
+        return sum(c.count("\n") + 1 for c in _COMMENT.findall(self.code))
+
+    @property
+    def lines_of_code(self) -> int:
+        return len([l for l in self.code.splitlines() if l.strip() and not l.strip().startswith("//")])
+
+    def _walk(self) -> Dict[str, Any]:
+        if self.tree is None:
+            return {}
+        visitors = [cls() for cls in VISITORS]
+        for path, node in self.tree:
+            for v in visitors:
+                if isinstance(node, v.node_types):
+                    v.visit(path, node)
+        return {v.name: v.result() for v in visitors}
+
+
+_contexts: "OrderedDict[str, AnalysisContext]" = OrderedDict()
+_contexts_lock = threading.Lock()
+MAX_CONTEXTS = 2048
+
+
+def get_context(code: str) -> AnalysisContext:
+    """Shared AnalysisContext for ``code``, cached (LRU) by content hash."""
+    key = hashlib.sha1(code.encode("utf-8", "surrogatepass")).hexdigest()
+    with _contexts_lock:
+        ctx = _contexts.get(key)
+        if ctx is None:
+            ctx = _contexts[key] = AnalysisContext(code)
+            if len(_contexts) > MAX_CONTEXTS:
+                _contexts.popitem(last=False)
+        else:
+            _contexts.move_to_end(key)
+        return ctx
@@ -0,0 +1,203 @@
+"""Persistent in-memory javac so analysis does not pay a JVM start per snippet."""
+import atexit
+import functools
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.utils.logger import Logger
+
+logger = Logger().get()
+
+JAVA_SOURCE = Path(__file__).with_name("java") / "CompileServer.java"
+
+_PUBLIC_TYPE = re.compile(r"\bpublic\s+(?:(?:abstract|final|sealed|non-sealed|static|strictfp)\s+)*(?:class|interface|enum|record)\s+(\w+)")
+_ANY_TYPE = re.compile(r"\b(?:class|interface|enum|record)\s+(\w+)")
+
+CompileResult = Tuple[bool, List[str]]
+
+
+class CompileServerError(RuntimeError):
+    pass
+
+
+def source_name(code: str) -> str:
+    """File name (without .java) javac expects: the public top-level type's, else the first type's."""
+    match = _PUBLIC_TYPE.search(code) or _ANY_TYPE.search(code)
+    return match.group(1) if match else "Tmp"
+
+
+@functools.lru_cache(maxsize=None)
+def javac_version(javac: str = "javac") -> str:
+    """``javac -version`` output (e.g. "javac 21.0.2"), or "unavailable" when it cannot run."""
+    try:
+        res = subprocess.run([javac, "-version"], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return "unavailable"
+    # JDK 8 prints the version on stderr, later JDKs on stdout
+    output = (res.stdout + res.stderr).strip()
+    return output if res.returncode == 0 and output else "unavailable"
+
+
+def build_java_tool(source: Path, javac: str = "javac") -> Path:
+    """
+    Compile one of the helper programs in ``java/`` into a temp directory
+    (once per source version and javac) and return it as a classpath.
+    """
+    digest = hashlib.sha1(source.read_bytes() + javac.encode()).hexdigest()[:12]
+    out = Path(tempfile.gettempdir()) / f"{source.stem}-{digest}"
+    if (out / f"{source.stem}.class").exists():
+        return out
+    staging = Path(tempfile.mkdtemp(prefix=f"{source.stem}-"))
+    res = subprocess.run([javac, "-d", str(staging), str(source)], capture_output=True, text=True)
+    if res.returncode != 0:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise CompileServerError(f"could not build {source.name}: {res.stderr.strip()[:500]}")
+    try:
+        os.replace(staging, out)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)  # another process won the race
+    return out
+
+
+def write_frame(buf: bytearray, text: str):
+    data = text.encode("utf-8")
+    buf += f"{len(data)}\n".encode()
+    buf += data
+
+
+def read_line(stream) -> str:
+    line = stream.readline()
+    if not line:
+        raise CompileServerError("helper JVM closed its output")
+    return line.decode("utf-8").strip()
+
+
+def read_frame(stream) -> str:
+    n = int(read_line(stream))
+    data = stream.read(n)
+    if len(data) != n:
+        raise CompileServerError("truncated response from helper JVM")
+    return data.decode("utf-8")
+
+
+class JavaCompileServer:
+    """
+    One long-lived JVM (``java/CompileServer.java``) compiling sources with
+    ``javax.tools.JavaCompiler`` and an in-memory file manager, driven over
+    its stdin/stdout pipes. ``compile_batch`` sends up to ``batch_size``
+    sources per round trip, which the JVM compiles on ``threads`` threads,
+    and returns ``(ok, diagnostics)`` per source in order. Class files are
+    discarded unless an output directory is given for the source.
+
+    The server class is built once per javac into a temp directory. A hung
+    or crashed JVM is killed after ``timeout_s`` and restarted on the next
+    call; the failing call raises CompileServerError.
+    """
+
+    def __init__(
+        self,
+        java: str = "java",
+        javac: str = "javac",
+        threads: Optional[int] = None,
+        batch_size: int = 64,
+        timeout_s: float = 120.0,
+        jvm_args: Sequence[str] = ("-Xss8m",),
+    ):
+        self.java = java
+        self.javac = javac
+        self.threads = threads or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.timeout_s = timeout_s
+        self.jvm_args = list(jvm_args)
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        classpath = build_java_tool(JAVA_SOURCE, self.javac)
+        self._proc = subprocess.Popen(
+            [self.java, *self.jvm_args, "-cp", str(classpath), "CompileServer", str(self.threads)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        logger.info("Started javac compile server (pid %d, %d threads)", self._proc.pid, self.threads)
+
+    def _stop(self):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+            proc.wait()
+
+    def _round_trip(self, sources: Sequence[str], output_dirs: Sequence[str]) -> List[CompileResult]:
+        if self._proc is None or self._proc.poll() is not None:
+            self._start()
+        proc = self._proc
+        request = bytearray(f"{len(sources)}\n".encode())
+        for code, out in zip(sources, output_dirs):
+            write_frame(request, source_name(code))
+            write_frame(request, code)
+            write_frame(request, out)
+
+        watchdog = threading.Timer(self.timeout_s, proc.kill)
+        watchdog.start()
+        try:
+            proc.stdin.write(request)
+            proc.stdin.flush()
+            results = []
+            for _ in sources:
+                ok = read_line(proc.stdout) == "1"
+                messages = [read_frame(proc.stdout) for _ in range(int(read_line(proc.stdout)))]
+                results.append((ok, [] if ok else messages))
+            return results
+        except (OSError, ValueError, CompileServerError) as e:
+            self._stop()
+            raise CompileServerError(f"compile server failed: {e}") from e
+        finally:
+            watchdog.cancel()
+
+    def compile_batch(self, sources: Sequence[str], output_dirs: Optional[Sequence[Optional[str]]] = None) -> List[CompileResult]:
+        outs = [str(d) if d else "" for d in (output_dirs or [None] * len(sources))]
+        with self._lock:
+            results: List[CompileResult] = []
+            for start in range(0, len(sources), self.batch_size):
+                end = start + self.batch_size
+                results.extend(self._round_trip(sources[start:end], outs[start:end]))
+            return results
+
+    def compile(self, code: str, output_dir: Optional[str] = None) -> CompileResult:
+        return self.compile_batch([code], [output_dir])[0]
+
+    def close(self):
+        with self._lock:
+            self._stop()
+
+
+_servers: Dict[Tuple[str, str], JavaCompileServer] = {}
+_servers_lock = threading.Lock()
+
+
+def shared_server(java: str = "java", javac: str = "javac") -> JavaCompileServer:
+    """Process-wide server per toolchain, so every JavaAnalyzer shares one JVM."""
+    with _servers_lock:
+        server = _servers.get((java, javac))
+        if server is None:
+            server = _servers[(java, javac)] = JavaCompileServer(java, javac)
+        return server
+
+
+@atexit.register
+def _close_servers():
+    for server in _servers.values():
+        server.close()
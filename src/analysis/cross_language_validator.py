@@ -1,3 +1,8 @@
+from typing import Dict
+
+from src.analysis.analysis_context import get_context
+
+
 class CrossLanguageValidator:
     def __init__(self):
         self.java_specific_patterns = [
@@ -17,3 +22,29 @@ class CrossLanguageValidator:
             "exception_handling_quality": self._evaluate_exception_handling(generated_code),
             "generics_usage": self._analyze_generics(generated_code)
         }
+
+    # all checks read the metrics of one shared parse (see analysis_context)
+    def _check_modern_features(self, code: str) -> bool:
+        return any(get_context(code).metrics.get("modern_features", {}).values())
+
+    def _check_conventions(self, code: str) -> bool:
+        naming = get_context(code).metrics.get("naming")
+        return bool(naming) and not naming["violations"]
+
+    def _check_access_modifiers(self, code: str) -> bool:
+        """Fields are encapsulated: no mutable public fields."""
+        counts = get_context(code).metrics.get("access_modifiers")
+        return bool(counts) and counts["public_fields"] == 0
+
+    def _evaluate_exception_handling(self, code: str) -> float:
+        """1.0 for specific, non-empty catches; generic and empty catches cost."""
+        counts = get_context(code).metrics.get("exception_handling")
+        if not counts:
+            return 0.0
+        if not counts["catch_clauses"]:
+            return 1.0
+        bad = counts["generic_catches"] * 0.5 + counts["empty_catches"]
+        return max(0.0, 1.0 - bad / counts["catch_clauses"])
+
+    def _analyze_generics(self, code: str) -> Dict:
+        return dict(get_context(code).metrics.get("generics", {}))
@@ -0,0 +1,201 @@
+import javax.tools.Diagnostic;
+import javax.tools.DiagnosticCollector;
+import javax.tools.FileObject;
+import javax.tools.ForwardingJavaFileManager;
+import javax.tools.JavaCompiler;
+import javax.tools.JavaFileManager;
+import javax.tools.JavaFileObject;
+import javax.tools.SimpleJavaFileObject;
+import javax.tools.StandardJavaFileManager;
+import javax.tools.ToolProvider;
+import java.io.BufferedInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.EOFException;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.io.StringWriter;
+import java.net.URI;
+import java.nio.charset.StandardCharsets;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.Collections;
+import java.util.List;
+import java.util.Locale;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+
+/**
+ * Long-lived javac for src/analysis/compile_server.py.
+ *
+ * Reads batches from stdin and answers each with per-source diagnostics on
+ * stdout. A frame is a decimal byte length on its own line followed by that
+ * many UTF-8 bytes.
+ *
+ *   request:  "<count>\n" then, per source, name, code and output dir frames
+ *   response: per source, "<1|0>\n<diagnostic count>\n" then one frame each
+ *
+ * Sources are compiled independently (and concurrently). With an empty
+ * output dir the class files are discarded by an in-memory file manager,
+ * so nothing touches the disk and two snippets declaring the same class
+ * never collide; otherwise they are written there (-d).
+ */
+public final class CompileServer {
+    private static final JavaCompiler COMPILER = ToolProvider.getSystemJavaCompiler();
+    private static final List<String> OPTIONS = Arrays.asList("-proc:none", "-nowarn", "-g:none");
+    private static final ThreadLocal<StandardJavaFileManager> FILE_MANAGERS =
+        ThreadLocal.withInitial(() -> COMPILER.getStandardFileManager(null, Locale.ROOT, StandardCharsets.UTF_8));
+
+    private static final class Result {
+        final boolean ok;
+        final List<String> messages;
+
+        Result(boolean ok, List<String> messages) {
+            this.ok = ok;
+            this.messages = messages;
+        }
+    }
+
+    /** Discards class files: only the diagnostics are wanted. */
+    private static final class MemoryFileManager extends ForwardingJavaFileManager<JavaFileManager> {
+        MemoryFileManager(JavaFileManager delegate) {
+            super(delegate);
+        }
+
+        @Override
+        public JavaFileObject getJavaFileForOutput(Location location, String className,
+                                                   JavaFileObject.Kind kind, FileObject sibling) {
+            URI uri = URI.create("mem:///" + className.replace('.', '/') + kind.extension);
+            return new SimpleJavaFileObject(uri, kind) {
+                @Override
+                public OutputStream openOutputStream() {
+                    return new ByteArrayOutputStream();
+                }
+            };
+        }
+    }
+
+    private CompileServer() {
+    }
+
+    public static void main(String[] args) throws Exception {
+        if (COMPILER == null) {
+            System.err.println("CompileServer: no system Java compiler (running on a JRE?)");
+            System.exit(2);
+        }
+        int threads = args.length > 0 ? Integer.parseInt(args[0]) : Runtime.getRuntime().availableProcessors();
+        ExecutorService pool = Executors.newFixedThreadPool(threads);
+
+        // keep stray prints from the compiler out of the protocol stream
+        PrintStream protocol = new PrintStream(new FileOutputStream(FileDescriptor.out), false);
+        System.setOut(System.err);
+        InputStream in = new BufferedInputStream(System.in);
+
+        String header;
+        while ((header = readLine(in)) != null) {
+            int count = Integer.parseInt(header.trim());
+            List<Future<Result>> results = new ArrayList<>(count);
+            for (int i = 0; i < count; i++) {
+                String name = readFrame(in);
+                String code = readFrame(in);
+                String outputDir = readFrame(in);
+                results.add(pool.submit(() -> compile(name, code, outputDir)));
+            }
+            ByteArrayOutputStream response = new ByteArrayOutputStream();
+            for (Future<Result> future : results) {
+                Result result = future.get();
+                writeLine(response, result.ok ? "1" : "0");
+                writeLine(response, String.valueOf(result.messages.size()));
+                for (String message : result.messages) {
+                    writeFrame(response, message);
+                }
+            }
+            response.writeTo(protocol);
+            protocol.flush();
+        }
+        pool.shutdownNow();
+    }
+
+    private static Result compile(String name, String code, String outputDir) {
+        JavaFileObject source = new SimpleJavaFileObject(
+            URI.create("string:///" + name + ".java"), JavaFileObject.Kind.SOURCE) {
+            @Override
+            public CharSequence getCharContent(boolean ignoreEncodingErrors) {
+                return code;
+            }
+        };
+        DiagnosticCollector<JavaFileObject> diagnostics = new DiagnosticCollector<>();
+        List<String> messages = new ArrayList<>();
+        boolean ok;
+        JavaFileManager fileManager = FILE_MANAGERS.get();
+        List<String> options = new ArrayList<>(OPTIONS);
+        if (outputDir.isEmpty()) {
+            fileManager = new MemoryFileManager(fileManager);
+        } else {
+            options.add("-d");
+            options.add(outputDir);
+        }
+        try {
+            ok = COMPILER.getTask(new StringWriter(), fileManager, diagnostics,
+                options, null, Collections.singletonList(source)).call();
+        } catch (RuntimeException e) {
+            ok = false;
+            messages.add(name + ".java: error: compiler crashed: " + e);
+        }
+        for (Diagnostic<? extends JavaFileObject> d : diagnostics.getDiagnostics()) {
+            messages.add(format(name, d));
+        }
+        return new Result(ok, messages);
+    }
+
+    private static String format(String name, Diagnostic<? extends JavaFileObject> d) {
+        String kind = d.getKind() == Diagnostic.Kind.ERROR ? "error"
+            : d.getKind() == Diagnostic.Kind.NOTE ? "note" : "warning";
+        String where = d.getLineNumber() == Diagnostic.NOPOS ? name + ".java" : name + ".java:" + d.getLineNumber();
+        return where + ": " + kind + ": " + d.getMessage(Locale.ROOT);
+    }
+
+    private static String readLine(InputStream in) throws IOException {
+        ByteArrayOutputStream line = new ByteArrayOutputStream();
+        int b;
+        while ((b = in.read()) != '\n') {
+            if (b < 0) {
+                return line.size() == 0 ? null : line.toString("UTF-8");
+            }
+            line.write(b);
+        }
+        return line.toString("UTF-8");
+    }
+
+    private static String readFrame(InputStream in) throws IOException {
+        String length = readLine(in);
+        if (length == null) {
+            throw new EOFException("truncated request");
+        }
+        int n = Integer.parseInt(length.trim());
+        byte[] data = new byte[n];
+        int read = 0;
+        while (read < n) {
+            int r = in.read(data, read, n - read);
+            if (r < 0) {
+                throw new EOFException("truncated request");
+            }
+            read += r;
+        }
+        return new String(data, StandardCharsets.UTF_8);
+    }
+
+    private static void writeLine(OutputStream out, String s) throws IOException {
+        out.write((s + "\n").getBytes(StandardCharsets.UTF_8));
+    }
+
+    private static void writeFrame(OutputStream out, String s) throws IOException {
+        byte[] data = s.getBytes(StandardCharsets.UTF_8);
+        writeLine(out, String.valueOf(data.length));
+        out.write(data);
+    }
+}
@@ -0,0 +1,157 @@
+import java.io.BufferedInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.EOFException;
+import java.io.File;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.TimeoutException;
+
+/**
+ * Reusable test JVM for src/analysis/java_test_runner.py.
+ *
+ * Each job names a directory of compiled classes, the harness class and its
+ * test methods. The classes are loaded by a fresh class loader per job, so
+ * static state never leaks between candidates, and every test method runs
+ * on its own thread under a wall-clock limit. Framing is the same as
+ * CompileServer's (decimal byte length line + UTF-8 bytes).
+ *
+ *   request:  class dir, class name, timeout ms, test count, method names (frames)
+ *   response: per test, a status line (pass|fail|timeout) and a message frame
+ *
+ * A test that times out cannot be stopped safely, so the worker answers and
+ * then exits; the Python side starts a fresh one.
+ */
+public final class TestWorker {
+    private TestWorker() {
+    }
+
+    public static void main(String[] args) throws Exception {
+        PrintStream protocol = new PrintStream(new FileOutputStream(FileDescriptor.out), false);
+        // candidates print freely; none of it may reach the protocol stream
+        PrintStream discard = new PrintStream(OutputStream.nullOutputStream());
+        System.setOut(discard);
+        System.setErr(discard);
+        InputStream in = new BufferedInputStream(System.in);
+
+        String classDir;
+        while ((classDir = readOptionalFrame(in)) != null) {
+            String className = readFrame(in);
+            long timeoutMs = Long.parseLong(readFrame(in).trim());
+            int count = Integer.parseInt(readFrame(in).trim());
+            String[] methods = new String[count];
+            for (int i = 0; i < count; i++) {
+                methods[i] = readFrame(in);
+            }
+
+            boolean hung = false;
+            ByteArrayOutputStream response = new ByteArrayOutputStream();
+            ExecutorService runner = Executors.newCachedThreadPool(r -> {
+                Thread t = new Thread(r, "candidate-test");
+                t.setDaemon(true);
+                return t;
+            });
+            try (URLClassLoader loader = new URLClassLoader(
+                    new URL[] {new File(classDir).toURI().toURL()}, ClassLoader.getPlatformClassLoader())) {
+                Class<?> harness = Class.forName(className, false, loader);
+                for (String name : methods) {
+                    if (hung) {
+                        writeResult(response, "timeout", "skipped after an earlier test hung");
+                        continue;
+                    }
+                    Future<?> future = runner.submit(() -> runTest(harness, name));
+                    try {
+                        future.get(timeoutMs, TimeUnit.MILLISECONDS);
+                        writeResult(response, "pass", "");
+                    } catch (TimeoutException e) {
+                        future.cancel(true);
+                        hung = true;
+                        writeResult(response, "timeout", "exceeded " + timeoutMs + " ms");
+                    } catch (ExecutionException e) {
+                        writeResult(response, "fail", describe(e.getCause()));
+                    }
+                }
+            } catch (Throwable e) {
+                // harness missing or unloadable: every test fails the same way
+                response.reset();
+                for (int i = 0; i < count; i++) {
+                    writeResult(response, "fail", describe(e));
+                }
+            }
+            runner.shutdownNow();
+            response.writeTo(protocol);
+            protocol.flush();
+            if (hung) {
+                System.exit(3);
+            }
+        }
+    }
+
+    private static Void runTest(Class<?> harness, String name) throws Throwable {
+        Method method = harness.getDeclaredMethod(name);
+        method.setAccessible(true);
+        try {
+            method.invoke(null);
+        } catch (InvocationTargetException e) {
+            throw e.getCause();
+        }
+        return null;
+    }
+
+    private static String describe(Throwable e) {
+        if (e instanceof ExceptionInInitializerError && e.getCause() != null) {
+            e = e.getCause();
+        }
+        String message = e.getMessage();
+        return e.getClass().getName() + (message == null ? "" : ": " + message);
+    }
+
+    private static void writeResult(ByteArrayOutputStream out, String status, String message) throws IOException {
+        out.write((status + "\n").getBytes(StandardCharsets.UTF_8));
+        byte[] data = message.getBytes(StandardCharsets.UTF_8);
+        out.write((data.length + "\n").getBytes(StandardCharsets.UTF_8));
+        out.write(data);
+    }
+
+    private static String readLine(InputStream in) throws IOException {
+        ByteArrayOutputStream line = new ByteArrayOutputStream();
+        int b;
+        while ((b = in.read()) != '\n') {
+            if (b < 0) {
+                return line.size() == 0 ? null : line.toString("UTF-8");
+            }
+            line.write(b);
+        }
+        return line.toString("UTF-8");
+    }
+
+    private static String readOptionalFrame(InputStream in) throws IOException {
+        String length = readLine(in);
+        if (length == null) {
+            return null;
+        }
+        byte[] data = in.readNBytes(Integer.parseInt(length.trim()));
+        return new String(data, StandardCharsets.UTF_8);
+    }
+
+    private static String readFrame(InputStream in) throws IOException {
+        String frame = readOptionalFrame(in);
+        if (frame == null) {
+            throw new EOFException("truncated request");
+        }
+        return frame;
+    }
+}
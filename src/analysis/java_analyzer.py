@@ -1,8 +1,14 @@
 import subprocess, tempfile, os
-from dataclasses import dataclass
-from typing import List
+from dataclasses import asdict, dataclass, field, replace
+from typing import Dict, List, Optional, Sequence, Tuple
 
-import javalang
+from src.analysis.analysis_cache import AnalysisCache
+from src.analysis.analysis_context import get_context
+from src.analysis.compile_server import CompileServerError, javac_version, shared_server, source_name
+from src.analysis.java_test_runner import JavaTestRunner, TestOutcome
+from src.utils.logger import Logger
+
+logger = Logger().get()
 
 @dataclass
 class CodeMetrics:
@@ -11,34 +17,117 @@ class CodeMetrics:
     compilation_success: bool
     syntax_errors: List[str]
     test_pass_rate: float
+    test_results: List[Dict] = field(default_factory=list)  # per test: name, passed, status, message
 
 class JavaAnalyzer:
-    def __init__(self, javac: str = "javac"):
+    # part of every AnalysisCache key: bump when any metric's definition changes
+    VERSION = "2"
+
+    def __init__(self, javac: str = "javac", java: str = "java", compile_server: bool = True,
+                 cache: Optional[AnalysisCache] = None, test_runner: Optional[JavaTestRunner] = None):
         self.javac = javac
+        self.java = java
+        # one shared in-memory javac JVM instead of a javac process per snippet
+        self.compile_server = shared_server(java, javac) if compile_server else None
+        self.cache = cache
+        # sandboxed JVM pool, started on the first snippet that has tests;
+        # close() only shuts down a pool this analyzer started itself
+        self._test_runner = test_runner
+        self._owns_runner = test_runner is None
 
     def analyze_code(self, code: str, tests: List = None) -> CodeMetrics:
+        return self.analyze_jobs([(code, tests)])[0]
+
+    def analyze_many(self, codes: Sequence[str], tests: List = None) -> List[CodeMetrics]:
+        return self.analyze_jobs([(c, tests) for c in codes])
+
+    def analyze_jobs(self, jobs: Sequence[Tuple[str, Optional[List]]]) -> List[CodeMetrics]:
+        """
+        analyze_code for many ``(code, tests)`` pairs. Cached results are
+        returned as is; the remaining distinct snippets are compiled in
+        batched round trips and their tests run in parallel.
+        """
+        keys = [self._key(code, tests) for code, tests in jobs]
+        results: List[Optional[CodeMetrics]] = [None] * len(jobs)
+        pending: Dict[str, Tuple[str, Optional[List]]] = {}
+        for i, ((code, tests), key) in enumerate(zip(jobs, keys)):
+            record = self.cache.lookup(key) if self.cache is not None and key not in pending else None
+            if record is not None:
+                # formatting-dependent, and cheap: always from this snippet's text
+                record["lines_of_code"] = get_context(code).lines_of_code
+                results[i] = CodeMetrics(**record)
+            else:
+                pending.setdefault(key, (code, tests))
+
+        todo = list(pending.values())
+        compiled = self._compile_many([code for code, _ in todo])
+        tested = [(code, tests) for code, tests in todo if tests]
+        runs = iter(self.test_runner.run_many(tested) if tested else [])
+        fresh: Dict[str, CodeMetrics] = {}
+        for key, (code, tests), comp in zip(pending, todo, compiled):
+            fresh[key] = self._metrics(code, comp, next(runs) if tests else None)
+            if self.cache is not None:
+                self.cache.save(key, asdict(fresh[key]))
+        for i, ((code, _), key) in enumerate(zip(jobs, keys)):
+            if results[i] is None:
+                results[i] = replace(fresh[key], lines_of_code=get_context(code).lines_of_code)
+        return results
+
+    def _key(self, code: str, tests: Optional[List]) -> str:
+        if self.cache is None:
+            return repr((code, tests))
+        # results computed without a JDK ("compiler unavailable") or with
+        # another javac must not be served once that changes
+        return self.cache.key_for(code, tests, f"{self.VERSION}|{self.javac}|{javac_version(self.javac)}")
+
+    def _metrics(self, code: str, compiled: Tuple[bool, List[str]], outcomes: Optional[List[TestOutcome]]) -> CodeMetrics:
+        # tokens, AST and metrics are computed once per snippet and shared
+        # with the other analyzers through get_context
         syntax_err = self._check_syntax(code)
-        comp_ok, comp_err = self._compile(code)
-        loc = len([l for l in code.splitlines() if l.strip() and not l.strip().startswith("//")])
+        comp_ok, comp_err = compiled
+        loc = get_context(code).lines_of_code
         cplx = self._complexity(code)
         return CodeMetrics(
             lines_of_code=loc,
             cyclomatic_complexity=cplx,
             compilation_success=comp_ok,
             syntax_errors=syntax_err + comp_err,
-            test_pass_rate=0.0 if tests is None else self._run_tests(code, tests),
+            test_pass_rate=self._pass_rate(outcomes),
+            test_results=[asdict(o) for o in outcomes or []],
         )
 
+    def close(self):
+        """Stop the test JVMs and remove their scratch directory."""
+        if self._owns_runner and self._test_runner is not None:
+            self._test_runner.close()
+            self._test_runner = None
+
+    @property
+    def test_runner(self) -> JavaTestRunner:
+        if self._test_runner is None:
+            self._test_runner = JavaTestRunner(java=self.java, javac=self.javac)
+        return self._test_runner
+
     def _check_syntax(self, code):
-        try:
-            javalang.parse.parse(code)
-            return []
-        except Exception as e:
-            return [str(e)]
+        ctx = get_context(code)
+        return [] if ctx.parses else list(ctx.syntax_errors)
 
     def _compile(self, code):
+        return self._compile_many([code])[0]
+
+    def _compile_many(self, codes):
+        if self.compile_server is not None:
+            try:
+                return self.compile_server.compile_batch(codes)
+            except (CompileServerError, OSError) as e:
+                logger.warning("javac compile server unavailable (%s); compiling one process per snippet", e)
+                self.compile_server = None
+        return [self._compile_subprocess(c) for c in codes]
+
+    def _compile_subprocess(self, code):
         with tempfile.TemporaryDirectory() as d:
-            src = os.path.join(d, "Tmp.java")
+            # javac rejects a public class in a file of another name
+            src = os.path.join(d, source_name(code) + ".java")
             open(src, "w").write(code)
             res = subprocess.run([self.javac, src], capture_output=True, text=True)
             if res.returncode == 0:
@@ -46,24 +135,13 @@ class JavaAnalyzer:
             return False, res.stderr.splitlines()
 
     def _complexity(self, code):
-        try:
-            tree = javalang.parse.parse(code)
-            return sum(
-                1
-                for _, node in tree
-                if isinstance(
-                    node,
-                    (
-                        javalang.tree.IfStatement,
-                        javalang.tree.ForStatement,
-                        javalang.tree.WhileStatement,
-                        javalang.tree.SwitchStatement,
-                        javalang.tree.ConditionalExpression,
-                    ),
-                )
-            ) + 1
-        except Exception:
-            return 0
+        return get_context(code).metrics.get("complexity", 0)
 
     def _run_tests(self, code, tests):
-        return 0.0  # stub
+        return self._pass_rate(self.test_runner.run(code, tests))
+
+    @staticmethod
+    def _pass_rate(outcomes: Optional[List[TestOutcome]]) -> float:
+        if not outcomes:
+            return 0.0
+        return sum(o.passed for o in outcomes) / len(outcomes)
@@ -0,0 +1,255 @@
+"""Run per-problem Java test cases against generated code in a pool of reusable JVMs."""
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+from src.analysis.compile_server import (
+    CompileServerError, JAVA_SOURCE, build_java_tool, read_frame, read_line, shared_server, source_name, write_frame,
+)
+from src.utils.logger import Logger
+from src.utils.sandbox import sandbox_command, sandbox_env
+
+logger = Logger().get()
+
+WORKER_SOURCE = JAVA_SOURCE.with_name("TestWorker.java")
+HARNESS_CLASS = "CandidateTests"
+
+_PACKAGE = re.compile(r"^\s*package\s+[\w.]+\s*;", re.M)
+_HARNESS_IMPORTS = "import java.util.*;\nimport java.util.function.*;\nimport java.util.stream.*;\n"
+_HARNESS_HELPERS = """
+    static void assertTrue(boolean condition) {
+        if (!condition) throw new AssertionError("expected true");
+    }
+    static void assertFalse(boolean condition) {
+        if (condition) throw new AssertionError("expected false");
+    }
+    static void assertEquals(Object expected, Object actual) {
+        if (!java.util.Objects.deepEquals(expected, actual))
+            throw new AssertionError("expected " + java.util.Arrays.deepToString(new Object[] {expected})
+                + " but was " + java.util.Arrays.deepToString(new Object[] {actual}));
+    }
+    static void assertEquals(double expected, double actual, double delta) {
+        if (Math.abs(expected - actual) > delta)
+            throw new AssertionError("expected " + expected + " but was " + actual);
+    }
+"""
+
+
+@dataclass
+class JavaTestCase:
+    """Java statements that throw (e.g. via the harness's assertEquals) when the test fails."""
+    name: str
+    code: str
+
+
+@dataclass
+class TestOutcome:
+    name: str
+    passed: bool
+    status: str  # pass | fail | timeout | compile_error | error
+    message: str = ""
+
+
+def as_test_cases(tests: Sequence[Any]) -> List[JavaTestCase]:
+    """Accept JavaTestCase, {"name", "code"} dicts or bare statement strings."""
+    cases = []
+    for i, t in enumerate(tests):
+        if isinstance(t, JavaTestCase):
+            cases.append(t)
+        elif isinstance(t, dict):
+            cases.append(JavaTestCase(t.get("name", f"test_{i}"), t["code"]))
+        else:
+            cases.append(JavaTestCase(f"test_{i}", str(t)))
+    return cases
+
+
+def build_test_source(code: str, cases: List[JavaTestCase]) -> str:
+    """The candidate plus a CandidateTests class with one static method per test."""
+    methods = "".join(
+        f"    static void test{i}() throws Exception {{\n{case.code}\n    }}\n" for i, case in enumerate(cases)
+    )
+    return (
+        _HARNESS_IMPORTS + _PACKAGE.sub("", code)
+        + f"\n\nfinal class {HARNESS_CLASS} {{\n{_HARNESS_HELPERS}{methods}}}\n"
+    )
+
+
+class WorkerDied(RuntimeError):
+    pass
+
+
+class JvmWorker:
+    """One sandboxed TestWorker JVM, reused across jobs until it dies or is recycled."""
+
+    def __init__(self, java: str, classpath: Path, heap_mb: int, scratch: Path, jvm_args: Sequence[str] = ()):
+        self.jobs = 0
+        self.proc = subprocess.Popen(
+            sandbox_command(
+                [java, f"-Xmx{heap_mb}m", "-Xss8m", "-XX:+UseSerialGC", "-XX:TieredStopAtLevel=1",
+                 "-XX:-UsePerfData", *jvm_args, "-cp", str(classpath), "TestWorker"],
+                file_size_mb=16,
+                no_network=True,
+            ),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=scratch,
+            env=sandbox_env(),
+            start_new_session=True,
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def run(self, class_dir: str, methods: List[str], timeout_s: float) -> Tuple[List[Tuple[str, str]], bool]:
+        """Per-method ``(status, message)``; the flag is True if the watchdog had to kill the JVM."""
+        request = bytearray()
+        for frame in (class_dir, HARNESS_CLASS, str(int(timeout_s * 1000)), str(len(methods)), *methods):
+            write_frame(request, frame)
+        # per-test limits are enforced inside the JVM; this only catches a wedged JVM
+        killed = threading.Event()
+
+        def kill():
+            killed.set()
+            self.kill()
+
+        watchdog = threading.Timer(timeout_s * len(methods) + 15.0, kill)
+        watchdog.start()
+        results: List[Tuple[str, str]] = []
+        try:
+            self.proc.stdin.write(request)
+            self.proc.stdin.flush()
+            for _ in methods:
+                status = read_line(self.proc.stdout)
+                results.append((status, read_frame(self.proc.stdout)))
+        except (OSError, ValueError, CompileServerError) as e:
+            self.kill()
+            raise WorkerDied("timeout" if killed.is_set() else str(e)) from e
+        finally:
+            watchdog.cancel()
+        self.jobs += 1
+        return results, killed.is_set()
+
+    def kill(self):
+        if self.proc.poll() is None:
+            try:
+                os.killpg(self.proc.pid, 9)
+            except OSError:
+                self.proc.kill()
+        self.proc.wait()
+
+
+class JavaTestRunner:
+    """
+    Compiles each candidate with its test harness (through the shared javac
+    compile server) and runs the tests on a pool of ``workers`` reusable,
+    sandboxed TestWorker JVMs. Each test gets ``test_timeout_s`` of wall
+    clock and each JVM a ``heap_mb`` heap. A worker that hangs, exits
+    (System.exit) or runs out of memory is replaced; workers are also
+    recycled after ``max_jobs_per_worker`` jobs.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        test_timeout_s: float = 5.0,
+        heap_mb: int = 256,
+        java: str = "java",
+        javac: str = "javac",
+        max_jobs_per_worker: int = 200,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.test_timeout_s = test_timeout_s
+        self.heap_mb = heap_mb
+        self.java = java
+        self.javac = javac
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.compile_server = shared_server(java, javac)
+        self._idle: "queue.Queue[JvmWorker]" = queue.Queue()
+        self._scratch = Path(tempfile.mkdtemp(prefix="java-tests-"))
+        self._classpath: Optional[Path] = None
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="java-tests")
+
+    def run(self, code: str, tests: Sequence[Any]) -> List[TestOutcome]:
+        return self.run_many([(code, tests)])[0]
+
+    def run_many(self, jobs: Sequence[Tuple[str, Sequence[Any]]]) -> List[List[TestOutcome]]:
+        """Outcomes per test for each ``(code, tests)`` job, in order."""
+        if self._classpath is None:
+            self._classpath = build_java_tool(WORKER_SOURCE, self.javac)
+        cases = [as_test_cases(tests) for _, tests in jobs]
+        root = Path(tempfile.mkdtemp(prefix="run-", dir=self._scratch))
+        try:
+            dirs = [root / str(i) for i in range(len(jobs))]
+            for d in dirs:
+                d.mkdir()
+            sources = [build_test_source(code, c) for (code, _), c in zip(jobs, cases)]
+            compiled = self._compile(sources, dirs)
+            futures = [
+                self._pool.submit(self._execute, str(d), c) if ok else None
+                for d, c, (ok, _) in zip(dirs, cases, compiled)
+            ]
+            results = []
+            for c, (ok, errors), future in zip(cases, compiled, futures):
+                if future is None:
+                    message = errors[0] if errors else "compilation failed"
+                    results.append([TestOutcome(t.name, False, "compile_error", message) for t in c])
+                else:
+                    results.append(future.result())
+            return results
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    def _compile(self, sources: List[str], dirs: List[Path]) -> List[Tuple[bool, List[str]]]:
+        try:
+            return self.compile_server.compile_batch(sources, [str(d) for d in dirs])
+        except (CompileServerError, OSError) as e:
+            logger.warning("javac compile server unavailable (%s); compiling one process per candidate", e)
+        results = []
+        for source, d in zip(sources, dirs):
+            path = d / f"{source_name(source)}.java"
+            path.write_text(source, encoding="utf-8")
+            res = subprocess.run([self.javac, "-nowarn", "-d", str(d), str(path)], capture_output=True, text=True)
+            results.append((res.returncode == 0, res.stderr.splitlines()))
+        return results
+
+    def _acquire(self) -> JvmWorker:
+        try:
+            worker = self._idle.get_nowait()
+            if worker.alive and worker.jobs < self.max_jobs_per_worker:
+                return worker
+            worker.kill()
+        except queue.Empty:
+            pass
+        return JvmWorker(self.java, self._classpath, self.heap_mb, self._scratch)
+
+    def _execute(self, class_dir: str, cases: List[JavaTestCase]) -> List[TestOutcome]:
+        worker = self._acquire()
+        methods = [f"test{i}" for i in range(len(cases))]
+        try:
+            raw, killed = worker.run(class_dir, methods, self.test_timeout_s)
+        except WorkerDied as e:
+            status = "timeout" if str(e) == "timeout" else "error"
+            return [TestOutcome(c.name, False, status, f"test JVM exited: {e}") for c in cases]
+
+        # a hung test makes the JVM exit; an OOM may leave it in a bad state
+        if killed or not worker.alive or any(s == "timeout" or "OutOfMemoryError" in m for s, m in raw):
+            worker.kill()
+        else:
+            self._idle.put(worker)
+        return [TestOutcome(c.name, status == "pass", status, msg) for c, (status, msg) in zip(cases, raw)]
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        while not self._idle.empty():
+            self._idle.get_nowait().kill()
+        shutil.rmtree(self._scratch, ignore_errors=True)
@@ -0,0 +1,54 @@
+"""pass@k over multiple samples of the same generation request."""
+from typing import Any, List, Optional
+
+import numpy as np
+
+
+def pass_at_k(n: int, c: int, k: int) -> float:
+    """
+    Unbiased pass@k estimate from ``n`` samples of which ``c`` are correct
+    (Chen et al., 2021): 1 - C(n - c, k) / C(n, k), in a numerically stable
+    product form.
+    """
+    if n - c < k:
+        return 1.0
+    return float(1.0 - np.prod(1.0 - k / np.arange(n - c + 1, n + 1)))
+
+
+def is_correct(result: Any) -> Optional[bool]:
+    """A sample's test verdict, or None when it was never executed."""
+    passed = getattr(result, "passed", None)
+    return None if passed is None else bool(passed)
+
+
+def group_by_request(results: List[Any]) -> List[List[Any]]:
+    """
+    Split a result list (samples of a request adjacent, as returned by
+    CodeGenerator.batch_generate / ResultsJournal.load_results) into one
+    list of samples per request.
+    """
+    groups: List[List[Any]] = []
+    for result in results:
+        if groups and getattr(result, "sample_index", 0) > 0 and groups[-1][0].request == result.request:
+            groups[-1].append(result)
+        else:
+            groups.append([result])
+    return groups
+
+
+def pass_at_k_for(samples: List[Any], k: int) -> float:
+    """
+    pass@k of one request's samples (k is capped at the sample count); NaN
+    unless every sample has a test verdict, since generation success says
+    nothing about correctness.
+    """
+    verdicts = [is_correct(s) for s in samples]
+    if not verdicts or None in verdicts:
+        return float("nan")
+    n = len(verdicts)
+    return pass_at_k(n, sum(verdicts), min(k, n))
+
+
+def success_rate(samples: List[Any]) -> float:
+    """Fraction of one request's samples that generated without error."""
+    return sum(bool(getattr(s, "success", False)) for s in samples) / len(samples) if samples else 0.0
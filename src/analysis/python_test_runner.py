@@ -0,0 +1,183 @@
+"""Execute generated Python against HumanEval / MBPP tests in isolated worker processes."""
+import json
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.utils.logger import Logger
+from src.utils.sandbox import sandbox_command, sandbox_env
+
+logger = Logger().get()
+
+WORKER_SCRIPT = Path(__file__).with_name("python_worker.py")
+
+_FENCE = re.compile(r"```(?:python|py)?[ \t]*\n(.*?)```", re.S)
+
+
+@dataclass
+class ExecutionOutcome:
+    passed: bool
+    status: str  # passed | failed | timeout | error
+    message: str = ""
+
+
+def extract_code(text: str) -> str:
+    """Body of the first fenced code block when the model wrapped its answer in markdown."""
+    match = _FENCE.search(text)
+    return match.group(1) if match else text
+
+
+def build_program(problem: Dict[str, Any], completion: str) -> Optional[str]:
+    """
+    Candidate plus tests as one script, or None if the problem has no tests.
+    HumanEval problems (``entry_point`` and a ``check`` function in
+    ``test_cases``) get the prompt prepended when the completion does not
+    define the entry point itself; MBPP problems carry a list of asserts.
+    """
+    tests = problem.get("test_cases")
+    if not tests:
+        return None
+    code = extract_code(completion)
+    entry_point = problem.get("entry_point")
+    if entry_point:
+        if not re.search(rf"^\s*def\s+{re.escape(entry_point)}\s*\(", code, re.M):
+            code = problem.get("description", "") + code
+        return f"{code}\n\n{tests}\n\ncheck({entry_point})\n"
+    if isinstance(tests, str):
+        tests = [tests]
+    return code + "\n\n" + "\n".join(tests) + "\n"
+
+
+class _ForkServer:
+    """One ``python -I python_worker.py`` process; requests and answers are JSON lines."""
+
+    def __init__(self, python: str, scratch: Path):
+        self.proc = subprocess.Popen(
+            sandbox_command([python, "-I", str(WORKER_SCRIPT)], no_network=True),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            cwd=scratch,
+            env=sandbox_env(TMPDIR=str(scratch)),
+            start_new_session=True,
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def run(self, program: str, timeout_s: float, memory_mb: int) -> ExecutionOutcome:
+        request = json.dumps({"program": program, "timeout": timeout_s, "memory_mb": memory_mb})
+        # the server enforces the timeout itself; this only catches a wedged server
+        watchdog = threading.Timer(timeout_s + 10.0, self.kill)
+        watchdog.start()
+        try:
+            self.proc.stdin.write(request + "\n")
+            self.proc.stdin.flush()
+            line = self.proc.stdout.readline()
+        except OSError as e:
+            line, error = "", e
+        else:
+            error = None
+        finally:
+            watchdog.cancel()
+        if not line:
+            self.kill()
+            return ExecutionOutcome(False, "error", f"execution worker died: {error or 'no response'}")
+        response = json.loads(line)
+        return ExecutionOutcome(response["status"] == "passed", response["status"], response.get("message", ""))
+
+    def kill(self):
+        if self.proc.poll() is None:
+            try:
+                os.killpg(self.proc.pid, 9)
+            except OSError:
+                self.proc.kill()
+        self.proc.wait()
+
+
+class PythonTestRunner:
+    """
+    Scores programs on ``workers`` fork servers in parallel. Each server is
+    an isolated interpreter (``python -I``, scrubbed environment, no
+    network where namespaces allow it) that forks a fresh child per
+    program, so samples never share interpreter state yet pay no
+    interpreter start-up. Children get ``timeout_s`` of wall clock and
+    ``memory_mb`` of address space.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        timeout_s: float = 3.0,
+        memory_mb: int = 512,
+        python: str = sys.executable,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout_s = timeout_s
+        self.memory_mb = memory_mb
+        self.python = python
+        self._scratch = Path(tempfile.mkdtemp(prefix="python-tests-"))
+        self._idle: "queue.Queue[_ForkServer]" = queue.Queue()
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="python-tests")
+
+    def run(self, program: str) -> ExecutionOutcome:
+        return self.run_many([program])[0]
+
+    def run_many(self, programs: Sequence[str]) -> List[ExecutionOutcome]:
+        return list(self._pool.map(self._execute, programs))
+
+    def _execute(self, program: str) -> ExecutionOutcome:
+        try:
+            server = self._idle.get_nowait()
+            if not server.alive:
+                server = _ForkServer(self.python, self._scratch)
+        except queue.Empty:
+            server = _ForkServer(self.python, self._scratch)
+        outcome = server.run(program, self.timeout_s, self.memory_mb)
+        if server.alive:
+            self._idle.put(server)
+        return outcome
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        while not self._idle.empty():
+            server = self._idle.get_nowait()
+            server.proc.stdin.close()  # the fork server exits at end of input
+            try:
+                server.proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        shutil.rmtree(self._scratch, ignore_errors=True)
+
+
+def execute_results(results: List[Any], problems: List[Dict[str, Any]], runner: PythonTestRunner) -> int:
+    """
+    Run every result whose problem has Python tests and set its ``passed``
+    (failed generations count as not passed). Returns how many were run.
+    """
+    by_id = {p["id"]: p for p in problems}
+    pending = []
+    for result in results:
+        problem = by_id.get(result.request.problem_id)
+        program = build_program(problem, result.generated_code) if problem else None
+        if program is None:
+            continue
+        if not result.success:
+            result.passed = False
+            continue
+        pending.append((result, program))
+
+    for (result, _), outcome in zip(pending, runner.run_many([p for _, p in pending])):
+        result.passed = outcome.passed
+    return len(pending)
@@ -0,0 +1,115 @@
+"""
+Fork server for src/analysis/python_test_runner.py; runs as a standalone
+script under ``python -I`` and must not import anything from ``src``.
+
+Reads one JSON request per line ({"program", "timeout", "memory_mb"}) and
+answers each with one JSON line ({"status", "message"}). Every program runs
+in a child forked from this small, clean process: a fresh ``__main__``
+namespace, its own temp directory, rlimits on memory, CPU time, file size
+and processes, and the destructive parts of os/shutil/subprocess disabled.
+The parent kills the child when it exceeds its wall-clock timeout.
+"""
+import json
+import math
+import os
+import resource
+import select
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+
+def _guard(memory_mb: int, cpu_s: int):
+    """Limits and best-effort hardening inside the child (HumanEval-style)."""
+    for kind, value in ((resource.RLIMIT_AS, memory_mb * 2**20), (resource.RLIMIT_DATA, memory_mb * 2**20),
+                        (resource.RLIMIT_CPU, cpu_s), (resource.RLIMIT_FSIZE, 2**20),
+                        (resource.RLIMIT_NPROC, 0), (resource.RLIMIT_CORE, 0)):
+        try:
+            resource.setrlimit(kind, (value, value))
+        except (ValueError, OSError):
+            pass
+
+    import builtins
+    import shutil
+    import subprocess
+
+    builtins.exit = builtins.quit = None
+    for name in ("kill", "killpg", "system", "putenv", "remove", "removedirs", "rmdir", "fchdir", "setuid",
+                 "fork", "forkpty", "rename", "renames", "truncate", "replace", "unlink", "fchmod", "fchown",
+                 "chmod", "chown", "chroot", "lchown", "execv", "execve", "spawnv", "popen"):
+        if hasattr(os, name):
+            setattr(os, name, None)
+    shutil.rmtree = shutil.move = shutil.chown = None
+    subprocess.Popen = None
+
+
+def _child(program: str, memory_mb: int, cpu_s: int, out_fd: int):
+    status, message = "passed", ""
+    try:
+        os.chdir(tempfile.mkdtemp(prefix="sample-"))
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        _guard(memory_mb, cpu_s)
+        code = compile(program, "<sample>", "exec")
+        exec(code, {"__name__": "__main__", "__builtins__": __builtins__})
+    except BaseException as e:  # SystemExit and friends count as failures too
+        status = "failed"
+        message = "".join(traceback.format_exception_only(type(e), e)).strip()[-500:]
+    os.write(out_fd, json.dumps({"status": status, "message": message}).encode())
+    os._exit(0)
+
+
+def _run(request: dict) -> dict:
+    timeout = float(request.get("timeout", 3.0))
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        _child(request["program"], int(request.get("memory_mb", 512)), math.ceil(timeout) + 1, write_fd)
+    os.close(write_fd)
+
+    chunks, deadline, timed_out = [], time.monotonic() + timeout, False
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            break
+        ready, _, _ = select.select([read_fd], [], [], remaining)
+        if not ready:
+            continue
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    if timed_out:
+        os.kill(pid, signal.SIGKILL)
+    _, wait_status = os.waitpid(pid, 0)
+
+    if timed_out:
+        return {"status": "timeout", "message": f"exceeded {timeout:g}s"}
+    if chunks:
+        return json.loads(b"".join(chunks))
+    if os.WIFSIGNALED(wait_status):
+        return {"status": "failed", "message": f"killed by signal {os.WTERMSIG(wait_status)}"}
+    return {"status": "failed", "message": "no result (out of memory?)"}
+
+
+def main():
+    out = sys.stdout
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            response = _run(json.loads(line))
+        except Exception as e:
+            response = {"status": "error", "message": repr(e)}
+        out.write(json.dumps(response) + "\n")
+        out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,8 @@
+from typing import Dict
+
+from src.analysis.analysis_context import get_context
+
+
 class ReasoningChainAnalyzer:
     def analyze_reasoning_impact(self, code_without_cot: str, code_with_cot: str) -> Dict:
         """Analyze how CoT reasoning changes code structure and logic."""
@@ -8,3 +13,34 @@ class ReasoningChainAnalyzer:
             "variable_naming_quality": self._compare_naming_conventions(code_without_cot, code_with_cot),
             "comment_quality_improvement": self._analyze_documentation(code_without_cot, code_with_cot)
         }
+
+    # positive values mean the CoT version scores higher
+    def _measure_complexity_delta(self, before: str, after: str) -> int:
+        return get_context(after).metrics.get("complexity", 0) - get_context(before).metrics.get("complexity", 0)
+
+    def _compare_error_handling(self, before: str, after: str) -> int:
+        def handled(code):
+            counts = get_context(code).metrics.get("exception_handling", {})
+            return counts.get("catch_clauses", 0) + counts.get("throws_declarations", 0) - counts.get("empty_catches", 0)
+        return handled(after) - handled(before)
+
+    def _analyze_structure_improvement(self, before: str, after: str) -> int:
+        """Change in the number of methods (decomposition into helpers)."""
+        def methods(code):
+            return get_context(code).metrics.get("access_modifiers", {}).get("methods", 0)
+        return methods(after) - methods(before)
+
+    def _compare_naming_conventions(self, before: str, after: str) -> float:
+        def conforming(code):
+            naming = get_context(code).metrics.get("naming")
+            if not naming or not naming["names"]:
+                return 0.0
+            return 1 - len(naming["violations"]) / naming["names"]
+        return conforming(after) - conforming(before)
+
+    def _analyze_documentation(self, before: str, after: str) -> float:
+        """Change in comment lines per line of code."""
+        def density(code):
+            ctx = get_context(code)
+            return ctx.comment_lines / max(ctx.lines_of_code, 1)
+        return density(after) - density(before)
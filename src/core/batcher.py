@@ -0,0 +1,82 @@
+"""Dynamic micro-batching for local model clients."""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from src.utils.logger import Logger
+
+logger = Logger().get()
+
+
+@dataclass
+class _Pending:
+    prompt: str
+    future: asyncio.Future
+
+
+class MicroBatcher:
+    """
+    Collects concurrent generate calls per model for a short window and
+    hands them to the client's ``generate_batch`` as one padded batch.
+
+    Pending prompts are grouped by model *and* decoding parameters, since a
+    single ``model.generate`` call runs with one temperature / token budget.
+    """
+
+    def __init__(self, max_batch_size: int = 8, max_wait_ms: float = 20.0):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queues: Dict[Tuple, List[_Pending]] = {}
+        self._timers: Dict[Tuple, asyncio.TimerHandle] = {}
+        self._running: set = set()
+
+    async def submit(self, model_name: str, client: Any, prompt: str, **kwargs):
+        """Queue one prompt and wait for its slice of the batched output."""
+        loop = asyncio.get_running_loop()
+        key = (model_name, tuple(sorted(kwargs.items())))
+        future = loop.create_future()
+
+        queue = self._queues.setdefault(key, [])
+        queue.append(_Pending(prompt, future))
+
+        if len(queue) >= self.max_batch_size:
+            self._flush(key, client, kwargs)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(
+                self.max_wait, self._flush, key, client, kwargs
+            )
+        return await future
+
+    def _flush(self, key: Tuple, client: Any, kwargs: Dict):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._queues.pop(key, [])
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._run(key[0], client, batch, kwargs))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, model_name: str, client: Any, batch: List[_Pending], kwargs: Dict):
+        logger.debug("Batching %d prompts for %s", len(batch), model_name)
+        try:
+            outputs = await client.generate_batch([p.prompt for p in batch], **kwargs)
+        except Exception as e:
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(e)
+            return
+
+        if len(outputs) != len(batch):
+            err = RuntimeError(
+                f"{model_name} returned {len(outputs)} outputs for {len(batch)} prompts"
+            )
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(err)
+            return
+
+        for p, out in zip(batch, outputs):
+            if not p.future.done():
+                p.future.set_result(out)
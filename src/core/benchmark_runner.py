@@ -3,22 +3,22 @@ import asyncio
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 
+from src.analysis.python_test_runner import PythonTestRunner, execute_results
 from src.core.prompt_manager     import PromptManager
 from src.core.code_generator     import CodeGenerator, GenerationRequest
+from src.core.generation_cache   import GenerationCache
+from src.core.inference_executor import InferenceExecutor
+from src.core.model_registry     import LazyModelClients
+from src.core.model_residency    import ResidencyManager
+from src.core.request_planner    import plan_requests
+from src.core.results_journal    import ResultsJournal, request_key
+from src.core.scheduler          import FairScheduler
+from src.core.token_budget       import TokenBudgetPlanner
 from src.utils.logger            import Logger
 from src.utils.report_generator  import ReportGenerator
 
-# -- model clients -------------------------------------------------
-from src.models.local_stub       import LocalStub
-from src.models.codet5_small     import CodeT5Small
-from src.models.starcoder_1b     import StarCoder1B
-
-from src.models.hf_model         import HuggingFaceModel, HFSettings
-# Uncomment if/when you want to use OpenAI again
-# from src.models.openai_client    import OpenAIClient
-
 logger = Logger().get()
 
 
@@ -36,17 +36,80 @@ class BenchmarkRunner:
         self.prompt_mgr = PromptManager(self.cfg["prompts_path"])
 
         # ------------------------------------------------------------------
-        # model clients dictionary
-        # keys must match names in config["models"]
+        # per-model worker pools for blocking inference
+        # ------------------------------------------------------------------
+        self.executors = InferenceExecutor(self.cfg.get("executors"))
+
+        # ------------------------------------------------------------------
+        # model clients, built from the registry on first use
+        # names must match src/core/model_registry.MODEL_REGISTRY
+        # ------------------------------------------------------------------
+        self.clients = LazyModelClients(
+            self.cfg["models"],
+            self.cfg.get("model_settings"),
+            on_create=self.executors.bind,
+        )
+
+        # ------------------------------------------------------------------
+        # on-disk generation cache, enabled by a "cache" config block
+        # ------------------------------------------------------------------
+        cache_cfg = dict(self.cfg.get("cache") or {})
+        cache = None
+        if cache_cfg and cache_cfg.pop("enabled", True):
+            cache = GenerationCache(**cache_cfg)
+
+        # ------------------------------------------------------------------
+        # optional memory budget: LRU load/unload of model weights
+        # ------------------------------------------------------------------
+        self.residency = None
+        if self.cfg.get("memory_budget_mb"):
+            pinned = [m for m in self.cfg["models"] if not self.executors.can_unload(m)]
+            if pinned:
+                raise ValueError(
+                    f"memory_budget_mb cannot unload {pinned}: their process pools have several "
+                    "workers; use \"workers\": 1 or \"kind\": \"replicas\""
+                )
+            self.residency = ResidencyManager(
+                self.clients,
+                budget_mb=self.cfg["memory_budget_mb"],
+                footprints_mb=self.cfg.get("model_footprints_mb"),
+            )
+
         # ------------------------------------------------------------------
+        # concurrency: global budget plus optional per-model budgets/weights
+        # ------------------------------------------------------------------
+        scheduler = FairScheduler(
+            max_concurrent=self.cfg.get("max_concurrent_requests", 5),
+            model_limits=self.cfg.get("model_concurrency"),
+            weights=self.cfg.get("model_weights"),
+        )
+
+        # ------------------------------------------------------------------
+        # decode budgets from template estimates and past output lengths;
+        # on unless "token_budget": {"enabled": false}
+        # ------------------------------------------------------------------
+        budget_cfg = dict(self.cfg.get("token_budget") or {})
+        self.token_budget = None
+        if budget_cfg.pop("enabled", True):
+            self.token_budget = TokenBudgetPlanner(**budget_cfg)
+            self.token_budget.load_history()
+
+        # ------------------------------------------------------------------
+        # run generated Python against the problem set's tests (HumanEval /
+        # MBPP). This executes untrusted model output, so it is opt-in:
+        # "execution": {"enabled": true} (see config/python_benchmarks.json)
+        # ------------------------------------------------------------------
+        self.execution_cfg = dict(self.cfg.get("execution") or {})
+        self.execute_tests = self.execution_cfg.pop("enabled", False)
+
         self.gen = CodeGenerator(
-    {
-       "local-stub":   LocalStub(),
-    "codet5-small": CodeT5Small(),
-    "starcoder-1b": StarCoder1B(),
-    "codegen-350m": HuggingFaceModel(HFSettings("Salesforce/codegen-350M-mono")),
-    }
-)
+            self.clients,
+            batching=self.cfg.get("batching"),
+            cache=cache,
+            scheduler=scheduler,
+            residency=self.residency,
+            token_budget=self.token_budget,
+        )
 
 
         self.reporter = ReportGenerator()
@@ -58,6 +121,15 @@ class BenchmarkRunner:
         path = Path(f"data/input/problem_sets/{name}.json")
         return json.loads(path.read_text(encoding="utf-8"))
 
+    def _execute_tests(self, results, problems):
+        runner = PythonTestRunner(**self.execution_cfg)
+        try:
+            ran = execute_results(results, problems, runner)
+        finally:
+            runner.close()
+        passed = sum(1 for r in results if r.passed)
+        logger.info("Executed %d generations against their tests, %d passed", ran, passed)
+
     def _build_requests(self, problems) -> List[GenerationRequest]:
         reqs: List[GenerationRequest] = []
         for pb in problems:
@@ -71,12 +143,18 @@ class BenchmarkRunner:
                         example_output=pb.get("example_output", ""),
                     )
                     for model in self.cfg["models"]:
+                        max_tokens = GenerationRequest.max_tokens
+                        if self.token_budget is not None:
+                            max_tokens = self.token_budget.budget_for(model, strat.value, tmpl.expected_tokens)
                         reqs.append(
                             GenerationRequest(
                                 prompt=prompt,
                                 strategy=strat.value,
                                 problem_id=pb["id"],
                                 model_name=model,
+                                seed=self.cfg.get("seed"),
+                                num_samples=self.cfg.get("num_samples", 1),
+                                max_tokens=max_tokens,
                             )
                         )
         return reqs
@@ -84,20 +162,55 @@ class BenchmarkRunner:
     # ----------------------------------------------------------------------
     # public API
     # ----------------------------------------------------------------------
-    async def run(self, set_name: str):
+    async def run(self, set_name: str, resume: Optional[str] = None):
+        """Run the full grid, or with ``resume=<run_id>`` only what that run has not completed."""
+        if resume:
+            run_id = resume
+        else:
+            run_id = f"{set_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        journal   = ResultsJournal(Path(f"data/results/{run_id}.jsonl"))
+        if resume and not journal.path.exists():
+            raise FileNotFoundError(f"No results journal for run {run_id}: {journal.path}")
+
+        # start loading weights while the prompt grid is being built; under a
+        # memory budget only the first model, the rest load on demand
+        if self.residency is None:
+            preload = self.clients.preload()
+        else:
+            preload = asyncio.ensure_future(self.residency.preload(self.cfg["models"][0]))
         problems  = self._load_problem_set(set_name)["problems"]
-        requests  = self._build_requests(problems)
+        requests  = await asyncio.to_thread(self._build_requests, problems)
         logger.info("Total requests %d", len(requests))
 
-        results   = await self.gen.batch_generate(requests)
-
-        ts        = datetime.now().strftime("%Y%m%d_%H%M%S")
-        out_path  = Path(f"data/results/{set_name}_{ts}.json")
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        out_path.write_text(
-            json.dumps([r.__dict__ for r in results], default=str, indent=2),
-            encoding="utf-8",
-        )
+        # group by model / shared prompt prefix; indices keep the grid order
+        plan      = plan_requests(requests, self.cfg["models"])
+
+        if resume:
+            done  = journal.completed_keys()
+            plan  = [(i, r) for i, r in plan if request_key(r) not in done]
+            logger.info("Resuming %s: %d already completed, %d remaining", run_id, len(done), len(plan))
+
+        logger.info("Streaming results to %s", journal.path)
+
+        # each result hits the journal as soon as it finishes, so an
+        # interrupted run keeps everything completed so far
+        try:
+            async for index, result in self.gen.iter_indexed(plan):
+                journal.append(result, index)
+        finally:
+            journal.close()
+            await preload
+            # releases weights and pooled HTTP sessions
+            for client in self.clients.created().values():
+                await client.close()
+            self.executors.shutdown()
+
+        results   = list(journal.load_results())
+        if self.execute_tests and any(p.get("test_cases") for p in problems):
+            await asyncio.to_thread(self._execute_tests, results, problems)
+
+        out_path  = Path(f"data/results/{run_id}.json")
+        journal.export_json(out_path, results)
         logger.info("Saved raw results to %s", out_path)
 
         self.reporter.generate_comprehensive_report(results, set_name)
@@ -1,9 +1,17 @@
 ﻿import asyncio
+import contextlib
 import time
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import asdict, dataclass, replace
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
 
+from src.core.batcher import MicroBatcher
+from src.core.generation_cache import GenerationCache
+from src.core.model_residency import ResidencyManager
+from src.core.request_planner import plan_requests
+from src.core.scheduler import FairScheduler
+from src.core.token_budget import TokenBudgetPlanner
 from src.utils.logger import Logger
 
 logger = Logger().get()
@@ -16,6 +24,17 @@ class GenerationRequest:
     model_name: str
     temperature: float = 0.7
     max_tokens: int = 1500
+    seed: Optional[int] = None
+    num_samples: int = 1  # independent samples drawn from one generate call
+
+@dataclass
+class GenerationTiming:
+    """Seconds spent in each phase of one model call (shared by a micro-batch)."""
+    load: float = 0.0
+    tokenize: float = 0.0
+    time_to_first_token: float = 0.0
+    decode: float = 0.0
+    postprocess: float = 0.0
 
 @dataclass
 class GenerationResult:
@@ -26,60 +45,280 @@ class GenerationResult:
     timestamp: datetime
     success: bool
     error_message: Optional[str] = None
+    cached: bool = False
+    timing: Optional[GenerationTiming] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    sample_index: int = 0
+    finish_reason: Optional[str] = None  # "length" when max_tokens cut it off
+    acceptance_rate: Optional[float] = None  # share of draft tokens kept (assisted decoding)
+    passed: Optional[bool] = None  # all problem tests passed; None until executed
 
 class CodeGenerator:
-    def __init__(self, model_clients: Dict[str, Any]):
+    def __init__(
+        self,
+        model_clients: Dict[str, Any],
+        batching: Optional[Dict] = None,
+        cache: Optional[GenerationCache] = None,
+        scheduler: Optional[FairScheduler] = None,
+        residency: Optional[ResidencyManager] = None,
+        token_budget: Optional[TokenBudgetPlanner] = None,
+    ):
         self.clients = model_clients
+        self.cache = cache
+        self.token_budget = token_budget
+        self.scheduler = scheduler or FairScheduler(max_concurrent=5)
+        self.residency = residency
+        if residency is not None and self.scheduler.prefer is None:
+            self.scheduler.prefer = residency.is_resident
+
+        # clients exposing generate_batch() get their concurrent requests
+        # coalesced into one padded forward pass (see src/core/batcher.py)
+        batching = dict(batching or {})
+        if batching.pop("enabled", True):
+            self.batcher = MicroBatcher(**batching)
+        else:
+            self.batcher = None
+
+    async def _generate(self, request: GenerationRequest) -> List[GenerationResult]:
+        """One result per requested sample."""
+        results = await self._generate_cached(request)
+        if self.token_budget is None:
+            return results
+
+        # outputs cut off by the decode budget are redone with a larger one
+        while any(r.finish_reason == "length" for r in results):
+            budget = self.token_budget.retry_budget(request.max_tokens)
+            if budget is None:
+                break
+            logger.info(
+                "%s/%s hit max_tokens=%d, retrying with %d",
+                request.model_name, request.problem_id, request.max_tokens, budget,
+            )
+            request = replace(request, max_tokens=budget)
+            results = await self._generate_cached(request)
+        self.token_budget.observe_results(results)
+        return results
+
+    async def _generate_cached(self, request: GenerationRequest) -> List[GenerationResult]:
+        if self.cache is None:
+            return await self._generate_uncached(request)
 
-    async def _generate(self, request: GenerationRequest) -> GenerationResult:
         try:
-            start_time = time.time()
-            
+            key = self.cache.key_for(request, self.clients[request.model_name])
+        except Exception:
+            # let the uncached path report the failure
+            return await self._generate_uncached(request)
+
+        record = self.cache.lookup(key, request.max_tokens)
+        if record is not None:
+            # keep the originally measured latency so timing stats stay meaningful
+            return [
+                GenerationResult(
+                    request=request,
+                    generated_code=sample["generated_code"],
+                    execution_time=sample["execution_time"],
+                    token_count=sample["token_count"],
+                    timestamp=datetime.now(),
+                    success=True,
+                    error_message=None,
+                    cached=True,
+                    timing=GenerationTiming(**sample["timing"]) if sample.get("timing") else None,
+                    input_tokens=sample.get("input_tokens", 0),
+                    output_tokens=sample.get("output_tokens", 0),
+                    sample_index=i,
+                    finish_reason=sample.get("finish_reason"),
+                    acceptance_rate=sample.get("acceptance_rate"),
+                )
+                for i, sample in enumerate(record.get("samples", [record]))
+            ]
+
+        # only identical budgets share an in-flight run
+        results, shared = await self.cache.coalesce(
+            f"{key}:{request.max_tokens}", lambda: self._generate_uncached(request)
+        )
+        if shared:
+            return [replace(r, request=request, cached=True) for r in results]
+        if all(r.success and self.cache.cacheable(r.generated_code) for r in results):
+            self.cache.save(key, {"max_tokens": request.max_tokens, "samples": [
+                {
+                    "generated_code": r.generated_code,
+                    "execution_time": r.execution_time,
+                    "token_count": r.token_count,
+                    "timing": asdict(r.timing) if r.timing else None,
+                    "input_tokens": r.input_tokens,
+                    "output_tokens": r.output_tokens,
+                    "finish_reason": r.finish_reason,
+                    "acceptance_rate": r.acceptance_rate,
+                }
+                for r in results
+            ]})
+        return results
+
+    async def _generate_uncached(self, request: GenerationRequest) -> List[GenerationResult]:
+        n = request.num_samples
+        try:
             model = self.clients[request.model_name]
-            resp = await model.generate_code(
-                request.prompt,
+            kwargs = dict(
                 temperature=request.temperature,
-                max_tokens=request.max_tokens
-            )
-            
-            execution_time = time.time() - start_time
-            
-            # Handle both string and dict responses
-            if isinstance(resp, dict):
-                generated_code = resp.get("code", resp.get("text", str(resp)))
-                token_count = resp.get("token_count", len(generated_code.split()))
-            else:
-                # resp is a plain string
-                generated_code = str(resp)
-                token_count = len(generated_code.split())
-            
-            return GenerationResult(
-                request=request,
-                generated_code=generated_code,
-                execution_time=execution_time,
-                token_count=token_count,
-                timestamp=datetime.now(),
-                success=True,
-                error_message=None
+                max_tokens=request.max_tokens,
+                seed=request.seed,
             )
+
+            # time only the model call, not the wait for a scheduler slot
+            # or for the residency manager to (re)load the weights; residency
+            # comes first so a request waiting for room holds no global slot
+            async with self._resident(request.model_name), self.scheduler.slot(request.model_name):
+                start_time = time.perf_counter()
+                # local HF clients (the ones with generate_batch) draw all n
+                # samples from one num_return_sequences call
+                multi_sample = hasattr(model, "generate_batch")
+                if n != 1 and multi_sample:
+                    kwargs["num_samples"] = n
+                if self.batcher is not None and multi_sample:
+                    resp = await self.batcher.submit(
+                        request.model_name, model, request.prompt, **kwargs
+                    )
+                elif n != 1 and not multi_sample:
+                    # no batched sampling: one call per sample, distinct seeds
+                    resp = await asyncio.gather(*[
+                        model.generate_code(
+                            request.prompt,
+                            **dict(kwargs, seed=None if request.seed is None else request.seed + i),
+                        )
+                        for i in range(n)
+                    ])
+                else:
+                    resp = await model.generate_code(request.prompt, **kwargs)
+                execution_time = time.perf_counter() - start_time
+
+            # a client error comes back as a single response for all samples
+            samples = resp if isinstance(resp, list) else [resp] * n
+            return [
+                self._to_result(request, sample, execution_time, i)
+                for i, sample in enumerate(samples)
+            ]
             
         except Exception as e:
-            return GenerationResult(
-                request=request,
-                generated_code="",
-                execution_time=0,
-                token_count=0,
-                timestamp=datetime.now(),
-                success=False,
-                error_message=str(e)
-            )
+            return [
+                GenerationResult(
+                    request=request,
+                    generated_code="",
+                    execution_time=0,
+                    token_count=0,
+                    timestamp=datetime.now(),
+                    success=False,
+                    error_message=str(e),
+                    sample_index=i,
+                )
+                for i in range(n)
+            ]
+
+    @staticmethod
+    def _to_result(request: GenerationRequest, resp: Any, execution_time: float, sample_index: int) -> GenerationResult:
+        # Handle both string and dict responses
+        timing = None
+        finish_reason = acceptance_rate = None
+        input_tokens = output_tokens = 0
+        if isinstance(resp, dict):
+            generated_code = resp.get("code", resp.get("text", str(resp)))
+            token_count = resp.get("token_count", len(generated_code.split()))
+            input_tokens = resp.get("input_tokens", 0)
+            output_tokens = resp.get("output_tokens", 0)
+            finish_reason = resp.get("finish_reason")
+            acceptance_rate = resp.get("acceptance_rate")
+            if resp.get("timing"):
+                timing = GenerationTiming(**resp["timing"])
+                # a lazy first load is reported separately, not as latency
+                execution_time = max(execution_time - timing.load, 0.0)
+        else:
+            # resp is a plain string
+            generated_code = str(resp)
+            token_count = len(generated_code.split())
+
+        return GenerationResult(
+            request=request,
+            generated_code=generated_code,
+            execution_time=execution_time,
+            token_count=token_count,
+            timestamp=datetime.now(),
+            success=True,
+            error_message=None,
+            timing=timing,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            sample_index=sample_index,
+            finish_reason=finish_reason,
+            acceptance_rate=acceptance_rate,
+        )
 
-    async def batch_generate(self, requests: List[GenerationRequest]):
-        sem = asyncio.Semaphore(5)
+    def _resident(self, model_name: str):
+        if self.residency is None:
+            return contextlib.nullcontext()
+        return self.residency.hold(model_name)
 
-        async def safe_gen(r: GenerationRequest):
-            async with sem:
-                return await self._generate(r)
+    async def iter_generate(self, requests: Iterable[GenerationRequest]) -> AsyncIterator[GenerationResult]:
+        """
+        Yield results in completion order as soon as each one finishes.
+        ``requests`` is read up front (see iter_indexed); results are not held.
+        """
+        async for _, result in self.iter_indexed(enumerate(requests)):
+            yield result
+
+    async def iter_indexed(
+        self, items: Iterable[Tuple[int, GenerationRequest]]
+    ) -> AsyncIterator[Tuple[int, GenerationResult]]:
+        """
+        Like iter_generate, for ``(index, request)`` pairs such as the output
+        of request_planner.plan_requests; dispatch follows the given order and
+        each result is yielded with its index.
+
+        ``items`` is consumed eagerly into per-model queues: the plan groups
+        requests by model, so reading it lazily would leave later models idle
+        until earlier ones drain. Only the in-flight window becomes tasks.
+        """
+        # requests wait in per-model queues and only a couple of scheduler
+        # budgets' worth per model are turned into tasks, so every model
+        # always has work in front of the fair scheduler
+        queues: Dict[str, deque] = {}
+        for item in items:
+            queues.setdefault(item[1].model_name, deque()).append(item)
+        inflight: Dict[str, int] = {m: 0 for m in queues}
+        pending: Dict[asyncio.Future, str] = {}
+
+        async def run(i: int, r: GenerationRequest):
+            return i, await self._generate(r)
+
+        def fill():
+            for model, queue in queues.items():
+                window = 2 * self.scheduler.limit_for(model)
+                while queue and inflight[model] < window:
+                    i, r = queue.popleft()
+                    inflight[model] += 1
+                    pending[asyncio.ensure_future(run(i, r))] = model
+
+        fill()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    inflight[pending.pop(task)] -= 1
+                fill()
+                for task in done:
+                    i, results = task.result()
+                    for result in results:
+                        yield i, result
+        finally:
+            for task in pending:
+                task.cancel()
 
-        tasks = [safe_gen(r) for r in requests]
-        return await asyncio.gather(*tasks)
+    async def batch_generate(self, requests: List[GenerationRequest]) -> List[GenerationResult]:
+        """All results in request order, samples of one request adjacent."""
+        per_request: List[List[GenerationResult]] = [[] for _ in requests]
+        async for i, result in self.iter_indexed(plan_requests(requests)):
+            per_request[i].append(result)
+        return [
+            result
+            for samples in per_request
+            for result in sorted(samples, key=lambda r: r.sample_index)
+        ]
@@ -1,16 +1,45 @@
 """High-level evaluator that fuses generation + analysis"""
-from typing import Dict
+from typing import Dict, List, Optional
+from src.analysis.analysis_cache import AnalysisCache
 from src.analysis.java_analyzer import JavaAnalyzer
 from src.core.code_generator import GenerationResult
 
 class Evaluator:
-    def __init__(self):
-        self.analyzer = JavaAnalyzer()
+    def __init__(self, cache: bool = True):
+        # re-scoring old result files mostly sees snippets analyzed before
+        self.analyzer = JavaAnalyzer(cache=AnalysisCache() if cache else None)
 
-    def evaluate(self, gen: GenerationResult) -> Dict:
-        if not gen.success:
-            return {"score": 0, "compilation_success": False}
-        metrics = self.analyzer.analyze_code(gen.generated_code)
+    def evaluate(self, gen: GenerationResult, tests: Optional[List] = None) -> Dict:
+        return self.evaluate_many([gen], {gen.request.problem_id: tests} if tests else None)[0]
+
+    def evaluate_many(self, gens: List[GenerationResult], tests: Optional[Dict[str, List]] = None) -> List[Dict]:
+        """
+        evaluate() for a whole run: successful snippets are compiled in
+        batches and run against ``tests[problem_id]`` in parallel. Results
+        whose problem has tests get ``passed`` set (what pass@k counts).
+        """
+        tests = tests or {}
+        ok = [g for g in gens if g.success]
+        jobs = [(g.generated_code, tests.get(g.request.problem_id)) for g in ok]
+        metrics = iter(self.analyzer.analyze_jobs(jobs))
+        scored = []
+        for g in gens:
+            if not g.success:
+                if tests.get(g.request.problem_id):
+                    g.passed = False
+                scored.append({"score": 0, "compilation_success": False})
+                continue
+            m = next(metrics)
+            if m.test_results:
+                g.passed = all(t["passed"] for t in m.test_results)
+            scored.append(self._score(m))
+        return scored
+
+    def close(self):
+        self.analyzer.close()
+
+    @staticmethod
+    def _score(metrics) -> Dict:
         score = (
             metrics.test_pass_rate * 0.5
             + metrics.compilation_success * 0.3
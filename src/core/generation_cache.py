@@ -0,0 +1,104 @@
+"""Persistent cache of generated code keyed by model, prompt and decoding params."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.utils.disk_cache import DiskCache
+
+# outputs the model clients return instead of raising; never worth caching
+_ERROR_PREFIXES = ("// Error", "// API Error", "// Fallback error")
+
+
+class GenerationCache:
+    """
+    Content-addressed store for generation outputs plus in-flight request
+    coalescing: while one request for a key is running, identical requests
+    wait for it instead of starting their own generation.
+
+    Outputs are only reproducible when requests carry a ``seed``; unseeded
+    sampling still hits the cache and replays the earlier sample.
+
+    ``max_tokens`` is not part of the key: the token budget planner changes
+    it from run to run. A cached entry serves any budget it is valid for
+    (see ``lookup``).
+    """
+
+    def __init__(
+        self,
+        path: str = "data/cache/generations",
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age_days: Optional[float] = None,
+    ):
+        self.store = DiskCache(path, max_entries, max_bytes, max_age_days)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def key_for(request: Any, client: Any) -> str:
+        settings = getattr(client, "settings", None)
+        return DiskCache.make_key({
+            "model": request.model_name,
+            "model_id": getattr(client, "model_name", request.model_name),
+            "revision": getattr(client, "revision", None),
+            "settings": settings if isinstance(settings, dict) else repr(settings),
+            "prompt": request.prompt,
+            "temperature": request.temperature,
+            "seed": request.seed,
+            "num_samples": getattr(request, "num_samples", 1),
+        })
+
+    @staticmethod
+    def cacheable(code: str) -> bool:
+        return not code.lstrip().startswith(_ERROR_PREFIXES)
+
+    def lookup(self, key: str, max_tokens: Optional[int] = None) -> Optional[Dict]:
+        """
+        The entry for ``key`` if a fresh run with a ``max_tokens`` budget
+        would have produced the same samples: generated with exactly that
+        budget, or every sample stopped on its own within it.
+        """
+        record = self.store.get(key)
+        if record is None or max_tokens is None:
+            return record
+        budget = record.get("max_tokens")
+        if budget == max_tokens:
+            return record
+        if all(self._fits(s, budget, max_tokens) for s in record.get("samples", [record])):
+            return record
+        return None
+
+    @staticmethod
+    def _fits(sample: Dict, budget: Optional[int], max_tokens: int) -> bool:
+        tokens = sample.get("output_tokens") or 0
+        if not tokens and sample.get("generated_code"):
+            return False  # length unknown (plain-string responses)
+        reason = sample.get("finish_reason")
+        # without a reason, a sample shorter than its budget was not cut off
+        stopped = reason == "stop" or (reason is None and budget is not None and tokens < budget)
+        return stopped and tokens <= max_tokens
+
+    def save(self, key: str, record: Dict):
+        self.store.set(key, record)
+
+    async def coalesce(self, key: str, produce: Callable[[], Awaitable[Any]]):
+        """
+        Run ``produce()`` once per key at a time. Returns ``(value, shared)``
+        where ``shared`` is True for callers that reused another's run.
+        """
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await produce()
+        except BaseException as e:
+            future.set_exception(e)
+            # mark retrieved so an un-awaited future does not log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value, False
+        finally:
+            self._inflight.pop(key, None)
@@ -0,0 +1,222 @@
+"""Per-model worker pools that keep blocking inference off the event loop."""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.utils.logger import Logger
+
+logger = Logger().get()
+
+# defaults for every model; override under config["executors"]["default"]
+# or per model name, e.g. {"starcoder-1b": {"kind": "process", "torch_threads": 4}}
+# or {"starcoder-1b": {"kind": "replicas", "replicas": 4}} (see ReplicaPool)
+DEFAULT_POOL = {"kind": "thread", "workers": 1, "torch_threads": None, "replicas": 2, "cores_per_replica": None}
+
+# from_pretrained swaps process-global torch state (default dtype, meta-device
+# init), so loads from different worker threads corrupt each other; model
+# clients hold this lock while loading weights
+MODEL_LOAD_LOCK = threading.Lock()
+
+# process workers build their own client once and keep it for later calls
+_worker_clients: Dict[Any, Any] = {}
+
+# torch thread count an executor pinned in this process, if any
+_pinned_threads: Optional[int] = None
+
+
+def _init_worker(torch_threads: Optional[int]):
+    global _pinned_threads
+    if torch_threads:
+        import torch
+        torch.set_num_threads(torch_threads)
+        _pinned_threads = torch_threads
+
+
+def pinned_threads() -> Optional[int]:
+    """Thread count set by an executor's ``torch_threads`` or a replica's core group."""
+    return _pinned_threads
+
+
+def _init_replica(cores: Sequence[int], torch_threads: Optional[int]):
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    _init_worker(torch_threads or len(cores))
+
+
+def split_cores(replicas: int, cores_per_replica: Optional[int] = None) -> List[List[int]]:
+    """
+    Disjoint core groups, one per replica, from the cores this process may
+    use. With more replicas than cores the groups wrap around and share.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        available = sorted(os.sched_getaffinity(0))
+    else:
+        available = list(range(os.cpu_count() or 1))
+    per = cores_per_replica or max(len(available) // replicas, 1)
+    if per * replicas > len(available):
+        logger.warning(
+            "%d replicas x %d cores exceeds the %d available cores; replicas will share cores",
+            replicas, per, len(available),
+        )
+    return [
+        [available[(r * per + i) % len(available)] for i in range(per)]
+        for r in range(replicas)
+    ]
+
+
+class ReplicaPool(Executor):
+    """
+    N single-process model replicas, each pinned to its own core group with
+    a matching torch thread count. Calls go to the replica with the fewest
+    calls in flight; every replica builds and keeps its own client (see
+    ``_process_call``), so N replicas hold N copies of the weights.
+    """
+
+    def __init__(self, core_groups: List[List[int]], torch_threads: Optional[int] = None):
+        self.core_groups = core_groups
+        self._replicas = [
+            ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_replica,
+                initargs=(cores, torch_threads),
+            )
+            for cores in core_groups
+        ]
+        self._inflight = [0] * len(self._replicas)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._replicas)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        with self._lock:
+            i = min(range(len(self._replicas)), key=self._inflight.__getitem__)
+            self._inflight[i] += 1
+        future = self._replicas[i].submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda _: self._done(i))
+        return future
+
+    def _done(self, i: int):
+        with self._lock:
+            self._inflight[i] -= 1
+
+    def broadcast(self, fn, *args) -> List[Future]:
+        """Run ``fn(*args)`` once on every replica (e.g. to load weights)."""
+        return [replica.submit(fn, *args) for replica in self._replicas]
+
+    def shutdown(self, wait: bool = True, **kwargs):
+        for replica in self._replicas:
+            replica.shutdown(wait=wait, **kwargs)
+
+
+def _process_call(model_cls, settings, method: str, args: tuple):
+    key = (model_cls, repr(settings))
+    client = _worker_clients.get(key)
+    if client is None:
+        client = _worker_clients[key] = model_cls(settings)
+    return getattr(client, method)(*args)
+
+
+async def run_inference(client: Any, method: str, *args):
+    """
+    Run ``client.<method>(*args)`` on the client's bound executor.
+
+    Thread pools call the method on the client itself. Process pools cannot
+    share the loaded weights, so each worker builds its own client from
+    ``client.settings`` and the call is forwarded to it.
+    """
+    executor = getattr(client, "executor", None)
+    loop = asyncio.get_running_loop()
+    if isinstance(executor, (ProcessPoolExecutor, ReplicaPool)):
+        return await loop.run_in_executor(
+            executor, _process_call, type(client), client.settings, method, args
+        )
+    return await loop.run_in_executor(executor, getattr(client, method), *args)
+
+
+async def run_on_all(client: Any, method: str, *args):
+    """
+    Like run_inference, but on every replica of a ReplicaPool (so e.g. each
+    one loads its weights up front); a single call for other executors.
+    """
+    executor = getattr(client, "executor", None)
+    if not isinstance(executor, ReplicaPool):
+        return [await run_inference(client, method, *args)]
+    futures = executor.broadcast(_process_call, type(client), client.settings, method, args)
+    return await asyncio.gather(*[asyncio.wrap_future(f) for f in futures])
+
+
+class InferenceExecutor:
+    """
+    Owns one worker pool per model so a slow CPU model never shares threads
+    with (or blocks) the event loop, API clients or another model.
+
+    ``torch_threads`` sets the intra-op thread count inside each worker. In a
+    thread pool torch applies it process-wide where the OpenMP backend does
+    not keep per-thread settings; use ``"kind": "process"`` for strict
+    per-model isolation, or ``"kind": "replicas"`` to run several pinned
+    copies of a model side by side. Replicas only run in parallel if the
+    scheduler allows that many concurrent requests for the model
+    (``model_concurrency``).
+    """
+
+    def __init__(self, pools_cfg: Optional[Dict[str, Dict]] = None):
+        self.pools_cfg = pools_cfg or {}
+        self._pools: Dict[str, Executor] = {}
+
+    def _pool_cfg(self, model_name: str) -> Dict:
+        cfg = dict(DEFAULT_POOL)
+        cfg.update(self.pools_cfg.get("default", {}))
+        cfg.update(self.pools_cfg.get(model_name, {}))
+        return cfg
+
+    def get(self, model_name: str) -> Executor:
+        if model_name not in self._pools:
+            cfg = self._pool_cfg(model_name)
+            if cfg["kind"] == "process":
+                pool = ProcessPoolExecutor(
+                    max_workers=cfg["workers"],
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(cfg["torch_threads"],),
+                )
+            elif cfg["kind"] == "replicas":
+                groups = split_cores(cfg["replicas"], cfg["cores_per_replica"])
+                pool = ReplicaPool(groups, cfg["torch_threads"])
+                logger.info("Replica core groups for %s: %s", model_name, groups)
+            elif cfg["kind"] == "thread":
+                pool = ThreadPoolExecutor(
+                    max_workers=cfg["workers"],
+                    thread_name_prefix=f"infer-{model_name}",
+                    initializer=_init_worker,
+                    initargs=(cfg["torch_threads"],),
+                )
+            else:
+                raise ValueError(f"Unknown executor kind for {model_name}: {cfg['kind']}")
+            workers = cfg["replicas"] if cfg["kind"] == "replicas" else cfg["workers"]
+            logger.info("Executor for %s: %s x%d", model_name, cfg["kind"], workers)
+            self._pools[model_name] = pool
+        return self._pools[model_name]
+
+    def can_unload(self, model_name: str) -> bool:
+        """
+        Whether run_on_all reaches every copy of the model's weights; a
+        process pool with several workers cannot be addressed per worker.
+        """
+        cfg = self._pool_cfg(model_name)
+        return not (cfg["kind"] == "process" and cfg["workers"] > 1)
+
+    def bind(self, model_name: str, client: Any) -> Any:
+        """Attach the model's pool to a client that runs blocking inference."""
+        if hasattr(client, "executor"):
+            client.executor = self.get(model_name)
+        return client
+
+    def shutdown(self, wait: bool = True):
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait)
+        self._pools.clear()
@@ -0,0 +1,196 @@
+"""OpenAI-compatible HTTP front end for the registered local models."""
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from src.core.model_registry import create_model
+from src.utils.logger import Logger
+
+logger = Logger().get()
+
+
+class ServedModel:
+    """
+    One registered model behind the API. Decoder-only Hugging Face clients
+    are driven by a ContinuousBatchingEngine; anything else (encoder-decoder
+    models, the local stub) answers through its own ``generate_code``.
+    """
+
+    def __init__(self, name: str, client: Any, max_batch_size: int = 8):
+        self.name = name
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.engine = None
+
+    async def start(self):
+        if not hasattr(self.client, "_load_model"):
+            return
+        await asyncio.to_thread(self.client._load_model)
+        model = getattr(self.client, "model", None)
+        if model is not None and not model.config.is_encoder_decoder:
+            from src.models.continuous_batching import ContinuousBatchingEngine
+            self.engine = ContinuousBatchingEngine(model, self.client.tokenizer, self.max_batch_size)
+            logger.info("Serving %s with continuous batching (max batch %d)", self.name, self.max_batch_size)
+
+    def chat_prompt(self, messages: List[Dict[str, str]]) -> str:
+        # the served models are base code models: use the client's own task
+        # format on the user turns rather than a chat template
+        text = "\n\n".join(m.get("content", "") for m in messages if m.get("role") == "user")
+        if hasattr(self.client, "_format_prompt"):
+            return self.client._format_prompt(text)
+        return text
+
+    async def complete(self, prompt: str, max_tokens: int, temperature: float,
+                       stop: List[str], seed: Optional[int]) -> Dict[str, Any]:
+        if self.engine is not None:
+            future = self.engine.submit(prompt, max_tokens, temperature, stop, seed)
+            return await asyncio.wrap_future(future)
+        result = await self.client.generate_code(prompt, max_tokens=max_tokens, temperature=temperature, seed=seed)
+        if not isinstance(result, dict):
+            result = {"code": str(result)}
+        return {
+            "text": result.get("code", ""),
+            "prompt_tokens": result.get("input_tokens", 0),
+            "completion_tokens": result.get("output_tokens", result.get("token_count", 0)),
+            "finish_reason": result.get("finish_reason") or "stop",
+        }
+
+    async def close(self):
+        if self.engine is not None:
+            await asyncio.to_thread(self.engine.shutdown)
+        await self.client.close()
+
+
+def _int_param(body: Dict, name: str, default: int, minimum: Optional[int] = 1) -> int:
+    value = body.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"{name!r} must be an integer, got {value!r}")
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{name!r} must be at least {minimum}, got {value}")
+    return value
+
+
+def _error(status: int, message: str) -> web.Response:
+    return web.json_response({"error": {"message": message, "type": "invalid_request_error"}}, status=status)
+
+
+class InferenceServer:
+    """
+    Serves ``/v1/completions``, ``/v1/chat/completions`` and ``/v1/models``
+    with the OpenAI request/response schema. ``n`` > 1 submits that many
+    independent requests, which decode side by side in the running batch.
+    """
+
+    def __init__(self, models: Dict[str, ServedModel]):
+        self.models = models
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get("/v1/models", self.list_models),
+            web.post("/v1/completions", self.completions),
+            web.post("/v1/chat/completions", self.chat_completions),
+        ])
+        self.app.on_cleanup.append(self._close)
+
+    @classmethod
+    def from_config(cls, cfg: Dict) -> "InferenceServer":
+        settings = cfg.get("model_settings") or {}
+        max_batch_size = cfg.get("serve", {}).get("max_batch_size", 8)
+        return cls({
+            name: ServedModel(name, create_model(name, settings.get(name)), max_batch_size)
+            for name in cfg["models"]
+        })
+
+    async def start(self):
+        for served in self.models.values():
+            await served.start()
+
+    async def _close(self, app):
+        for served in self.models.values():
+            await served.close()
+
+    async def list_models(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "object": "list",
+            "data": [{"id": name, "object": "model", "owned_by": "local"} for name in self.models],
+        })
+
+    async def _run(self, request: web.Request, chat: bool) -> web.Response:
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return _error(400, "Request body is not valid JSON")
+        if not isinstance(body, dict):
+            return _error(400, "Request body must be a JSON object")
+        served = self.models.get(body.get("model"))
+        if served is None:
+            return _error(404, f"Unknown model {body.get('model')!r}. Available: {list(self.models)}")
+
+        if chat:
+            prompts = [served.chat_prompt(body.get("messages") or [])]
+        else:
+            prompt = body.get("prompt", "")
+            prompts = prompt if isinstance(prompt, list) else [prompt]
+        stop = body.get("stop") or []
+        stop = [stop] if isinstance(stop, str) else stop
+        try:
+            n = _int_param(body, "n", 1)
+            max_tokens = _int_param(body, "max_tokens", 256)
+            temperature = float(body.get("temperature", 1.0))
+            seed = body.get("seed")
+            seed = None if seed is None else _int_param(body, "seed", 0, minimum=None)
+        except (TypeError, ValueError) as e:
+            return _error(400, str(e))
+        jobs = [
+            served.complete(p, max_tokens, temperature, stop, None if seed is None else seed + i)
+            for p in prompts for i in range(n)
+        ]
+        outputs = await asyncio.gather(*jobs)
+
+        choices = []
+        for index, out in enumerate(outputs):
+            choice = {"index": index, "finish_reason": out["finish_reason"]}
+            if chat:
+                choice["message"] = {"role": "assistant", "content": out["text"]}
+            else:
+                choice["text"] = out["text"]
+            choices.append(choice)
+        prompt_tokens = sum(out["prompt_tokens"] for out in outputs[::n])
+        completion_tokens = sum(out["completion_tokens"] for out in outputs)
+        return web.json_response({
+            "id": f"{'chatcmpl' if chat else 'cmpl'}-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion" if chat else "text_completion",
+            "created": int(time.time()),
+            "model": served.name,
+            "choices": choices,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    async def completions(self, request: web.Request) -> web.Response:
+        return await self._run(request, chat=False)
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        return await self._run(request, chat=True)
+
+
+async def serve(cfg_path: str, host: str = "127.0.0.1", port: int = 8000):
+    """Load the configured models and serve them until cancelled."""
+    with open(cfg_path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    server = InferenceServer.from_config(cfg)
+    await server.start()
+    runner = web.AppRunner(server.app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("OpenAI-compatible API on http://%s:%d/v1 (models: %s)", host, port, ", ".join(server.models))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -1,17 +1,96 @@
 ﻿"""Model registry for real AI models."""
-from src.models.local_stub import LocalStub
-from src.models.codet5_small import CodeT5Small
-from src.models.starcoder_1b import StarCoder1B
+import asyncio
+import importlib
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional
 
+from src.core.inference_executor import run_on_all
+from src.utils.logger import Logger
+
+logger = Logger().get()
+
+# name -> (module, class, default settings). Classes are imported on first
+# use so a local-stub-only run never pulls in torch / transformers.
 MODEL_REGISTRY = {
-    "local-stub": LocalStub,
-    "codet5-small": CodeT5Small,
-    "starcoder-1b": StarCoder1B
+    "local-stub": ("src.models.local_stub", "LocalStub", None),
+    "codet5-small": ("src.models.codet5_small", "CodeT5Small", None),
+    "starcoder-1b": ("src.models.starcoder_1b", "StarCoder1B", None),
+    "codegen-350m": ("src.models.hf_model", "HuggingFaceModel", {"repo": "Salesforce/codegen-350M-mono"}),
 }
 
+def get_model_class(model_name):
+    """Import and return the client class registered under ``model_name``."""
+    if model_name not in MODEL_REGISTRY:
+        raise ValueError(f"Unknown model: {model_name}. Available: {list(MODEL_REGISTRY.keys())}")
+    module, cls_name, _ = MODEL_REGISTRY[model_name]
+    return getattr(importlib.import_module(module), cls_name)
+
 def create_model(model_name, settings=None):
     """Create a model instance by name."""
-    if model_name in MODEL_REGISTRY:
-        return MODEL_REGISTRY[model_name](settings)
-    else:
-        raise ValueError(f"Unknown model: {model_name}. Available: {list(MODEL_REGISTRY.keys())}")
+    cls = get_model_class(model_name)
+    defaults = MODEL_REGISTRY[model_name][2]
+    if defaults is not None:
+        settings = {**defaults, **(settings or {})}
+    return cls(settings)
+
+
+class LazyModelClients(Mapping):
+    """
+    Mapping of model name -> client that only knows the configured names and
+    builds each client from the registry on first access.
+
+    ``preload()`` starts loading weights in the background (on each client's
+    own executor) so it overlaps with prompt building instead of delaying
+    startup.
+    """
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        settings: Optional[Dict[str, Dict]] = None,
+        on_create: Optional[Callable[[str, Any], Any]] = None,
+    ):
+        self.names: List[str] = list(names)
+        for name in self.names:
+            if name not in MODEL_REGISTRY:
+                raise ValueError(f"Unknown model: {name}. Available: {list(MODEL_REGISTRY.keys())}")
+        self.settings = settings or {}
+        self.on_create = on_create
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self.names:
+            raise KeyError(name)
+        with self._lock:
+            if name not in self._clients:
+                logger.info("Creating model client %s", name)
+                client = create_model(name, self.settings.get(name))
+                if self.on_create is not None:
+                    self.on_create(name, client)
+                self._clients[name] = client
+            return self._clients[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def created(self) -> Dict[str, Any]:
+        """Clients that have actually been built so far."""
+        return dict(self._clients)
+
+    def preload(self) -> "asyncio.Future":
+        """Schedule background weight loading for every configured model."""
+        return asyncio.gather(*(self._warm(name) for name in self.names))
+
+    async def _warm(self, name: str):
+        try:
+            client = self[name]
+            if hasattr(client, "_load_model"):
+                # every replica of a replica pool loads its own copy
+                await run_on_all(client, "_load_model")
+        except Exception as e:
+            # the first real request will retry the load and report the error
+            logger.warning("Background load of %s failed: %s", name, e)
@@ -0,0 +1,127 @@
+"""Keeps loaded model weights within a memory budget (LRU load/unload)."""
+import asyncio
+import gc
+import os
+import resource
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Mapping, Optional
+
+from src.core.inference_executor import run_on_all
+from src.utils.logger import Logger
+
+logger = Logger().get()
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        # peak rather than current RSS, but better than nothing off Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ResidencyManager:
+    """
+    Loads model clients on demand and unloads the least recently used idle
+    ones whenever loading another would exceed ``budget_mb``. Each model's
+    footprint is the RSS growth measured while loading it, never less than
+    the configured estimate.
+
+    Only clients with a ``_load_model()`` are managed; API/stub clients pass
+    straight through. Loads and unloads (``unload()``, then ``close()``) run
+    through run_on_all, so with process or replica executors they happen in
+    the workers that hold the weights. Footprints are measured in this
+    process, so models served from those executors need estimates; multi-
+    worker process pools cannot be reached worker by worker and are rejected
+    by BenchmarkRunner (InferenceExecutor.can_unload).
+    """
+
+    def __init__(
+        self,
+        clients: Mapping[str, Any],
+        budget_mb: Optional[float] = None,
+        footprints_mb: Optional[Dict[str, float]] = None,
+    ):
+        self.clients = clients
+        self.budget_mb = budget_mb
+        self.footprints: Dict[str, float] = dict(footprints_mb or {})
+        self._resident: "OrderedDict[str, None]" = OrderedDict()
+        self._in_use: Dict[str, int] = {}
+        self._lock = asyncio.Lock()
+        self._released = asyncio.Condition()
+
+    def is_resident(self, name: str) -> bool:
+        return name in self._resident
+
+    def _used_mb(self) -> float:
+        return sum(self.footprints.get(m, 0.0) for m in self._resident)
+
+    @asynccontextmanager
+    async def hold(self, name: str):
+        """Make ``name`` resident and pin it for the duration of the block."""
+        await self.acquire(name)
+        try:
+            yield
+        finally:
+            await self.release(name)
+
+    async def preload(self, name: str):
+        """Load ``name`` in the background without pinning it."""
+        try:
+            await self.acquire(name)
+            await self.release(name)
+        except Exception as e:
+            logger.warning("Background load of %s failed: %s", name, e)
+
+    async def acquire(self, name: str):
+        client = self.clients[name]
+        if not hasattr(client, "_load_model") or name in self._resident:
+            self._pin(name)
+            return
+
+        async with self._lock:
+            if name not in self._resident:
+                await self._make_room(self.footprints.get(name, 0.0))
+                before = current_rss_mb()
+                await run_on_all(client, "_load_model")
+                measured = current_rss_mb() - before
+                self.footprints[name] = max(measured, self.footprints.get(name, 0.0))
+                self._resident[name] = None
+                logger.info("Loaded %s (~%.0f MB, %.0f MB resident)", name, self.footprints[name], self._used_mb())
+            self._pin(name)
+
+    def _pin(self, name: str):
+        if name in self._resident:
+            self._resident.move_to_end(name)
+        self._in_use[name] = self._in_use.get(name, 0) + 1
+
+    async def release(self, name: str):
+        self._in_use[name] -= 1
+        async with self._released:
+            self._released.notify_all()
+
+    async def _make_room(self, needed_mb: float):
+        if self.budget_mb is None:
+            return
+        while self._resident and self._used_mb() + needed_mb > self.budget_mb:
+            victim = next((m for m in self._resident if not self._in_use.get(m)), None)
+            if victim is None:
+                # everything resident is mid-generation; wait for one to finish
+                async with self._released:
+                    await self._released.wait()
+                continue
+            await self._evict(victim)
+
+    async def _evict(self, name: str):
+        self._resident.pop(name, None)
+        client = self.clients[name]
+        if hasattr(client, "unload"):
+            # process/replica executors keep their own copy of the weights
+            await run_on_all(client, "unload")
+        await client.close()
+        gc.collect()
+        logger.info("Unloaded %s to stay within %.0f MB", name, self.budget_mb)
@@ -49,7 +49,8 @@ class PromptManager:
         return template.template.format(**kwargs)
 
     def list_strategies(self) -> List[PromptStrategy]:
-        return list(set(prompt.strategy for prompt in self.prompts.values()))
+        # first-seen order from the YAML, so the request grid is stable across runs
+        return list(dict.fromkeys(prompt.strategy for prompt in self.prompts.values()))
 
     def get_prompts_by_strategy(self, strategy: PromptStrategy) -> List[PromptTemplate]:
         return [p for p in self.prompts.values() if p.strategy == strategy]
@@ -0,0 +1,29 @@
+"""Reorders the request grid before dispatch without losing its original positions."""
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from src.core.code_generator import GenerationRequest
+
+
+def plan_requests(
+    requests: Sequence["GenerationRequest"],
+    model_order: Optional[Sequence[str]] = None,
+) -> List[Tuple[int, "GenerationRequest"]]:
+    """
+    Group the grid by model (in ``model_order``, e.g. config["models"]) and,
+    within a model, sort by prompt text so prompts sharing a prefix (same
+    template, same few-shot preamble) sit next to each other.
+
+    Returns ``(original_index, request)`` pairs; the index is what maps a
+    result back to its cell in the problem -> strategy -> template -> model
+    grid.
+    """
+    rank = {m: i for i, m in enumerate(model_order or [])}
+    indexed = list(enumerate(requests))
+    indexed.sort(key=lambda ir: (
+        rank.get(ir[1].model_name, len(rank)),
+        ir[1].model_name,
+        ir[1].prompt,
+        ir[0],
+    ))
+    return indexed
@@ -0,0 +1,132 @@
+"""Append-only JSONL journal of finished generation results."""
+import hashlib
+import json
+import os
+import textwrap
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from src.core.code_generator import GenerationRequest, GenerationResult, GenerationTiming
+
+
+def request_key(request: GenerationRequest) -> str:
+    """
+    Stable identity of one cell of the request grid. max_tokens is left out
+    on purpose: it is a decoding budget, not part of what is being measured.
+    """
+    ident = [
+        request.problem_id,
+        request.strategy,
+        request.model_name,
+        request.prompt,
+        request.temperature,
+        request.seed,
+    ]
+    return hashlib.sha1(json.dumps(ident).encode("utf-8")).hexdigest()
+
+
+def result_to_record(result: GenerationResult) -> Dict:
+    record = asdict(result)
+    record["timestamp"] = result.timestamp.isoformat()
+    return record
+
+
+def result_from_record(record: Dict) -> GenerationResult:
+    fields = dict(record)
+    fields["request"] = GenerationRequest(**fields["request"])
+    fields["timestamp"] = datetime.fromisoformat(fields["timestamp"])
+    if fields.get("timing"):
+        fields["timing"] = GenerationTiming(**fields["timing"])
+    return GenerationResult(**fields)
+
+
+class ResultsJournal:
+    """
+    One JSON line per finished result, flushed as soon as it is written, so a
+    crash or Ctrl-C keeps everything completed so far. The final results
+    JSON and the report are rebuilt from this file.
+    """
+
+    def __init__(self, path: Path, fsync: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self._fh = None
+
+    def append(self, result: GenerationResult, index: Optional[int] = None):
+        """Write one result; ``index`` is its position in the original request grid."""
+        if self._fh is None:
+            self._fh = open(self.path, "a", encoding="utf-8")
+        record = result_to_record(result)
+        record["index"] = index
+        self._fh.write(json.dumps(record, default=str) + "\n")
+        self._fh.flush()
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def records(self) -> Iterator[Dict]:
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # torn last line from an interrupted write
+                    continue
+
+    def completed_keys(self) -> Set[str]:
+        """Request keys whose every sample has a successful result in the journal."""
+        succeeded: Dict[str, Set[int]] = defaultdict(set)
+        wanted: Dict[str, int] = {}
+        for r in self.records():
+            if not r.get("success"):
+                continue
+            request = GenerationRequest(**r["request"])
+            key = request_key(request)
+            succeeded[key].add(r.get("sample_index", 0))
+            wanted[key] = request.num_samples
+        return {key for key, samples in succeeded.items() if len(samples) >= wanted[key]}
+
+    def load_results(self) -> Iterator[GenerationResult]:
+        """
+        Results in original grid order (journal order for records without an
+        index), samples of a request by sample index; a sample retried on
+        resume keeps its latest result.
+        """
+        latest: Dict[Tuple[str, int], Tuple[int, GenerationResult]] = {}
+        for record in self.records():
+            index = record.pop("index", None)
+            result = result_from_record(record)
+            key = (request_key(result.request), result.sample_index)
+            latest.pop(key, None)
+            latest[key] = (-1 if index is None else index, result)
+        ordered = sorted(latest.values(), key=lambda ir: (ir[0], ir[1].sample_index))
+        for _, result in ordered:
+            yield result
+
+    def export_json(self, out_path: Path, results: Optional[Iterable[GenerationResult]] = None):
+        """
+        Write the classic results JSON (one object per result) from the
+        journal, or from ``results`` when they were updated after loading.
+        """
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for i, result in enumerate(self.load_results() if results is None else results):
+                f.write(",\n" if i else "\n")
+                fields = dict(result.__dict__)
+                if result.timing is not None:
+                    fields["timing"] = asdict(result.timing)
+                item = json.dumps(fields, default=str, indent=2)
+                f.write(textwrap.indent(item, "  "))
+            f.write("\n]")
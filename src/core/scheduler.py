@@ -0,0 +1,111 @@
+"""Per-model concurrency budgets with weighted-fair dispatch."""
+import asyncio
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Callable, Deque, Dict, Optional
+
+
+class FairScheduler:
+    """
+    Hands out inference slots under a global budget and a per-model budget.
+
+    When the global budget is exhausted, waiting models are served in
+    weighted-fair order: each grant advances the model's virtual time by
+    ``1 / weight`` and the backlogged model with the smallest virtual time
+    goes next, so a slow model holding its slots cannot starve the others.
+
+    ``prefer`` (e.g. ResidencyManager.is_resident) puts models for which it
+    returns True ahead of the others, so loaded models drain their queues
+    before a request forces another model in.
+
+    Config keys (see BenchmarkRunner): ``max_concurrent_requests``,
+    ``model_concurrency`` ({model: slots}) and ``model_weights`` ({model: w}).
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 5,
+        model_limits: Optional[Dict[str, int]] = None,
+        weights: Optional[Dict[str, float]] = None,
+        prefer: Optional[Callable[[str], bool]] = None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.model_limits = model_limits or {}
+        self.weights = weights or {}
+        self.prefer = prefer
+        self._active_total = 0
+        self._active: Dict[str, int] = defaultdict(int)
+        self._waiters: Dict[str, Deque[asyncio.Future]] = defaultdict(deque)
+        self._vtime: Dict[str, float] = defaultdict(float)
+        self._clock = 0.0
+
+    def limit_for(self, model: str) -> int:
+        return min(self.model_limits.get(model, self.max_concurrent), self.max_concurrent)
+
+    def _has_capacity(self, model: str) -> bool:
+        return self._active_total < self.max_concurrent and self._active[model] < self.limit_for(model)
+
+    def _grant(self, model: str):
+        self._active[model] += 1
+        self._active_total += 1
+        self._clock = self._vtime[model]
+        self._vtime[model] += 1.0 / self.weights.get(model, 1.0)
+
+    def _dispatch(self):
+        while self._active_total < self.max_concurrent:
+            ready = [
+                m for m, q in self._waiters.items()
+                if q and self._active[m] < self.limit_for(m)
+            ]
+            if not ready:
+                return
+            if self.prefer is not None:
+                preferred = [m for m in ready if self.prefer(m)]
+                ready = preferred or ready
+            model = min(ready, key=lambda m: self._vtime[m])
+            future = self._waiters[model].popleft()
+            if future.done():  # cancelled while queued
+                continue
+            self._grant(model)
+            future.set_result(None)
+
+    async def acquire(self, model: str):
+        queue = self._waiters[model]
+        while queue and queue[0].done():  # drop waiters cancelled while queued
+            queue.popleft()
+
+        # _dispatch runs after every release, so anything still queued is
+        # blocked by a budget; a new request may only jump in if its model
+        # has no backlog of its own
+        if not queue and self._has_capacity(model):
+            self._vtime[model] = max(self._vtime[model], self._clock)
+            self._grant(model)
+            return
+
+        if not queue:
+            # an idle model rejoins at the current virtual time, without
+            # credit for the time it had nothing queued
+            self._vtime[model] = max(self._vtime[model], self._clock)
+        future = asyncio.get_running_loop().create_future()
+        queue.append(future)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # granted just before the cancellation landed
+                self.release(model)
+            raise
+
+    def release(self, model: str):
+        self._active[model] -= 1
+        self._active_total -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, model: str):
+        await self.acquire(model)
+        try:
+            yield
+        finally:
+            self.release(model)
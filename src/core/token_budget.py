@@ -0,0 +1,90 @@
+"""Per-request decode budgets from template estimates and observed output lengths."""
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utils.logger import Logger
+
+logger = Logger().get()
+
+
+class TokenBudgetPlanner:
+    """
+    Picks ``max_tokens`` for a (model, strategy) pair.
+
+    With at least ``min_history`` observed outputs the budget is their
+    ``quantile`` times ``headroom``; before that it is the template's
+    ``expected_tokens`` times ``headroom``. Budgets are clamped to
+    ``[min_tokens, max_tokens]``. A generation cut off by the budget
+    (``finish_reason == "length"``) is retried with ``retry_factor`` times
+    the budget, up to ``max_tokens``.
+
+    Config block (see BenchmarkRunner): ``"token_budget"``, same keys as the
+    constructor plus ``enabled``.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        headroom: float = 1.25,
+        min_tokens: int = 64,
+        max_tokens: int = 1500,
+        min_history: int = 5,
+        retry_factor: float = 2.0,
+        history_runs: int = 20,
+    ):
+        self.quantile = quantile
+        self.headroom = headroom
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self.min_history = min_history
+        self.retry_factor = retry_factor
+        self.history_runs = history_runs
+        self._lengths: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+
+    def observe(self, model: str, strategy: str, output_tokens: int):
+        if output_tokens > 0:
+            self._lengths[(model, strategy)].append(output_tokens)
+
+    def observe_results(self, results: Iterable):
+        for r in results:
+            # a truncated output says nothing about the natural length
+            if r.success and r.finish_reason != "length":
+                self.observe(r.request.model_name, r.request.strategy, r.output_tokens or r.token_count)
+
+    def load_history(self, results_dir: Path = Path("data/results")):
+        """Seed observed lengths from the most recent run journals."""
+        journals = sorted(Path(results_dir).glob("*.jsonl"), key=lambda p: p.stat().st_mtime)
+        loaded = 0
+        for path in journals[-self.history_runs:]:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        r = json.loads(line)
+                    except ValueError:
+                        continue
+                    if not r.get("success") or r.get("finish_reason") == "length":
+                        continue
+                    req = r["request"]
+                    self.observe(req["model_name"], req["strategy"], r.get("output_tokens") or r.get("token_count", 0))
+                    loaded += 1
+        if loaded:
+            logger.info("Token budgets seeded from %d past results", loaded)
+
+    def _clamp(self, tokens: float) -> int:
+        return int(min(max(tokens, self.min_tokens), self.max_tokens))
+
+    def budget_for(self, model: str, strategy: str, expected_tokens: int) -> int:
+        lengths = self._lengths.get((model, strategy), [])
+        if len(lengths) < self.min_history:
+            return self._clamp(expected_tokens * self.headroom)
+        ordered = sorted(lengths)
+        q = ordered[min(int(self.quantile * len(ordered)), len(ordered) - 1)]
+        return self._clamp(q * self.headroom)
+
+    def retry_budget(self, current: int) -> Optional[int]:
+        """Larger budget for a capped generation, or None when already at the cap."""
+        if current >= self.max_tokens:
+            return None
+        return self._clamp(current * self.retry_factor)
@@ -1,60 +1,139 @@
 ﻿import asyncio
+import time
 import torch
-from transformers import T5ForConditionalGeneration, AutoTokenizer
-from typing import Dict, Any
+from transformers import T5ForConditionalGeneration, AutoTokenizer, StoppingCriteriaList
+from typing import Dict, Any, List
+
+from src.core.inference_executor import MODEL_LOAD_LOCK, run_inference
+from src.models.generation_utils import FirstTokenTimer, count_tokens, finish_reason, group_samples, timing_breakdown
+from src.models.shared_weights import load_weights
+from src.models.stopping import JavaStopCriteria, truncate_java
+from src.optimization.autotuner import load_tuned
 
 class CodeT5Small:
     def __init__(self, settings=None):
         self.settings = settings or {}
         self.model_name = "Salesforce/codet5-small"
+        # optional pinned checkpoint revision (branch, tag or commit)
+        self.revision = self.settings.get("revision")
+        # end decoding once the Java class closes (or at a configured stop sequence)
+        self.stop_at_class_end = self.settings.get("stop_at_class_end", True)
+        self.stop_sequences = self.settings.get("stop_sequences", [])
         self.model = None
         self.tokenizer = None
+        # worker pool assigned by InferenceExecutor.bind(); None = default pool
+        self.executor = None
         
     def _load_model(self):
-        if self.model is None:
+        # guarded so a background preload and the first request load only once;
+        # the unlocked check keeps loaded models from queueing behind another load
+        if self.model is not None:
+            return
+        with MODEL_LOAD_LOCK:
+            if self.model is not None:
+                return
             print(f"Loading {self.model_name}...")
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.model = T5ForConditionalGeneration.from_pretrained(self.model_name)
-            self.model.eval()
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name, revision=self.revision)
+            model = load_weights(
+                T5ForConditionalGeneration,
+                self.model_name,
+                revision=self.revision,
+                # share read-only weight pages with other worker processes
+                mmap_weights=self.settings.get("mmap_weights", False),
+            )
+            model.eval()
+            # dtype / int8 / threads tuned for this machine by `main.py --autotune`
+            # set last: the unlocked check must never see a half-loaded client
+            self.model = load_tuned(model, self.model_name, self.settings.get("autotune", True))
             
-    async def generate_code(self, prompt: str, **kwargs) -> str:
+    async def generate_code(self, prompt: str, **kwargs) -> Dict:
+        return (await self.generate_batch([prompt], **kwargs))[0]
+
+    async def generate_batch(self, prompts: List[str], **kwargs) -> List[Dict]:
+        return await run_inference(
+            self,
+            "_sync_generate_batch",
+            prompts,
+            kwargs.get('max_tokens', 200),
+            kwargs.get('temperature', 0.7),
+            kwargs.get('seed'),
+            kwargs.get('num_samples', 1),
+        )
+
+    def _sync_generate_batch(self, prompts: List[str], max_tokens: int, temperature: float, seed=None, num_samples: int = 1) -> List[Dict]:
         try:
+            t0 = time.perf_counter()
             self._load_model()
+            load_time = time.perf_counter() - t0
+            if seed is not None:
+                torch.manual_seed(seed)
             
             # Better prompt format for CodeT5
-            formatted_prompt = f"translate English to Java: {prompt}"
+            formatted_prompts = [f"translate English to Java: {p}" for p in prompts]
             
+            t0 = time.perf_counter()
             inputs = self.tokenizer(
-                formatted_prompt, 
+                formatted_prompts, 
                 return_tensors="pt", 
                 max_length=512, 
                 truncation=True,
                 padding=True
             )
+            tokenize_time = time.perf_counter() - t0
             
+            # encoder pass + first decoder step count towards time-to-first-token
+            timer = FirstTokenTimer()
+            # decoder rows hold only generated tokens (after the start token)
+            stop = JavaStopCriteria(self.tokenizer, 0, self.stop_sequences, self.stop_at_class_end)
+            gen_start = time.perf_counter()
             with torch.no_grad():
                 outputs = self.model.generate(
                     **inputs,
-                    max_new_tokens=kwargs.get('max_tokens', 200),
-                    temperature=kwargs.get('temperature', 0.7),
+                    max_new_tokens=max_tokens,
+                    temperature=temperature,
                     do_sample=True,
-                    num_return_sequences=1,
+                    # the encoder runs once per prompt, not once per sample
+                    num_return_sequences=num_samples,
                     pad_token_id=self.tokenizer.pad_token_id,
-                    eos_token_id=self.tokenizer.eos_token_id
+                    eos_token_id=self.tokenizer.eos_token_id,
+                    stopping_criteria=StoppingCriteriaList([timer, stop]),
                 )
+            gen_end = time.perf_counter()
             
-            generated_code = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-            # Clean up the output
-            if "translate English to Java:" in generated_code:
-                generated_code = generated_code.replace("translate English to Java:", "").strip()
+            results = []
+            masks = inputs['attention_mask'].repeat_interleave(num_samples, dim=0)
+            for i, (row, mask) in enumerate(zip(outputs, masks)):
+                generated_code = self.tokenizer.decode(row, skip_special_tokens=True)
                 
-            return generated_code if generated_code else "// Could not generate valid code"
+                # Clean up the output
+                if "translate English to Java:" in generated_code:
+                    generated_code = generated_code.replace("translate English to Java:", "").strip()
+                generated_code = truncate_java(generated_code, self.stop_sequences, self.stop_at_class_end)
+                    
+                output_tokens = count_tokens(row, self.tokenizer.pad_token_id, self.tokenizer.eos_token_id)
+                results.append({
+                    "code": generated_code if generated_code else "// Could not generate valid code",
+                    "token_count": output_tokens,
+                    "input_tokens": int(mask.sum()),
+                    "output_tokens": output_tokens,
+                    "finish_reason": finish_reason(output_tokens, max_tokens, stop.stopped(i)),
+                })
+            timing = timing_breakdown(
+                load_time, tokenize_time, gen_start, gen_end, timer, time.perf_counter() - gen_end
+            )
+            for r in results:
+                r["timing"] = timing
+            return group_samples(results, num_samples)
             
         except Exception as e:
-            return f"// Error generating code: {str(e)}"
+            return [f"// Error generating code: {str(e)}"] * len(prompts)
     
+    def unload(self):
+        # reset rather than del so _load_model() can bring the weights back
+        with MODEL_LOAD_LOCK:
+            self.model = None
+            self.tokenizer = None
+
     async def close(self):
-        if self.model is not None:
-            del self.model
-            del self.tokenizer
+        # MODEL_LOAD_LOCK may be held by a load; wait for it off the event loop
+        await asyncio.to_thread(self.unload)
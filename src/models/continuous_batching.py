@@ -0,0 +1,223 @@
+"""Iteration-level (continuous) batching for causal Hugging Face models."""
+import queue
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+import torch
+from transformers import DynamicCache
+
+from src.models.stopping import find_stop
+from src.utils.logger import Logger
+
+logger = Logger().get()
+
+
+@dataclass
+class _Sequence:
+    prompt_ids: List[int]
+    max_tokens: int
+    temperature: float
+    stop: Sequence[str]
+    future: Future
+    generator: Optional[torch.Generator] = None
+    last_token: Optional[int] = None  # fed to the next step; EOS is never in output_ids
+    output_ids: List[int] = field(default_factory=list)
+    text: str = ""
+    finish_reason: Optional[str] = None
+
+
+def _kv_pairs(cache) -> List[Tuple[torch.Tensor, torch.Tensor]]:
+    if hasattr(cache, "layers"):
+        return [(layer.keys, layer.values) for layer in cache.layers]
+    return list(zip(cache.key_cache, cache.value_cache))  # transformers < 4.56
+
+
+def _make_cache(pairs: List[Tuple[torch.Tensor, torch.Tensor]]) -> DynamicCache:
+    if hasattr(DynamicCache, "from_legacy_cache"):
+        return DynamicCache.from_legacy_cache(tuple(pairs))
+    return DynamicCache(pairs)
+
+
+def _left_pad(t: torch.Tensor, length: int) -> torch.Tensor:
+    """Pad the sequence axis (dim 2) of a [batch, heads, seq, dim] tensor on the left."""
+    missing = length - t.shape[2]
+    if missing <= 0:
+        return t
+    pad = t.new_zeros(t.shape[0], t.shape[1], missing, t.shape[3])
+    return torch.cat([pad, t], dim=2)
+
+
+class ContinuousBatchingEngine:
+    """
+    Runs one causal LM on a background thread and decodes all active
+    requests together, one token per step. A request that arrives mid-batch
+    is prefilled on its own and its key/values are left-padded into the
+    running batch cache before the next step, so it never waits for the
+    batch to drain; finished rows leave the batch immediately.
+
+    ``submit`` is thread-safe and returns a concurrent Future resolving to
+    ``{"text", "prompt_tokens", "completion_tokens", "finish_reason"}``.
+    """
+
+    def __init__(self, model, tokenizer, max_batch_size: int = 8, max_prompt_tokens: int = 2048):
+        self.model = model.eval()
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.max_prompt_tokens = max_prompt_tokens
+        self.device = next(model.parameters()).device
+        self._queue: "queue.Queue[_Sequence]" = queue.Queue()
+        self._active: List[_Sequence] = []
+        self._cache = None
+        self._mask: Optional[torch.Tensor] = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="continuous-batching", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        prompt: str,
+        max_tokens: int = 256,
+        temperature: float = 0.7,
+        stop: Optional[Sequence[str]] = None,
+        seed: Optional[int] = None,
+    ) -> Future:
+        if self._stopped.is_set():
+            raise RuntimeError("continuous batching engine is shut down")
+        ids = self.tokenizer(prompt)["input_ids"][-self.max_prompt_tokens:]
+        generator = None
+        if seed is not None:
+            generator = torch.Generator(device=self.device).manual_seed(seed)
+        seq = _Sequence(ids or [self.tokenizer.eos_token_id], max_tokens, temperature, [s for s in (stop or []) if s], Future(), generator)
+        self._queue.put(seq)
+        return seq.future
+
+    def shutdown(self):
+        self._stopped.set()
+        self._thread.join()
+        # nothing will run these any more
+        error = RuntimeError("continuous batching engine shut down")
+        self._fail(self._active, error)
+        self._active, self._cache, self._mask = [], None, None
+        while True:
+            try:
+                self._fail([self._queue.get_nowait()], error)
+            except queue.Empty:
+                break
+
+    @staticmethod
+    def _fail(seqs: List[_Sequence], error: BaseException):
+        for seq in seqs:
+            if not seq.future.done():
+                seq.future.set_exception(error)
+
+    # ------------------------------------------------------------------
+    # engine thread
+    # ------------------------------------------------------------------
+    def _loop(self):
+        while not self._stopped.is_set():
+            try:
+                self._admit()
+                if self._active:
+                    with torch.no_grad():
+                        self._step()
+            except Exception as e:
+                logger.exception("Continuous batching step failed")
+                self._fail(self._active, e)
+                self._active, self._cache, self._mask = [], None, None
+
+    def _admit(self):
+        while len(self._active) < self.max_batch_size:
+            try:
+                # only block when there is nothing to decode
+                seq = self._queue.get(timeout=0.05) if not self._active else self._queue.get_nowait()
+            except queue.Empty:
+                return
+            with torch.no_grad():
+                self._prefill(seq)
+            # a row can finish on its first token (EOS, stop, max_tokens=1)
+            self._retire()
+
+    def _prefill(self, seq: _Sequence):
+        ids = torch.tensor([seq.prompt_ids], device=self.device)
+        out = self.model(input_ids=ids, attention_mask=torch.ones_like(ids), past_key_values=DynamicCache(), use_cache=True)
+        mask = torch.ones_like(ids)
+        if self._active:
+            self._join(out.past_key_values, mask)
+        else:
+            self._cache, self._mask = out.past_key_values, mask
+        self._active.append(seq)
+        self._accept(seq, self._sample(out.logits[0, -1], seq))
+
+    def _join(self, cache, mask: torch.Tensor):
+        """Append one prefilled row to the running batch, left-padding the shorter side."""
+        length = max(self._mask.shape[1], mask.shape[1])
+        pairs = [
+            (torch.cat([_left_pad(bk, length), _left_pad(k, length)]), torch.cat([_left_pad(bv, length), _left_pad(v, length)]))
+            for (bk, bv), (k, v) in zip(_kv_pairs(self._cache), _kv_pairs(cache))
+        ]
+        self._cache = _make_cache(pairs)
+        pad = lambda m: torch.cat([m.new_zeros(m.shape[0], length - m.shape[1]), m], dim=1)
+        self._mask = torch.cat([pad(self._mask), pad(mask)])
+
+    def _step(self):
+        last = torch.tensor([[s.last_token] for s in self._active], device=self.device)
+        self._mask = torch.cat([self._mask, self._mask.new_ones(len(self._active), 1)], dim=1)
+        positions = (self._mask.sum(dim=1, keepdim=True) - 1)
+        out = self.model(
+            input_ids=last,
+            attention_mask=self._mask,
+            position_ids=positions,
+            past_key_values=self._cache,
+            use_cache=True,
+        )
+        self._cache = out.past_key_values
+        for i, seq in enumerate(self._active):
+            self._accept(seq, self._sample(out.logits[i, -1], seq))
+        self._retire()
+
+    def _sample(self, logits: torch.Tensor, seq: _Sequence) -> int:
+        if seq.temperature <= 0:
+            return int(logits.argmax())
+        probs = torch.softmax(logits.float() / seq.temperature, dim=-1)
+        return int(torch.multinomial(probs, 1, generator=seq.generator))
+
+    def _accept(self, seq: _Sequence, token: int):
+        seq.last_token = token
+        if token == self.tokenizer.eos_token_id:
+            seq.finish_reason = "stop"
+            return
+        seq.output_ids.append(token)
+        seq.text = self.tokenizer.decode(seq.output_ids, skip_special_tokens=True)
+        stop = find_stop(seq.text, seq.stop)
+        if stop is not None:
+            seq.text = seq.text[:stop]
+            seq.finish_reason = "stop"
+        elif len(seq.output_ids) >= seq.max_tokens:
+            seq.finish_reason = "length"
+
+    def _retire(self):
+        keep = [i for i, s in enumerate(self._active) if s.finish_reason is None]
+        for s in self._active:
+            if s.finish_reason is not None:
+                s.future.set_result({
+                    "text": s.text,
+                    "prompt_tokens": len(s.prompt_ids),
+                    "completion_tokens": len(s.output_ids),
+                    "finish_reason": s.finish_reason,
+                })
+        if len(keep) == len(self._active):
+            return
+        self._active = [self._active[i] for i in keep]
+        if not keep:
+            self._cache, self._mask = None, None
+            return
+        index = torch.tensor(keep, device=self.device)
+        mask = self._mask[index]
+        # drop columns that are padding for every remaining row
+        start = int((mask.sum(dim=0) > 0).nonzero()[0])
+        self._mask = mask[:, start:]
+        self._cache = _make_cache([
+            (k[index, :, start:], v[index, :, start:]) for k, v in _kv_pairs(self._cache)
+        ])
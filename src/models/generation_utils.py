@@ -0,0 +1,66 @@
+"""Helpers shared by the Hugging Face model clients."""
+import time
+from typing import Dict, List, Optional, Union
+
+import torch
+from transformers import StoppingCriteria
+
+
+class FirstTokenTimer(StoppingCriteria):
+    """
+    Never stops generation; records when ``generate`` produced its first new
+    token (the criteria run after every decoding step), which splits the
+    call into prefill / time-to-first-token and steady-state decode.
+    """
+
+    def __init__(self):
+        self.first_token_at: Optional[float] = None
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        return torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+
+
+def count_tokens(row: torch.Tensor, pad_token_id: Optional[int], eos_token_id: Optional[int] = None) -> int:
+    """Number of real tokens in one row of token ids (no padding, no EOS)."""
+    real = torch.ones_like(row, dtype=torch.bool)
+    for special in (pad_token_id, eos_token_id):
+        if special is not None:
+            real &= row != special
+    return int(real.sum())
+
+
+def finish_reason(output_tokens: int, max_tokens: int, stopped: bool = False) -> str:
+    """"length" when the row used its whole budget without stopping on its own."""
+    return "length" if output_tokens >= max_tokens and not stopped else "stop"
+
+
+def timing_breakdown(
+    load: float,
+    tokenize: float,
+    generate_start: float,
+    generate_end: float,
+    timer: FirstTokenTimer,
+    postprocess: float,
+) -> Dict[str, float]:
+    """Timing dict in the shape of code_generator.GenerationTiming."""
+    first = timer.first_token_at or generate_end
+    return {
+        "load": load,
+        "tokenize": tokenize,
+        "time_to_first_token": first - generate_start,
+        "decode": generate_end - first,
+        "postprocess": postprocess,
+    }
+
+
+def group_samples(rows: List[Dict], num_samples: int) -> List[Union[Dict, List[Dict]]]:
+    """
+    Regroup ``generate(num_return_sequences=n)`` output (n consecutive rows
+    per prompt) into one entry per prompt: the row itself for n == 1,
+    otherwise the list of its n samples.
+    """
+    if num_samples == 1:
+        return list(rows)
+    return [rows[i:i + num_samples] for i in range(0, len(rows), num_samples)]
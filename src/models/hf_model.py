@@ -1,5 +1,12 @@
-import torch, asyncio, random, transformers
+import torch, asyncio, random, time, transformers
 from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+from src.core.inference_executor import MODEL_LOAD_LOCK, run_inference
+from src.models.generation_utils import FirstTokenTimer, count_tokens, finish_reason, group_samples, timing_breakdown
+from src.models.prefix_cache import generate_with_prefix, make_prefix_cache
+from src.models.shared_weights import load_weights
+from src.optimization.autotuner import load_tuned
 
 @dataclass
 class HFSettings:
@@ -7,46 +14,231 @@ class HFSettings:
     max_new_tokens: int = 256
     temperature: float = 0.2
     device: str = "auto"  # "cuda" | "cpu" | "auto"
+    revision: Optional[str] = None  # branch, tag or commit to pin
+    prefix_cache: Union[bool, Dict] = True  # see src/models/prefix_cache.py
+    # assisted decoding: a small draft model (e.g. "bigcode/tiny_starcoder")
+    # proposes tokens that this model verifies
+    assistant_model: Optional[str] = None
+    assistant_revision: Optional[str] = None
+    num_assistant_tokens: Optional[int] = None
+    mmap_weights: bool = False  # share weight pages across processes (CPU)
+    autotune: bool = True  # apply this machine's profile from src/optimization/autotuner.py
+
+class _AssistStats:
+    """
+    Counts forward passes of the target and draft models during assisted
+    generation. Every target pass verifies one round of drafted tokens and
+    contributes one token of its own, so accepted = new tokens - target passes
+    and acceptance rate ~= accepted / draft passes (approximate when the two
+    models use different tokenizers).
+    """
+
+    def __init__(self, model, assistant):
+        self.target_calls = 0
+        self.draft_calls = 0
+        self._handles = []
+        self._models = (model, assistant)
+
+    def __enter__(self):
+        model, assistant = self._models
+        self._handles = [
+            model.register_forward_hook(lambda *a: self._count("target_calls")),
+            assistant.register_forward_hook(lambda *a: self._count("draft_calls")),
+        ]
+        return self
+
+    def __exit__(self, *exc):
+        for h in self._handles:
+            h.remove()
+
+    def _count(self, attr: str):
+        setattr(self, attr, getattr(self, attr) + 1)
+
+    def acceptance_rate(self, new_tokens: int) -> Optional[float]:
+        if not self.draft_calls:
+            return None
+        return min(max(new_tokens - self.target_calls, 0) / self.draft_calls, 1.0)
 
 class HuggingFaceModel:
     """
     Thin wrapper so the rest of the pipeline can call generate_code().
     """
 
-    def __init__(self, cfg: HFSettings):
+    def __init__(self, cfg: Union[HFSettings, Dict]):
+        if isinstance(cfg, dict):
+            cfg = HFSettings(**cfg)
         self.cfg = cfg
-        device = "cuda" if cfg.device == "auto" and torch.cuda.is_available() else "cpu"
-        self.tokenizer = transformers.AutoTokenizer.from_pretrained(cfg.repo)
-        self.model = transformers.AutoModelForCausalLM.from_pretrained(
-            cfg.repo,
-            torch_dtype=torch.float16 if device == "cuda" else torch.float32,
+        self.settings = cfg  # used to rebuild the client inside process workers
+        self.model_name = cfg.repo
+        self.revision = cfg.revision
+        # worker pool assigned by InferenceExecutor.bind(); None = default pool
+        self.executor = None
+        self.device = "cuda" if cfg.device == "auto" and torch.cuda.is_available() else "cpu"
+        self.tokenizer = None
+        self.model = None
+        self.assistant = None
+        self.assistant_tokenizer = None
+        # prompt-prefix key/values shared by requests to this model
+        self.prefix_cache = make_prefix_cache(cfg.prefix_cache)
+
+    def _load_model(self):
+        # weights are loaded on first use (or by a background preload); the
+        # unlocked check keeps loaded models from queueing behind another load
+        if self.model is not None:
+            return
+        with MODEL_LOAD_LOCK:
+            if self.model is not None:
+                return
+            tokenizer = transformers.AutoTokenizer.from_pretrained(self.cfg.repo, revision=self.revision)
+            # left padding keeps every prompt flush against its generated tokens
+            tokenizer.padding_side = "left"
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            self.tokenizer = tokenizer
+            model = load_weights(
+                transformers.AutoModelForCausalLM,
+                self.cfg.repo,
+                revision=self.revision,
+                mmap_weights=self.cfg.mmap_weights and self.device == "cpu",
+                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
+                low_cpu_mem_usage=True,
+            ).to(self.device)
+            model = load_tuned(model, self.model_name, self.cfg.autotune)
+            if self.cfg.assistant_model:
+                self._load_assistant(model.dtype)
+            # set last: the unlocked check must never see a half-loaded client
+            self.model = model
+
+    def _load_assistant(self, dtype: torch.dtype):
+        # called with MODEL_LOAD_LOCK held
+        self.assistant_tokenizer = transformers.AutoTokenizer.from_pretrained(
+            self.cfg.assistant_model, revision=self.cfg.assistant_revision
+        )
+        self.assistant = transformers.AutoModelForCausalLM.from_pretrained(
+            self.cfg.assistant_model,
+            revision=self.cfg.assistant_revision,
+            torch_dtype=dtype,
             low_cpu_mem_usage=True,
-        ).to(device)
-        self.device = device
-
-    async def generate_code(self, prompt: str, max_tokens: int, temperature: float):
-        # run in a thread so we don't block the asyncio loop
-        loop = asyncio.get_event_loop()
-        output = await loop.run_in_executor(
-            None,
-            self._sync_generate,
-            prompt,
+        ).to(self.device)
+        if self.cfg.num_assistant_tokens:
+            self.assistant.generation_config.num_assistant_tokens = self.cfg.num_assistant_tokens
+
+    def _assist_kwargs(self) -> Dict:
+        kwargs = {"assistant_model": self.assistant}
+        if self.assistant_tokenizer.get_vocab() != self.tokenizer.get_vocab():
+            # different vocabularies: universal assisted decoding re-tokenizes
+            # the drafts, so generate() needs both tokenizers
+            kwargs.update(tokenizer=self.tokenizer, assistant_tokenizer=self.assistant_tokenizer)
+        return kwargs
+
+    def _generate_assisted(self, inputs, num_samples: int, **generate_kwargs):
+        """
+        Assisted generate() handles one sequence at a time, so every prompt
+        and sample is decoded separately (without its left padding). Returns
+        the new tokens of each row and the estimated acceptance rate.
+        """
+        rows = []
+        assist = self._assist_kwargs()
+        with _AssistStats(self.model, self.assistant) as stats:
+            for ids, mask in zip(inputs["input_ids"], inputs["attention_mask"]):
+                prompt = ids[mask.bool()].unsqueeze(0)
+                for _ in range(num_samples):
+                    out = self.model.generate(
+                        input_ids=prompt,
+                        attention_mask=torch.ones_like(prompt),
+                        **assist,
+                        **generate_kwargs,
+                    )
+                    rows.append(out[0, prompt.shape[1]:])
+        new_tokens = sum(count_tokens(r, self.tokenizer.pad_token_id, self.tokenizer.eos_token_id) for r in rows)
+        return rows, stats.acceptance_rate(new_tokens)
+
+    async def generate_code(
+        self, prompt: str, max_tokens: int, temperature: float, seed: Optional[int] = None, num_samples: int = 1
+    ):
+        return (await self.generate_batch([prompt], max_tokens, temperature, seed, num_samples))[0]
+
+    async def generate_batch(
+        self, prompts: List[str], max_tokens: int, temperature: float, seed: Optional[int] = None, num_samples: int = 1
+    ):
+        # run on the model's worker pool so we don't block the asyncio loop
+        return await run_inference(
+            self,
+            "_sync_generate_batch",
+            prompts,
             max_tokens,
             temperature,
+            seed,
+            num_samples,
         )
-        return output
 
-    def _sync_generate(self, prompt, max_tokens, temperature):
-        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
+    def _sync_generate_batch(self, prompts, max_tokens, temperature, seed=None, num_samples=1):
+        t0 = time.perf_counter()
+        self._load_model()
+        load_time = time.perf_counter() - t0
+        if seed is not None:
+            torch.manual_seed(seed)
+
+        t0 = time.perf_counter()
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.device)
+        tokenize_time = time.perf_counter() - t0
+
+        timer = FirstTokenTimer()
+        generate_kwargs = dict(
+            do_sample=True,
+            max_new_tokens=max_tokens,
+            temperature=temperature,
+            pad_token_id=self.tokenizer.pad_token_id,
+            stopping_criteria=transformers.StoppingCriteriaList([timer]),
+        )
+        acceptance_rate = None
+        gen_start = time.perf_counter()
         with torch.no_grad():
-            out = self.model.generate(
-                **inputs,
-                do_sample=True,
-                max_new_tokens=max_tokens,
-                temperature=temperature,
-                pad_token_id=self.tokenizer.eos_token_id,
-            )
-        full = self.tokenizer.decode(out[0], skip_special_tokens=True)
-        # take only the new portion
-        generated = full[len(prompt):].strip()
-        return {"code": generated, "token_count": len(out)}
+            if self.assistant is not None:
+                new_tokens, acceptance_rate = self._generate_assisted(inputs, num_samples, **generate_kwargs)
+            else:
+                out = generate_with_prefix(
+                    self.model,
+                    inputs,
+                    self.prefix_cache,
+                    num_return_sequences=num_samples,
+                    **generate_kwargs,
+                )
+                # take only the new portion of each row
+                new_tokens = out[:, inputs["input_ids"].shape[1]:]
+        gen_end = time.perf_counter()
+
+        results = []
+        masks = inputs["attention_mask"].repeat_interleave(num_samples, dim=0)
+        for row, mask in zip(new_tokens, masks):
+            generated = self.tokenizer.decode(row, skip_special_tokens=True).strip()
+            output_tokens = count_tokens(row, self.tokenizer.pad_token_id, self.tokenizer.eos_token_id)
+            results.append({
+                "code": generated,
+                "token_count": output_tokens,
+                "input_tokens": int(mask.sum()),
+                "output_tokens": output_tokens,
+                "finish_reason": finish_reason(output_tokens, max_tokens),
+            })
+        timing = timing_breakdown(
+            load_time, tokenize_time, gen_start, gen_end, timer, time.perf_counter() - gen_end
+        )
+        for r in results:
+            r["timing"] = timing
+            if acceptance_rate is not None:
+                r["acceptance_rate"] = acceptance_rate
+        return group_samples(results, num_samples)
+
+    def unload(self):
+        """Drop the weights; the next call loads them again."""
+        with MODEL_LOAD_LOCK:
+            self.model = None
+            self.tokenizer = None
+            self.assistant = None
+            self.assistant_tokenizer = None
+            if self.prefix_cache is not None:
+                self.prefix_cache.clear()
+
+    async def close(self):
+        # MODEL_LOAD_LOCK may be held by a load; wait for it off the event loop
+        await asyncio.to_thread(self.unload)
@@ -1,37 +1,43 @@
 ﻿import asyncio
-import requests
 import json
 from typing import Dict, Any, Optional
 
+from src.models.openai_http import OpenAIHTTPClient, OpenAIHTTPError
+
 class LocalStub:
     def __init__(self, settings: Optional[Dict] = None):
         # FIX: Handle None settings properly
         self.settings = settings if settings is not None else {}
         self.use_api = self.settings.get('use_api', False)
         self.api_key = self.settings.get('openai_api_key')
+        self.api_model = self.settings.get('api_model', 'gpt-3.5-turbo')
+        # pooled async HTTP; point api_base at any OpenAI-compatible server
+        self.http = OpenAIHTTPClient(
+            api_key=self.api_key,
+            api_base=self.settings.get('api_base', 'https://api.openai.com/v1'),
+            max_connections=self.settings.get('max_connections', 64),
+            requests_per_minute=self.settings.get('requests_per_minute'),
+            max_retries=self.settings.get('max_retries', 5),
+            backoff_base=self.settings.get('backoff_base', 0.5),
+            deadline_s=self.settings.get('request_timeout', 120),
+        )
     
-    async def generate_code(self, prompt: str, **kwargs) -> str:
+    async def generate_code(self, prompt: str, **kwargs) -> Any:
         """Generate code using ACTUAL AI (no templates!)"""
         
-        if self.use_api and self.api_key:
+        # a custom api_base (e.g. a local mock server) may not need a key
+        if self.use_api and (self.api_key or 'api_base' in self.settings):
             # Use OpenAI API for true AI generation
             return await self._generate_with_openai(prompt, **kwargs)
         else:
             # Use fallback approach
             return await self._generate_with_fallback(prompt, **kwargs)
     
-    async def _generate_with_openai(self, prompt: str, **kwargs) -> str:
+    async def _generate_with_openai(self, prompt: str, **kwargs) -> Any:
         """Generate using OpenAI API - TRUE AI"""
         try:
-            import requests
-            
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
             data = {
-                'model': 'gpt-3.5-turbo',
+                'model': self.api_model,
                 'messages': [
                     {
                         'role': 'system', 
@@ -45,21 +51,23 @@ class LocalStub:
                 'max_tokens': kwargs.get('max_tokens', 800),
                 'temperature': kwargs.get('temperature', 0.3)
             }
+            if kwargs.get('seed') is not None:
+                data['seed'] = kwargs['seed']
             
-            response = requests.post(
-                'https://api.openai.com/v1/chat/completions',
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                code = result['choices'][0]['message']['content'].strip()
-                return self._clean_ai_code(code)
-            else:
-                return f"// API Error: {response.status_code}"
+            result = await self.http.post('/chat/completions', data)
+            choice = result['choices'][0]
+            usage = result.get('usage') or {}
+            code = self._clean_ai_code(choice['message']['content'].strip())
+            return {
+                'code': code,
+                'token_count': usage.get('completion_tokens', len(code.split())),
+                'input_tokens': usage.get('prompt_tokens', 0),
+                'output_tokens': usage.get('completion_tokens', 0),
+                'finish_reason': choice.get('finish_reason'),
+            }
                 
+        except OpenAIHTTPError as e:
+            return f"// API Error: {e.status}"
         except Exception as e:
             return f"// Error with AI generation: {str(e)}"
     
@@ -126,4 +134,4 @@ class LocalStub:
         return '\n'.join(cleaned_lines).strip()
     
     async def close(self):
-        pass
+        await self.http.close()
@@ -0,0 +1,128 @@
+"""Async, connection-pooled client for OpenAI-compatible completion endpoints."""
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from src.utils.logger import Logger
+
+logger = Logger().get()
+
+_RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class OpenAIHTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class TokenBucket:
+    """``rate`` requests per second on average, bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst or max(int(rate), 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class OpenAIHTTPClient:
+    """
+    One pooled aiohttp session per client, so many requests share
+    keep-alive connections. Calls are rate limited by a token bucket
+    (``requests_per_minute``), retried with exponential backoff and jitter on
+    429/5xx and connection errors (honouring ``Retry-After``), and bounded by
+    a per-request ``deadline_s`` covering all attempts.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_base: str = "https://api.openai.com/v1",
+        max_connections: int = 64,
+        requests_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        deadline_s: float = 120.0,
+    ):
+        self.api_key = api_key
+        self.api_base = api_base.rstrip("/")
+        self.max_connections = max_connections
+        self.bucket = TokenBucket(requests_per_minute / 60.0) if requests_per_minute else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline_s = deadline_s
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # created lazily: a session belongs to the event loop that is running
+        if self._session is None or self._session.closed:
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            self._session = aiohttp.ClientSession(
+                headers=headers,
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+            )
+        return self._session
+
+    async def post(self, path: str, payload: Dict[str, Any], deadline_s: Optional[float] = None) -> Dict[str, Any]:
+        """POST ``payload`` to ``api_base + path`` and return the decoded JSON response."""
+        deadline = time.monotonic() + (deadline_s or self.deadline_s)
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"deadline exceeded for {path}")
+            if self.bucket is not None:
+                await asyncio.wait_for(self.bucket.acquire(), remaining)
+
+            retry_after = None
+            try:
+                timeout = aiohttp.ClientTimeout(total=max(deadline - time.monotonic(), 0.001))
+                async with self._get_session().post(self.api_base + path, json=payload, timeout=timeout) as resp:
+                    if resp.status == 200:
+                        return await resp.json()
+                    body = await resp.text()
+                    error = OpenAIHTTPError(resp.status, body[:200])
+                    if resp.status not in _RETRY_STATUS:
+                        raise error
+                    retry_after = resp.headers.get("Retry-After")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+
+            attempt += 1
+            if attempt > self.max_retries:
+                raise error
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            if retry_after:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            if time.monotonic() + delay >= deadline:
+                raise error
+            logger.debug("Retrying %s in %.2fs after %s", path, delay, error)
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
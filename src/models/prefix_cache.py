@@ -0,0 +1,181 @@
+"""Reuse of prompt-prefix key/values across generate() calls."""
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+import torch
+from transformers import DynamicCache
+
+from src.utils.logger import Logger
+
+logger = Logger().get()
+
+
+class PrefixKVCache:
+    """
+    LRU store of past key/values for prompt prefixes, matched on token ids.
+
+    Prefixes are indexed at ``block_size`` boundaries with a chained hash
+    (each block's hash covers everything before it), so a prompt reuses the
+    longest block-aligned prefix it shares with any earlier prompt, e.g. the
+    fixed few-shot preamble or the problem description that every strategy
+    template embeds. Hits hand out a deep copy cropped to the shared length;
+    the stored entry itself is never mutated.
+
+    Batched prompts reuse the prefix they all share, and samples of one
+    prompt share its copy (see generate_with_prefix).
+    """
+
+    def __init__(self, block_size: int = 32, max_entries: int = 8):
+        self.block_size = block_size
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[DynamicCache, int]]" = OrderedDict()
+        self._index: Dict[str, Tuple[int, int]] = {}  # block hash -> (entry id, prefix length)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reused_tokens = 0
+
+    def _block_hashes(self, ids: List[int]) -> List[str]:
+        hashes, h = [], b""
+        for end in range(self.block_size, len(ids) + 1, self.block_size):
+            block = ",".join(map(str, ids[end - self.block_size:end])).encode()
+            h = hashlib.sha1(h + block).digest()
+            hashes.append(h.hex())
+        return hashes
+
+    def lookup(self, ids: List[int]) -> Tuple[Optional[DynamicCache], int]:
+        """Copy of the cached key/values for the longest known prefix of ``ids``."""
+        # at least one prompt token must be left for generate() to feed
+        hashes = self._block_hashes(ids[:-1])
+        with self._lock:
+            for h in reversed(hashes):
+                hit = self._index.get(h)
+                if hit is None or hit[0] not in self._entries:
+                    continue
+                entry_id, length = hit
+                self._entries.move_to_end(entry_id)
+                cache, cached_len = self._entries[entry_id]
+                past = copy.deepcopy(cache)
+                if length < cached_len:
+                    past.crop(length - cached_len)
+                self.hits += 1
+                self.reused_tokens += length
+                return past, length
+            self.misses += 1
+        return None, 0
+
+    def store(self, ids: List[int], past: DynamicCache):
+        """
+        Keep the block-aligned prompt part of ``past``, the cache generate()
+        filled for ``ids``. ``past`` is cropped in place and must not be
+        used by the caller afterwards.
+        """
+        hashes = self._block_hashes(ids[:-1])
+        if not hashes:
+            return
+        length = len(hashes) * self.block_size
+        with self._lock:
+            if self._index.get(hashes[-1], (None,))[0] in self._entries:
+                return  # already covered by an existing entry
+            extra = past.get_seq_length() - length
+            if extra > 0:
+                past.crop(-extra)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (past, length)
+            for i, h in enumerate(hashes):
+                self._index[h] = (entry_id, (i + 1) * self.block_size)
+            while len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        entry_id, _ = self._entries.popitem(last=False)
+        self._index = {h: v for h, v in self._index.items() if v[0] != entry_id}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+
+
+def make_prefix_cache(cfg: Union[bool, Dict, None] = True) -> Optional[PrefixKVCache]:
+    """
+    Cache for a client's ``prefix_cache`` setting: false/None disables it, a
+    dict passes ``block_size`` / ``max_entries``.
+    """
+    if not cfg:
+        return None
+    return PrefixKVCache(**(cfg if isinstance(cfg, dict) else {}))
+
+
+def _shared_length(rows: List[List[int]], block_size: int) -> int:
+    """Block-aligned length of the prefix all rows share, leaving each row a token to feed."""
+    shortest = min(len(r) for r in rows) - 1
+    n = 0
+    while n < shortest and all(r[n] == rows[0][n] for r in rows):
+        n += 1
+    return n // block_size * block_size
+
+
+def _pad_after_prefix(rows: List[List[int]], prefix_len: int, pad_token_id: int):
+    """
+    Batch ``rows`` with the padding between the shared prefix and each
+    row's own tokens instead of on the left, so the prefix occupies the same
+    positions in every row and one cached copy serves the whole batch.
+    Position ids follow the attention mask, so the hole changes nothing.
+    """
+    width = max(len(r) for r in rows)
+    ids = torch.full((len(rows), width), pad_token_id, dtype=torch.long)
+    mask = torch.zeros((len(rows), width), dtype=torch.long)
+    for i, r in enumerate(rows):
+        tail = len(r) - prefix_len
+        ids[i, :prefix_len] = torch.tensor(r[:prefix_len])
+        ids[i, width - tail:] = torch.tensor(r[prefix_len:])
+        mask[i, :prefix_len] = 1
+        mask[i, width - tail:] = 1
+    return ids, mask
+
+
+def generate_with_prefix(model, inputs, prefix_cache: Optional[PrefixKVCache], **generate_kwargs):
+    """
+    ``model.generate(**inputs, ...)`` that starts from the longest cached
+    prefix shared by every prompt of the batch and remembers the longest
+    prompt's key/values. Expects left-padded ``input_ids``/``attention_mask``
+    and returns rows of the same width, so callers slice new tokens as usual.
+    ``num_return_sequences`` is applied here, by repeating rows and cache.
+    """
+    if prefix_cache is None or set(inputs.keys()) - {"input_ids", "attention_mask"}:
+        return model.generate(**inputs, **generate_kwargs)
+
+    samples = generate_kwargs.pop("num_return_sequences", 1)
+    ids, mask = inputs["input_ids"], inputs["attention_mask"]
+    rows = [r[m.bool()].tolist() for r, m in zip(ids, mask)]
+    past, reused = prefix_cache.lookup(rows[0])
+    shared = min(reused, _shared_length(rows, prefix_cache.block_size))
+    if shared:
+        if shared < reused:
+            past.crop(shared)
+        logger.debug("Prefix cache hit: reusing %d prompt tokens for %d rows", shared, len(rows))
+        if len(rows) > 1:
+            pad = generate_kwargs.get("pad_token_id")
+            ids, mask = _pad_after_prefix(rows, shared, 0 if pad is None else pad)
+            ids, mask = ids.to(inputs["input_ids"].device), mask.to(inputs["input_ids"].device)
+        past.batch_repeat_interleave(len(rows) * samples)
+    else:
+        past = DynamicCache()
+    if samples > 1:
+        ids, mask = ids.repeat_interleave(samples, dim=0), mask.repeat_interleave(samples, dim=0)
+
+    outputs = model.generate(input_ids=ids, attention_mask=mask, past_key_values=past, **generate_kwargs)
+
+    # the longest prompt has no padding in either layout, so its cache
+    # columns are exactly its tokens
+    longest = max(range(len(rows)), key=lambda i: len(rows[i]))
+    if len(rows) * samples > 1:
+        past.batch_select_indices(torch.tensor([longest * samples], device=ids.device))
+    prefix_cache.store(rows[longest], past)
+    return outputs
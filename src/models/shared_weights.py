@@ -0,0 +1,166 @@
+"""Memory-mapped safetensors loading so worker processes share one copy of the weights."""
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import torch
+
+from src.utils.logger import Logger
+
+logger = Logger().get()
+
+try:
+    from transformers.initialization import no_init_weights
+except ImportError:  # transformers < 5
+    from transformers.modeling_utils import no_init_weights
+
+_DTYPES = {
+    "F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+    "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8,
+    "U8": torch.uint8, "BOOL": torch.bool,
+}
+
+# keeps the mappings alive for as long as the process may use the tensors
+_mappings: List[mmap.mmap] = []
+
+
+def memory_report() -> Dict[str, float]:
+    """
+    This process's memory in MB from /proc/self/smaps_rollup: ``unique``
+    (private pages, what the process alone costs), ``shared`` (pages also
+    mapped by other processes, e.g. page-cache weights) and ``rss``.
+    """
+    fields: Dict[str, float] = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        return {}
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "unique": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+        "shared": fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0),
+    }
+
+
+def mmap_safetensors(path: Path) -> Dict[str, torch.Tensor]:
+    """
+    Tensors of one .safetensors file as views into a private (copy-on-write)
+    file mapping: nothing is read until used, and pages stay shared with
+    every other process mapping the same file unless written to.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    _mappings.append(mapped)
+    (header_len,) = struct.unpack("<Q", mapped[:8])
+    header = json.loads(mapped[8:8 + header_len])
+    base = 8 + header_len
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = _DTYPES[info["dtype"]]
+        start, end = info["data_offsets"]
+        count = (end - start) // torch.empty((), dtype=dtype).element_size()
+        flat = torch.frombuffer(mapped, dtype=dtype, count=count, offset=base + start) if count else torch.empty(0, dtype=dtype)
+        tensors[name] = flat.view(info["shape"])
+    return tensors
+
+
+def find_safetensors(repo: str, revision: Optional[str] = None) -> List[Path]:
+    """Checkpoint shards for a local directory or an already-downloaded hub repo."""
+    local = Path(repo)
+    if not local.is_dir():
+        from huggingface_hub import snapshot_download
+        local = Path(snapshot_download(repo, revision=revision, allow_patterns=["*.safetensors", "*.json"]))
+    return sorted(local.glob("*.safetensors"))
+
+
+def _resolve_dtype(torch_dtype, config) -> torch.dtype:
+    """The dtype ``from_pretrained`` would load in: the requested one, or the config's for None/"auto"."""
+    if torch_dtype is None or torch_dtype == "auto":
+        torch_dtype = getattr(config, "dtype", None) or getattr(config, "torch_dtype", None) or torch.float32
+    return getattr(torch, torch_dtype) if isinstance(torch_dtype, str) else torch_dtype
+
+
+def load_mmap_model(model_cls, repo: str, revision: Optional[str] = None, torch_dtype=None, **config_kwargs):
+    """
+    Build ``model_cls`` (an Auto* class or a concrete model class) from the
+    repo's config with uninitialized weights in ``torch_dtype`` (resolved as
+    ``from_pretrained`` does), then assign the memory-mapped checkpoint
+    tensors as its parameters. Raises if the repo has no safetensors shards,
+    they do not cover every parameter, or a floating-point tensor is stored
+    in another dtype (converting it would leave a private copy anyway).
+    """
+    from transformers import AutoConfig
+
+    files = find_safetensors(repo, revision)
+    if not files:
+        raise FileNotFoundError(f"No safetensors weights for {repo}")
+    config = AutoConfig.from_pretrained(repo, revision=revision, **config_kwargs)
+    dtype = _resolve_dtype(torch_dtype, config)
+    mapped = [mmap_safetensors(path) for path in files]
+    stored = {t.dtype for tensors in mapped for t in tensors.values() if t.is_floating_point()}
+    if stored - {dtype}:
+        del _mappings[-len(files):]
+        raise ValueError(f"checkpoint is stored as {sorted(map(str, stored))}, requested {dtype}")
+
+    with no_init_weights():
+        if hasattr(model_cls, "from_config"):
+            model = model_cls.from_config(config, dtype=dtype, **config_kwargs)
+        else:
+            model = model_cls._from_config(config, dtype=dtype)
+
+    expected = model.state_dict().keys()
+    prefix = getattr(model, "base_model_prefix", "")
+    state = {}
+    for tensors in mapped:
+        for name, tensor in tensors.items():
+            if name not in expected and f"{prefix}.{name}" in expected:
+                name = f"{prefix}.{name}"  # checkpoint saved from the base model
+            elif name not in expected and name.startswith(prefix + ".") and name[len(prefix) + 1:] in expected:
+                name = name[len(prefix) + 1:]
+            state[name] = tensor
+
+    model.load_state_dict(state, strict=False, assign=True)
+    model.tie_weights()
+    # tied parameters (e.g. lm_head -> embeddings) share an assigned tensor
+    current = model.state_dict()
+    assigned = {current[n].data_ptr() for n in state if n in current}
+    missing = [n for n, t in current.items() if n not in state and t.data_ptr() not in assigned]
+    if missing:
+        raise RuntimeError(f"{repo}: checkpoint does not cover {missing[:3]}")
+    model.eval()
+
+    mapped_mb = sum(t.numel() * t.element_size() for t in state.values()) / 2**20
+    usage = memory_report()
+    logger.info(
+        "Mapped %s weights (%.0f MB); process unique %.0f MB, shared %.0f MB",
+        repo, mapped_mb, usage.get("unique", 0.0), usage.get("shared", 0.0),
+    )
+    return model
+
+
+def load_weights(model_cls, repo: str, revision: Optional[str] = None, mmap_weights: bool = False,
+                 trust_remote_code: bool = False, **pretrained_kwargs):
+    """
+    What model clients call instead of ``from_pretrained``: the memory-mapped
+    path when ``mmap_weights`` is set (CPU only), ``from_pretrained`` otherwise
+    or when the checkpoint cannot be mapped as-is in ``torch_dtype``.
+    """
+    if mmap_weights:
+        try:
+            return load_mmap_model(
+                model_cls, repo, revision, torch_dtype=pretrained_kwargs.get("torch_dtype"),
+                trust_remote_code=trust_remote_code,
+            )
+        except Exception as e:
+            logger.warning("Could not memory-map %s (%s); loading a private copy", repo, e)
+    return model_cls.from_pretrained(
+        repo, revision=revision, trust_remote_code=trust_remote_code, **pretrained_kwargs
+    )
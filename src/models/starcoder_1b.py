@@ -1,61 +1,153 @@
 ﻿import asyncio
+import time
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
-from typing import Dict, Any
+from transformers import AutoModelForCausalLM, AutoTokenizer, StoppingCriteriaList
+from typing import Dict, Any, List
+
+from src.core.inference_executor import MODEL_LOAD_LOCK, run_inference
+from src.models.generation_utils import FirstTokenTimer, count_tokens, finish_reason, group_samples, timing_breakdown
+from src.models.prefix_cache import generate_with_prefix, make_prefix_cache
+from src.models.shared_weights import load_weights
+from src.models.stopping import JavaStopCriteria, truncate_java
+from src.optimization.autotuner import load_tuned
 
 class StarCoder1B:
     def __init__(self, settings=None):
         self.settings = settings or {}
         # FIXED: Use correct model name that exists
         self.model_name = "bigcode/tiny_starcoder"
+        # optional pinned checkpoint revision (branch, tag or commit)
+        self.revision = self.settings.get("revision")
         self.model = None
         self.tokenizer = None
+        # worker pool assigned by InferenceExecutor.bind(); None = default pool
+        self.executor = None
+        # key/values of shared prompt prefixes (few-shot preamble, problem text)
+        self.prefix_cache = make_prefix_cache(self.settings.get("prefix_cache", True))
+        # end decoding once the Java class closes or the model starts a new task
+        self.stop_at_class_end = self.settings.get("stop_at_class_end", True)
+        self.stop_sequences = self.settings.get("stop_sequences", ["\n// Task:"])
         
     def _load_model(self):
-        if self.model is None:
+        # guarded so a background preload and the first request load only once;
+        # the unlocked check keeps loaded models from queueing behind another load
+        if self.model is not None:
+            return
+        with MODEL_LOAD_LOCK:
+            if self.model is not None:
+                return
             print(f"Loading {self.model_name}...")
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name, trust_remote_code=True)
-            self.model = AutoModelForCausalLM.from_pretrained(
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name, revision=self.revision, trust_remote_code=True)
+            # decoder-only: pad on the left so every row ends at the prompt boundary
+            self.tokenizer.padding_side = "left"
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            model = load_weights(
+                AutoModelForCausalLM,
                 self.model_name,
+                revision=self.revision,
+                # share read-only weight pages with other worker processes
+                mmap_weights=self.settings.get("mmap_weights", False) and not torch.cuda.is_available(),
                 torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
                 trust_remote_code=True
             )
-            self.model.eval()
-            
-    async def generate_code(self, prompt: str, **kwargs) -> str:
+            model.eval()
+            # dtype / int8 / threads tuned for this machine by `main.py --autotune`
+            # set last: the unlocked check must never see a half-loaded client
+            self.model = load_tuned(model, self.model_name, self.settings.get("autotune", True))
+
+    def _format_prompt(self, prompt: str) -> str:
+        # Better prompt format for StarCoder
+        return f"// Task: {prompt}\n// Solution:\n"
+
+    async def generate_code(self, prompt: str, **kwargs) -> Dict:
+        return (await self.generate_batch([prompt], **kwargs))[0]
+
+    async def generate_batch(self, prompts: List[str], **kwargs) -> List[Dict]:
+        return await run_inference(
+            self,
+            "_sync_generate_batch",
+            prompts,
+            kwargs.get('max_tokens', 200),
+            kwargs.get('temperature', 0.7),
+            kwargs.get('seed'),
+            kwargs.get('num_samples', 1),
+        )
+
+    def _sync_generate_batch(self, prompts: List[str], max_tokens: int, temperature: float, seed=None, num_samples: int = 1) -> List[Dict]:
         try:
+            t0 = time.perf_counter()
             self._load_model()
+            load_time = time.perf_counter() - t0
+            if seed is not None:
+                torch.manual_seed(seed)
             
-            # Better prompt format for StarCoder
-            formatted_prompt = f"// Task: {prompt}\n// Solution:\n"
-            
+            t0 = time.perf_counter()
             inputs = self.tokenizer(
-                formatted_prompt, 
+                [self._format_prompt(p) for p in prompts],
                 return_tensors="pt", 
                 max_length=512, 
-                truncation=True
+                truncation=True,
+                padding=True
             )
+            tokenize_time = time.perf_counter() - t0
                 
+            timer = FirstTokenTimer()
+            # generated tokens start right after the (left-padded) prompt
+            prompt_len = inputs['input_ids'].shape[1]
+            stop = JavaStopCriteria(self.tokenizer, prompt_len, self.stop_sequences, self.stop_at_class_end)
+            gen_start = time.perf_counter()
             with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_new_tokens=kwargs.get('max_tokens', 200),
-                    temperature=kwargs.get('temperature', 0.7),
+                outputs = generate_with_prefix(
+                    self.model,
+                    inputs,
+                    self.prefix_cache,
+                    max_new_tokens=max_tokens,
+                    temperature=temperature,
                     do_sample=True,
                     pad_token_id=self.tokenizer.pad_token_id,
-                    eos_token_id=self.tokenizer.eos_token_id
+                    eos_token_id=self.tokenizer.eos_token_id,
+                    num_return_sequences=num_samples,
+                    stopping_criteria=StoppingCriteriaList([timer, stop]),
                 )
+            gen_end = time.perf_counter()
             
-            # Decode only new tokens
-            generated_tokens = outputs[0][inputs['input_ids'].shape[1]:]
-            generated_code = self.tokenizer.decode(generated_tokens, skip_special_tokens=True)
-            
-            return generated_code.strip() if generated_code.strip() else "// Could not generate valid code"
+            results = []
+            # samples of one prompt are consecutive rows sharing its attention mask
+            masks = inputs['attention_mask'].repeat_interleave(num_samples, dim=0)
+            for i, (row, mask) in enumerate(zip(outputs, masks)):
+                new_tokens = row[prompt_len:]
+                generated_code = truncate_java(
+                    self.tokenizer.decode(new_tokens, skip_special_tokens=True),
+                    self.stop_sequences,
+                    self.stop_at_class_end,
+                )
+                output_tokens = count_tokens(new_tokens, self.tokenizer.pad_token_id, self.tokenizer.eos_token_id)
+                results.append({
+                    "code": generated_code.strip() if generated_code.strip() else "// Could not generate valid code",
+                    "token_count": output_tokens,
+                    "input_tokens": int(mask.sum()),
+                    "output_tokens": output_tokens,
+                    "finish_reason": finish_reason(output_tokens, max_tokens, stop.stopped(i)),
+                })
+            timing = timing_breakdown(
+                load_time, tokenize_time, gen_start, gen_end, timer, time.perf_counter() - gen_end
+            )
+            for r in results:
+                r["timing"] = timing
+            return group_samples(results, num_samples)
             
         except Exception as e:
-            return f"// Error generating code: {str(e)}"
+            return [f"// Error generating code: {str(e)}"] * len(prompts)
     
+    def unload(self):
+        # reset rather than del so _load_model() can bring the weights back
+        with MODEL_LOAD_LOCK:
+            self.model = None
+            self.tokenizer = None
+            if self.prefix_cache is not None:
+                self.prefix_cache.clear()
+
     async def close(self):
-        if self.model is not None:
-            del self.model
-            del self.tokenizer
+        # MODEL_LOAD_LOCK may be held by a load; wait for it off the event loop
+        await asyncio.to_thread(self.unload)
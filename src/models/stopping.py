@@ -0,0 +1,165 @@
+"""Stopping criteria that end Java generation once the top-level type is complete."""
+import re
+from typing import List, Optional, Sequence
+
+import torch
+from transformers import StoppingCriteria
+
+_TYPE_KEYWORDS = re.compile(r"\b(class|interface|enum|record)\b")
+
+
+class JavaClassTracker:
+    """
+    Incremental scanner over generated Java text. Tracks brace depth while
+    skipping string/char literals and comments, and remembers where the
+    first top-level ``class``/``interface``/``enum``/``record`` body closes.
+
+    Top-level blocks that are not type declarations (a bare method, an
+    initializer) do not count, so a model that emits helper code before the
+    class keeps going.
+    """
+
+    def __init__(self):
+        self.pos = 0          # characters consumed so far
+        self.depth = 0
+        self.end: Optional[int] = None  # offset just past the closing brace
+        self._header = []     # code seen at depth 0 since the last block
+        self._type_block = False
+        self._state = "code"  # code | string | char | line_comment | block_comment
+        self._prev = ""
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+
+    def feed(self, text: str) -> bool:
+        """Consume the next chunk; True once the top-level type has closed."""
+        for ch in text:
+            if self.end is not None:
+                break
+            self._step(ch)
+            self.pos += 1
+        return self.end is not None
+
+    def _step(self, ch: str):
+        prev, self._prev = self._prev, ch
+        state = self._state
+        if state == "line_comment":
+            if ch == "\n":
+                self._state = "code"
+            return
+        if state == "block_comment":
+            if prev == "*" and ch == "/":
+                self._state = "code"
+                self._prev = ""  # "*/*" must not reopen
+            return
+        if state in ("string", "char"):
+            if prev == "\\":
+                self._prev = ""  # escaped; a following backslash is literal
+            elif ch == ('"' if state == "string" else "'"):
+                self._state = "code"
+            return
+
+        # plain code
+        if prev == "/" and ch == "/":
+            self._state = "line_comment"
+            self._drop_slash()
+        elif prev == "/" and ch == "*":
+            self._state = "block_comment"
+            self._prev = ""
+            self._drop_slash()
+        elif ch == '"':
+            self._state = "string"
+        elif ch == "'":
+            self._state = "char"
+        elif ch == "{":
+            if self.depth == 0:
+                self._type_block = bool(_TYPE_KEYWORDS.search("".join(self._header)))
+                self._header = []
+            self.depth += 1
+        elif ch == "}":
+            if self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0 and self._type_block:
+                    self.end = self.pos + 1
+        elif self.depth == 0:
+            self._header.append(ch)
+            if ch == ";":
+                # imports / package lines never introduce a block
+                self._header = []
+
+    def _drop_slash(self):
+        if self.depth == 0 and self._header and self._header[-1] == "/":
+            self._header.pop()
+
+
+def find_stop(text: str, stop_sequences: Sequence[str], start: int = 0) -> Optional[int]:
+    """Offset of the earliest stop sequence at or after ``start``, if any."""
+    hits = [i for i in (text.find(s, start) for s in stop_sequences if s) if i >= 0]
+    return min(hits) if hits else None
+
+
+def truncate_java(text: str, stop_sequences: Sequence[str] = (), stop_at_class_end: bool = True) -> str:
+    """Cut generated text after the top-level type closes or at a stop sequence."""
+    cut = len(text)
+    if stop_at_class_end:
+        tracker = JavaClassTracker()
+        if tracker.feed(text):
+            cut = tracker.end
+    stop = find_stop(text[:cut], stop_sequences)
+    return text[:cut if stop is None else stop]
+
+
+class JavaStopCriteria(StoppingCriteria):
+    """
+    Per-row stopping for ``generate``: a row finishes once its top-level
+    Java type is complete or one of ``stop_sequences`` appears in the new
+    text. Rows are decoded incrementally from ``prompt_len`` (the padded
+    prompt width for decoder-only models, 0 for encoder-decoder ones).
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        prompt_len: int,
+        stop_sequences: Sequence[str] = (),
+        stop_at_class_end: bool = True,
+    ):
+        self.tokenizer = tokenizer
+        self.prompt_len = prompt_len
+        self.stop_sequences = [s for s in stop_sequences if s]
+        self.stop_at_class_end = stop_at_class_end
+        self._trackers: List[JavaClassTracker] = []
+        self._texts: List[str] = []
+        self._done: List[bool] = []
+        self.stopped_rows = 0
+
+    def __call__(self, input_ids, scores, **kwargs):
+        rows = input_ids.shape[0]
+        if len(self._done) != rows:
+            self._trackers = [JavaClassTracker() for _ in range(rows)]
+            self._texts = [""] * rows
+            self._done = [False] * rows
+        longest_stop = max((len(s) for s in self.stop_sequences), default=0)
+
+        for i in range(rows):
+            if self._done[i]:
+                continue
+            text = self.tokenizer.decode(input_ids[i, self.prompt_len:], skip_special_tokens=True)
+            seen = self._texts[i]
+            if not text.startswith(seen):
+                # a multi-byte character completed and changed earlier text
+                self._trackers[i] = JavaClassTracker()
+                seen = ""
+            self._texts[i] = text
+            done = self.stop_at_class_end and self._trackers[i].feed(text[len(seen):])
+            if not done and self.stop_sequences:
+                done = find_stop(text, self.stop_sequences, max(len(seen) - longest_stop, 0)) is not None
+            if done:
+                self._done[i] = True
+                self.stopped_rows += 1
+        return torch.tensor(self._done, dtype=torch.bool, device=input_ids.device)
+
+    def stopped(self, row: int) -> bool:
+        """Whether ``row`` was ended by this criteria (rather than EOS or the length cap)."""
+        return row < len(self._done) and self._done[row]
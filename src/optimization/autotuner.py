@@ -0,0 +1,236 @@
+"""Per-machine CPU inference profiles (dtype, quantization, threads, compile)."""
+import copy
+import hashlib
+import json
+import os
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import torch
+
+from src.core.inference_executor import pinned_threads
+from src.utils.logger import Logger
+
+logger = Logger().get()
+
+PROFILE_PATH = Path("data/autotune/profiles.json")
+
+# fixed prompt sample so profiles from different machines are comparable
+SAMPLE_PROMPTS = [
+    "Write a Java method that returns the indices of the two numbers in an array that add up to a target.",
+    "Write a Java class with a method that checks whether a string is a palindrome, ignoring case.",
+    "Write a Java method that merges two sorted integer arrays into one sorted array.",
+]
+
+
+@dataclass
+class InferenceProfile:
+    dtype: str = "fp32"              # fp32 | bf16
+    quantize: Optional[str] = None   # None | "dynamic-int8"
+    threads: Optional[int] = None    # torch intra-op threads
+    compile: bool = False            # torch.compile the forward pass
+    tokens_per_s: float = 0.0
+    agreement: float = 1.0           # top-1 agreement with the fp32 reference
+
+    def label(self) -> str:
+        parts = [self.quantize or self.dtype, f"{self.threads or 'default'}t"]
+        if self.compile:
+            parts.append("compiled")
+        return "/".join(parts)
+
+
+def machine_id() -> str:
+    """Key for the local CPU so a shared profile file serves a mixed fleet."""
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((l.split(":", 1)[1].strip() for l in f if l.startswith("model name")), cpu)
+    except OSError:
+        pass
+    desc = f"{platform.machine()}|{cpu}|{os.cpu_count()}"
+    return hashlib.sha1(desc.encode()).hexdigest()[:12]
+
+
+def load_profile(model_id: str, path: Path = PROFILE_PATH) -> Optional[InferenceProfile]:
+    """Tuned profile for ``model_id`` (a HF repo id) on this machine, if any."""
+    try:
+        profiles = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    entry = profiles.get(machine_id(), {}).get(model_id)
+    return InferenceProfile(**entry) if entry else None
+
+
+def save_profile(model_id: str, profile: InferenceProfile, path: Path = PROFILE_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        profiles = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        profiles = {}
+    profiles.setdefault(machine_id(), {})[model_id] = asdict(profile)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(profiles, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _usable_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def apply_profile(model, profile: Optional[InferenceProfile]):
+    """Return ``model`` converted to ``profile``; GPU models are left alone."""
+    if profile is None or next(model.parameters()).is_cuda:
+        return model
+    if profile.threads:
+        # process-wide; an executor's or replica's own setting wins
+        if pinned_threads():
+            logger.info("Keeping %d pinned torch threads over the profile's %d", pinned_threads(), profile.threads)
+        else:
+            torch.set_num_threads(min(profile.threads, _usable_cores()))
+    if profile.quantize == "dynamic-int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif profile.dtype == "bf16":
+        model = model.to(torch.bfloat16)
+    if profile.compile:
+        model.forward = torch.compile(model.forward, dynamic=True)
+    return model
+
+
+def load_tuned(model, model_id: str, enabled: bool = True):
+    """What model clients call after from_pretrained."""
+    profile = load_profile(model_id) if enabled else None
+    if profile is not None:
+        logger.info("Using autotuned profile %s for %s", profile.label(), model_id)
+    return apply_profile(model, profile)
+
+
+class Autotuner:
+    """
+    Benchmarks a loaded model across dtype / quantization / thread count
+    (and optionally torch.compile) on SAMPLE_PROMPTS and keeps the fastest
+    variant whose greedy next-token predictions agree with the fp32
+    reference on at least ``1 - tolerance`` of positions.
+    """
+
+    def __init__(
+        self,
+        new_tokens: int = 32,
+        repeats: int = 2,
+        tolerance: float = 0.05,
+        thread_counts: Optional[Iterable[int]] = None,
+        try_compile: bool = False,
+    ):
+        self.new_tokens = new_tokens
+        self.repeats = repeats
+        self.tolerance = tolerance
+        cores = _usable_cores()
+        self.thread_counts = sorted(set(thread_counts or {1, max(cores // 2, 1), cores}))
+        self.try_compile = try_compile
+
+    def candidates(self) -> List[InferenceProfile]:
+        out = []
+        for threads in self.thread_counts:
+            out.append(InferenceProfile("fp32", None, threads))
+            out.append(InferenceProfile("bf16", None, threads))
+            out.append(InferenceProfile("fp32", "dynamic-int8", threads))
+            if self.try_compile:
+                out.append(InferenceProfile("fp32", None, threads, compile=True))
+        return out
+
+    def tune(self, model, tokenizer) -> InferenceProfile:
+        model.eval()
+        inputs = [tokenizer(p, return_tensors="pt") for p in SAMPLE_PROMPTS]
+        refs = [self._reference(model, tokenizer, x) for x in inputs]
+        default_threads = torch.get_num_threads()
+
+        best: Optional[InferenceProfile] = None
+        try:
+            for profile in self.candidates():
+                try:
+                    variant = apply_profile(copy.deepcopy(model), profile)
+                    profile.agreement = statistics.mean(
+                        self._agreement(variant, x, ref) for x, ref in zip(inputs, refs)
+                    )
+                    if profile.agreement < 1 - self.tolerance:
+                        logger.info("  %-24s agreement %.3f, rejected", profile.label(), profile.agreement)
+                        continue
+                    profile.tokens_per_s = self._throughput(variant, tokenizer, inputs)
+                except Exception as e:
+                    logger.info("  %-24s unsupported here: %s", profile.label(), e)
+                    continue
+                logger.info("  %-24s %.1f tok/s (agreement %.3f)", profile.label(), profile.tokens_per_s, profile.agreement)
+                if best is None or profile.tokens_per_s > best.tokens_per_s:
+                    best = profile
+        finally:
+            torch.set_num_threads(default_threads)
+        return best or InferenceProfile()
+
+    def _generate(self, model, tokenizer, x):
+        with torch.no_grad():
+            return model.generate(
+                **x,
+                do_sample=False,
+                max_new_tokens=self.new_tokens,
+                min_new_tokens=self.new_tokens,
+                pad_token_id=tokenizer.pad_token_id or tokenizer.eos_token_id,
+            )
+
+    def _reference(self, model, tokenizer, x) -> torch.Tensor:
+        out = self._generate(model, tokenizer, x)[0]
+        if model.config.is_encoder_decoder:
+            return out  # starts with the decoder start token
+        return out[x["input_ids"].shape[1]:]
+
+    @staticmethod
+    def _agreement(model, x, ref: torch.Tensor) -> float:
+        """Teacher-forced top-1 agreement with the reference continuation."""
+        with torch.no_grad():
+            if model.config.is_encoder_decoder:
+                logits = model(**x, decoder_input_ids=ref[:-1].unsqueeze(0)).logits[0]
+                target = ref[1:]
+            else:
+                full = torch.cat([x["input_ids"][0], ref]).unsqueeze(0)
+                prompt_len = x["input_ids"].shape[1]
+                logits = model(input_ids=full).logits[0, prompt_len - 1:-1]
+                target = ref
+        return float((logits.argmax(-1) == target).float().mean())
+
+    def _throughput(self, model, tokenizer, inputs) -> float:
+        self._generate(model, tokenizer, inputs[0])  # warm-up (and compile)
+        times = []
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            for x in inputs:
+                self._generate(model, tokenizer, x)
+            times.append(time.perf_counter() - start)
+        return self.new_tokens * len(inputs) / statistics.median(times)
+
+
+async def autotune_models(cfg_path: str, try_compile: bool = False, path: Path = PROFILE_PATH):
+    """Tune every HF-backed model in a benchmark config and persist the winners."""
+    from src.core.inference_executor import run_inference
+    from src.core.model_registry import create_model
+
+    with open(cfg_path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    tuner = Autotuner(try_compile=try_compile, **cfg.get("autotune", {}))
+    settings_by_model = cfg.get("model_settings") or {}
+
+    for name in cfg["models"]:
+        settings = dict(settings_by_model.get(name, {}), autotune=False)
+        client = create_model(name, settings)
+        if not hasattr(client, "_load_model"):
+            continue
+        logger.info("Autotuning %s on machine %s", name, machine_id())
+        await run_inference(client, "_load_model")
+        profile = tuner.tune(client.model, client.tokenizer)
+        save_profile(client.model_name, profile, path)
+        logger.info("Saved %s for %s (%.1f tok/s)", profile.label(), name, profile.tokens_per_s)
+        await client.close()
@@ -0,0 +1,97 @@
+"""Content-addressed JSON store on disk with size/age based eviction."""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class DiskCache:
+    """
+    One JSON file per key under ``root/<k[:2]>/<k>.json``.
+
+    A file's mtime is when the entry was written (``max_age_days`` counts
+    from there) and its atime when it was last read, which reads set
+    explicitly so eviction (oldest atime first) behaves like LRU on any
+    mount. Limits are checked every ``evict_every`` writes, in a background
+    thread, to keep the hot path to a single file write.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age_days: Optional[float] = None,
+        evict_every: int = 100,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        self.evict_every = evict_every
+        self._writes = 0
+        self._sweep: Optional[threading.Thread] = None
+
+    @staticmethod
+    def make_key(obj: Any) -> str:
+        blob = json.dumps(obj, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            if self.max_age and time.time() - path.stat().st_mtime > self.max_age:
+                path.unlink()
+                return None
+            value = json.loads(path.read_text(encoding="utf-8"))
+            # record the access but keep the write time for max_age
+            os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+            return value
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def set(self, key: str, value: Dict):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(value, default=str), encoding="utf-8")
+        os.replace(tmp, path)
+
+        self._writes += 1
+        if self._writes % self.evict_every == 0 and not (self._sweep and self._sweep.is_alive()):
+            # a sweep globs the whole cache; keep it off the caller (the event loop)
+            self._sweep = threading.Thread(target=self.evict, name="disk-cache-evict", daemon=True)
+            self._sweep.start()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones over the limits."""
+        now = time.time()
+        entries = []
+        for path in self.root.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if self.max_age and now - st.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((st.st_atime, st.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, path in entries:
+            over_count = self.max_entries is not None and count > self.max_entries
+            over_bytes = self.max_bytes is not None and total > self.max_bytes
+            if not (over_count or over_bytes):
+                break
+            path.unlink(missing_ok=True)
+            count -= 1
+            total -= size
@@ -6,6 +6,8 @@ from pathlib import Path
 from typing import List, Dict, Any
 import json
 
+from src.analysis.pass_at_k import group_by_request, pass_at_k_for, success_rate
+
 class AIOnlyReportGenerator:
     def __init__(self):
         self.reports_dir = Path("reports")
@@ -79,6 +81,9 @@ class AIOnlyReportGenerator:
         print(f" Processing AI-only results: {len(strategies)} strategies  {len(ai_models)} models = {len(strategies) * len(ai_models)} expected")
         print(f" Total results received: {len(results)}")
         
+        # one entry per request; multi-sample requests carry all their samples
+        groups = group_by_request(results)
+        
         data = []
         result_index = 0
         
@@ -90,8 +95,9 @@ class AIOnlyReportGenerator:
         
         for strategy in strategies:
             for model in ai_models:
-                if result_index < len(results):
-                    result = results[result_index]
+                if result_index < len(groups):
+                    samples = groups[result_index]
+                    result = samples[0]
                     
                     print(f" Processing: {strategy} + {model} (result index {result_index})")
                     
@@ -117,8 +123,12 @@ class AIOnlyReportGenerator:
                             if generated_code:
                                 break
                     
-                    # Count tokens
-                    tokens = len(generated_code.split()) if generated_code else 50
+                    # Count tokens (model-reported when available)
+                    tokens = getattr(result, 'output_tokens', 0) or getattr(result, 'token_count', 0)
+                    if not tokens:
+                        tokens = len(generated_code.split()) if generated_code else 50
+                    timing = getattr(result, 'timing', None)
+                    ttft = float(getattr(timing, 'time_to_first_token', 0.0)) if timing else 0.0
                     
                     # Extract error message
                     error_msg = ""
@@ -135,6 +145,11 @@ class AIOnlyReportGenerator:
                         'success': success,
                         'time_s': exec_time,
                         'tokens': tokens,
+                        'ttft_s': ttft,
+                        'samples': len(samples),
+                        'success_rate': success_rate(samples),
+                        'pass_at_1': pass_at_k_for(samples, 1),
+                        'pass_at_k': pass_at_k_for(samples, len(samples)),
                         'error_message': error_msg,
                         'efficiency_score': self._calculate_ai_efficiency(exec_time, tokens)
                     })
@@ -300,6 +315,12 @@ class AIOnlyReportGenerator:
         summary_lines.append(f"  Fastest AI Model: {model_ranking.index[0].replace('-', ' ').title()} ({model_ranking.iloc[0]:.6f}s)")
         summary_lines.append(f"  Most Token Efficient: {token_ranking.index[0].replace('_', ' ').title()} ({token_ranking.iloc[0]:.1f} tokens)")
         summary_lines.append(f"  AI Success Rate: {df['success'].mean()*100:.1f}%")
+        if df['pass_at_1'].notna().any():
+            summary_lines.append(f"  pass@1: {df['pass_at_1'].mean()*100:.1f}%  pass@{df['samples'].max()}: {df['pass_at_k'].mean()*100:.1f}%")
+        else:
+            summary_lines.append(f"  pass@k: N/A (generated code was not executed)")
+        if df['samples'].max() > 1:
+            summary_lines.append(f"  Sample Success Rate: {df['success_rate'].mean()*100:.1f}%")
         
         if len(df) > 0:
             best_ai_combo = df.loc[df['efficiency_score'].idxmax()]
@@ -332,7 +353,7 @@ class AIOnlyReportGenerator:
     def _save_data(self, df: pd.DataFrame, problem_set: str):
         """Save AI-only data to CSV"""
         csv_path = self.reports_dir / "csv" / f"{problem_set}_AI_only_results.csv"
-        df.to_csv(csv_path, index=False)
+        df.to_csv(csv_path, index=False, na_rep='N/A')
         print(f" AI-only data saved: {csv_path}")
 
 # Backward compatibility with AI focus
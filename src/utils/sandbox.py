@@ -0,0 +1,115 @@
+"""
+Best-effort process isolation for running untrusted generated code.
+
+Limits are applied by running this file as a small launcher in front of the
+real command (see ``sandbox_command``) rather than through Popen's
+``preexec_fn``, which is not safe to use from a multithreaded process such
+as a worker pool. The module must therefore only import the standard
+library.
+"""
+import ctypes
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+from typing import Dict, List, Optional, Sequence
+
+_CLONE_NEWUSER = 0x10000000
+_CLONE_NEWNET = 0x40000000
+
+
+def _unshare_network() -> bool:
+    """
+    Move the calling process into an empty network namespace (loopback
+    only, and down). Needs CAP_SYS_ADMIN or unprivileged user namespaces;
+    returns False where neither is available.
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+    except OSError:
+        return False
+    if libc.unshare(_CLONE_NEWNET) == 0:
+        return True
+    uid, gid = os.getuid(), os.getgid()
+    if libc.unshare(_CLONE_NEWUSER | _CLONE_NEWNET) != 0:
+        return False
+    # keep our own ids inside the new user namespace so file access is unchanged
+    for path, line in (("/proc/self/setgroups", "deny"), ("/proc/self/uid_map", f"{uid} {uid} 1"),
+                       ("/proc/self/gid_map", f"{gid} {gid} 1")):
+        try:
+            with open(path, "w") as f:
+                f.write(line)
+        except OSError:
+            pass
+    return True
+
+
+def _apply_limits(
+    memory_mb: Optional[int] = None,
+    cpu_s: Optional[int] = None,
+    file_size_mb: int = 16,
+    max_processes: Optional[int] = None,
+    no_network: bool = True,
+):
+    limits = [(resource.RLIMIT_CORE, 0), (resource.RLIMIT_FSIZE, file_size_mb * 2**20)]
+    if memory_mb:
+        limits.append((resource.RLIMIT_AS, memory_mb * 2**20))
+    if cpu_s:
+        limits.append((resource.RLIMIT_CPU, cpu_s))
+    if max_processes:
+        limits.append((resource.RLIMIT_NPROC, max_processes))
+    for kind, value in limits:
+        try:
+            resource.setrlimit(kind, (value, value))
+        except (ValueError, OSError):
+            pass
+    if no_network:
+        _unshare_network()
+
+
+def sandbox_command(
+    argv: Sequence[str],
+    memory_mb: Optional[int] = None,
+    cpu_s: Optional[int] = None,
+    file_size_mb: int = 16,
+    max_processes: Optional[int] = None,
+    no_network: bool = True,
+) -> List[str]:
+    """
+    ``argv`` prefixed with a launcher that applies rlimits (address space,
+    CPU seconds, written file size, no core dumps, optionally processes)
+    and, best effort, cuts network access before exec'ing it. Safe to
+    start from any thread. Pair it with ``start_new_session=True`` so a
+    whole worker tree can be killed, a scratch ``cwd`` and ``sandbox_env()``.
+
+    JVMs reserve far more address space than they use, so for java leave
+    ``memory_mb`` unset and bound the heap with -Xmx instead.
+    """
+    program = shutil.which(argv[0])
+    if program is None:
+        raise FileNotFoundError(f"No such executable: {argv[0]!r}")
+    limits = {"memory_mb": memory_mb, "cpu_s": cpu_s, "file_size_mb": file_size_mb,
+              "max_processes": max_processes, "no_network": no_network}
+    return [sys.executable, "-I", os.path.abspath(__file__), json.dumps(limits), program, *argv[1:]]
+
+
+def sandbox_env(**extra: str) -> Dict[str, str]:
+    """Minimal environment for sandboxed workers (no credentials, no proxies)."""
+    env = {
+        "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+        "LANG": "C.UTF-8",
+        "HOME": tempfile.gettempdir(),
+        "TMPDIR": tempfile.gettempdir(),
+    }
+    if "JAVA_HOME" in os.environ:
+        env["JAVA_HOME"] = os.environ["JAVA_HOME"]
+    env.update(extra)
+    return env
+
+
+if __name__ == "__main__":
+    # launcher: sandbox.py <limits json> <program> [args...]
+    _apply_limits(**json.loads(sys.argv[1]))
+    os.execv(sys.argv[2], sys.argv[2:])
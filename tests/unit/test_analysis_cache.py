@@ -0,0 +1,38 @@
+from src.analysis.analysis_cache import AnalysisCache, normalize_code
+from src.analysis.compile_server import javac_version
+from src.analysis.java_analyzer import CodeMetrics, JavaAnalyzer
+
+A = "public class A {\n    int f() { return 1; } // one\n}\n"
+B = "/* header */\npublic class A { int f() {\n\n  return 1;\n} }"
+
+
+def test_comments_and_whitespace_do_not_change_the_key():
+    assert normalize_code(A) == normalize_code(B)
+    assert normalize_code(A) != normalize_code(A.replace("1", "2"))
+    assert AnalysisCache.key_for(A, None, "1") != AnalysisCache.key_for(A, None, "2")
+
+
+def test_cached_metrics_are_returned_without_compiling(tmp_path):
+    cache = AnalysisCache(str(tmp_path))
+    analyzer = JavaAnalyzer(javac="/nonexistent/javac", compile_server=False, cache=cache)
+    key = analyzer._key(A, None)
+    cache.save(key, {"lines_of_code": 3, "cyclomatic_complexity": 1, "compilation_success": True,
+                     "syntax_errors": [], "test_pass_rate": 0.0})
+
+    metrics = analyzer.analyze_many([A, B])  # no javac: any miss would raise
+    assert all(m.compilation_success for m in metrics)
+    assert isinstance(metrics[1], CodeMetrics) and metrics[1].lines_of_code == 4
+    assert cache.hits == 2 and cache.misses == 0
+
+
+def test_key_changes_when_a_jdk_becomes_available(tmp_path):
+    javac = tmp_path / "javac"
+    analyzer = JavaAnalyzer(javac=str(javac), compile_server=False, cache=AnalysisCache(str(tmp_path / "cache")))
+    without_jdk = analyzer._key(A, None)
+    assert javac_version(str(javac)) == "unavailable"
+
+    javac.write_text("#!/bin/sh\necho javac 21.0.2\n")
+    javac.chmod(0o755)
+    javac_version.cache_clear()  # normally a new run, i.e. a new process
+    assert javac_version(str(javac)) == "javac 21.0.2"
+    assert analyzer._key(A, None) != without_jdk
@@ -0,0 +1,41 @@
+from src.analysis.analysis_context import get_context
+from src.analysis.cross_language_validator import CrossLanguageValidator
+from src.analysis.java_analyzer import JavaAnalyzer
+
+CODE = """
+public class Solution {
+    private static final int MAX_SIZE = 10;
+    public int count;
+
+    public List<String> names(List<String> xs) {
+        if (xs.isEmpty()) { return new ArrayList<>(); }
+        try {
+            return xs.stream().map(s -> s.trim()).collect(Collectors.toList());
+        } catch (Exception e) {
+        }
+        return xs.size() > MAX_SIZE ? null : xs;
+    }
+}
+"""
+
+
+def test_context_is_shared_and_walk_collects_every_metric():
+    ctx = get_context(CODE)
+    assert get_context(CODE) is ctx
+    m = ctx.metrics
+    assert m["complexity"] == 3  # if + ternary + 1
+    assert m["modern_features"]["lambdas"] == 1 and m["modern_features"]["streams"] == 1
+    assert m["access_modifiers"]["public_fields"] == 1 and m["access_modifiers"]["constants"] == 1
+    assert m["exception_handling"]["generic_catches"] == 1 and m["exception_handling"]["empty_catches"] == 1
+    assert m["generics"]["diamonds"] == 1
+    assert m["naming"]["violations"] == []
+
+
+def test_analyzers_read_the_shared_parse():
+    result = CrossLanguageValidator().analyze_java_adaptations(CODE, "basic")
+    assert result["uses_modern_java_features"] and not result["appropriate_access_modifiers"]
+    assert result["exception_handling_quality"] == 0.0
+
+    bad = get_context("class {")
+    assert not bad.parses and bad.metrics == {}
+    assert JavaAnalyzer(compile_server=False)._check_syntax("class {") == bad.syntax_errors
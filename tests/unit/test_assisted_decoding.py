@@ -0,0 +1,47 @@
+import torch
+from transformers import BatchEncoding, GPT2Config, GPT2LMHeadModel
+
+from src.models.hf_model import HFSettings, HuggingFaceModel
+
+
+class _CharTokenizer:
+    pad_token_id = 0
+    eos_token_id = 0
+
+    def __call__(self, prompts, return_tensors="pt", padding=True):
+        rows = [[ord(c) % 30 + 2 for c in p] for p in prompts]
+        width = max(len(r) for r in rows)
+        return BatchEncoding({
+            "input_ids": torch.tensor([[0] * (width - len(r)) + r for r in rows]),
+            "attention_mask": torch.tensor([[0] * (width - len(r)) + [1] * len(r) for r in rows]),
+        })
+
+    def get_vocab(self):
+        return {chr(i): i for i in range(32)}
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(96 + int(i) % 26) for i in ids if int(i) != 0)
+
+
+def _gpt2(seed, layers):
+    torch.manual_seed(seed)
+    config = GPT2Config(vocab_size=32, n_positions=128, n_embd=16, n_layer=layers, n_head=2,
+                        bos_token_id=1, eos_token_id=0)
+    return GPT2LMHeadModel(config).eval()
+
+
+def test_assisted_generation_rows_and_acceptance_rate():
+    client = HuggingFaceModel(HFSettings(repo="tiny", prefix_cache=False, autotune=False))
+    client.model, client.assistant = _gpt2(0, 2), _gpt2(1, 1)
+    client.tokenizer = client.assistant_tokenizer = _CharTokenizer()
+
+    out = client._sync_generate_batch(["int add", "return"], max_tokens=6, temperature=1.0, seed=0, num_samples=3)
+
+    assert len(out) == 2 and all(len(samples) == 3 for samples in out)
+    for samples in out:
+        for s in samples:
+            assert 0 <= s["output_tokens"] <= 6
+            assert 0.0 <= s["acceptance_rate"] <= 1.0
+    assert [s["input_tokens"] for s in out[0]] == [7, 7, 7]
+    # the counting hooks are gone once generation is over
+    assert not client.model._forward_hooks and not client.assistant._forward_hooks
@@ -0,0 +1,37 @@
+import torch
+
+from src.core import inference_executor
+from src.optimization.autotuner import InferenceProfile, apply_profile, load_profile, save_profile
+
+
+def test_profiles_roundtrip_per_machine(tmp_path):
+    path = tmp_path / "profiles.json"
+    assert load_profile("org/model", path) is None
+
+    save_profile("org/model", InferenceProfile("bf16", None, 4, tokens_per_s=12.5), path)
+    save_profile("org/other", InferenceProfile("fp32", "dynamic-int8", 2), path)
+
+    profile = load_profile("org/model", path)
+    assert (profile.dtype, profile.threads, profile.tokens_per_s) == ("bf16", 4, 12.5)
+    assert load_profile("org/other", path).label() == "dynamic-int8/2t"
+
+
+def test_apply_profile_converts_weights():
+    threads = torch.get_num_threads()
+    try:
+        model = apply_profile(torch.nn.Sequential(torch.nn.Linear(4, 4)), InferenceProfile("bf16", threads=1))
+        assert model[0].weight.dtype == torch.bfloat16
+        assert torch.get_num_threads() == 1
+    finally:
+        torch.set_num_threads(threads)
+
+
+def test_executor_pinned_threads_win_over_the_profile():
+    threads = torch.get_num_threads()
+    try:
+        inference_executor._init_worker(2)  # as a torch_threads=2 executor would
+        apply_profile(torch.nn.Sequential(torch.nn.Linear(4, 4)), InferenceProfile("fp32", threads=1))
+        assert torch.get_num_threads() == 2
+    finally:
+        inference_executor._pinned_threads = None
+        torch.set_num_threads(threads)
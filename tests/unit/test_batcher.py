@@ -0,0 +1,38 @@
+import asyncio
+
+from src.core.code_generator import CodeGenerator, GenerationRequest
+
+
+class FakeBatchModel:
+    def __init__(self):
+        self.batches = []
+
+    async def generate_batch(self, prompts, **kwargs):
+        self.batches.append(list(prompts))
+        return [f"code for {p}" for p in prompts]
+
+
+def test_concurrent_requests_share_one_batch():
+    model = FakeBatchModel()
+    gen = CodeGenerator({"fake": model}, batching={"max_batch_size": 8, "max_wait_ms": 10})
+    reqs = [
+        GenerationRequest(prompt=f"p{i}", strategy="basic", problem_id="x", model_name="fake")
+        for i in range(4)
+    ]
+    results = asyncio.run(gen.batch_generate(reqs))
+
+    assert len(model.batches) == 1
+    assert [r.generated_code for r in results] == [f"code for p{i}" for i in range(4)]
+    assert all(r.success for r in results)
+
+
+def test_batches_split_by_decoding_params():
+    model = FakeBatchModel()
+    gen = CodeGenerator({"fake": model}, batching={"max_batch_size": 8, "max_wait_ms": 10})
+    reqs = [
+        GenerationRequest(prompt="a", strategy="basic", problem_id="x", model_name="fake", temperature=0.2),
+        GenerationRequest(prompt="b", strategy="basic", problem_id="x", model_name="fake", temperature=0.7),
+    ]
+    asyncio.run(gen.batch_generate(reqs))
+
+    assert sorted(model.batches) == [["a"], ["b"]]
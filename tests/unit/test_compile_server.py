@@ -0,0 +1,28 @@
+import shutil
+
+import pytest
+
+from src.analysis.compile_server import JavaCompileServer, source_name
+
+
+def test_source_name_prefers_the_public_type():
+    code = "class Helper {}\npublic final class Solution { }"
+    assert source_name(code) == "Solution"
+    assert source_name("interface Shape {}") == "Shape"
+    assert source_name("int x = 1;") == "Tmp"
+
+
+@pytest.mark.skipif(shutil.which("javac") is None or shutil.which("java") is None, reason="needs a JDK")
+def test_batch_reports_diagnostics_per_source():
+    server = JavaCompileServer(threads=2)
+    try:
+        results = server.compile_batch([
+            "public class Solution { int f() { return 1; } }",
+            "public class Solution { int f() { return \"x\"; } }",
+            "class Broken {",
+        ])
+    finally:
+        server.close()
+    assert [ok for ok, _ in results] == [True, False, False]
+    assert results[0][1] == []
+    assert "Solution.java:1: error" in results[1][1][0]
@@ -0,0 +1,76 @@
+import time
+
+import torch
+from transformers import GPT2Config, GPT2LMHeadModel
+
+from src.models.continuous_batching import ContinuousBatchingEngine
+
+
+class _CharTokenizer:
+    eos_token_id = 0
+
+    def __call__(self, text):
+        return {"input_ids": [ord(c) % 63 + 1 for c in text]}
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(96 + i % 26) for i in ids)
+
+
+def _model():
+    torch.manual_seed(0)
+    config = GPT2Config(vocab_size=64, n_positions=128, n_embd=16, n_layer=2, n_head=2)
+    return GPT2LMHeadModel(config).eval()
+
+
+def test_requests_joining_a_running_batch_match_solo_greedy_decoding():
+    model, tok = _model(), _CharTokenizer()
+    prompts = ["class Solution {", "int", "return a + b;", "x"]
+    engine = ContinuousBatchingEngine(model, tok, max_batch_size=4)
+    try:
+        futures = []
+        for i, prompt in enumerate(prompts):
+            futures.append(engine.submit(prompt, max_tokens=12 - 2 * i, temperature=0))
+            time.sleep(0.01)  # later requests arrive while earlier ones decode
+        results = [f.result(timeout=30) for f in futures]
+    finally:
+        engine.shutdown()
+
+    for i, (prompt, result) in enumerate(zip(prompts, results)):
+        ids = torch.tensor([tok(prompt)["input_ids"]])
+        solo = model.generate(
+            input_ids=ids, attention_mask=torch.ones_like(ids), max_new_tokens=12 - 2 * i,
+            do_sample=False, pad_token_id=0, eos_token_id=None,
+        )[0, ids.shape[1]:].tolist()
+        if 0 in solo:
+            solo = solo[:solo.index(0)]
+        assert result["text"] == tok.decode(solo)
+        assert result["prompt_tokens"] == len(prompt)
+
+
+def test_request_ending_on_its_first_token_does_not_break_the_batch():
+    model = _model()
+    # make EOS whatever "x" greedily decodes to first
+    ids = torch.tensor([_CharTokenizer()("x")["input_ids"]])
+    first = int(model(input_ids=ids).logits[0, -1].argmax())
+    tok = type("EosTokenizer", (_CharTokenizer,), {"eos_token_id": first})()
+
+    engine = ContinuousBatchingEngine(model, tok, max_batch_size=4)
+    try:
+        running = engine.submit("class Solution {", max_tokens=20, temperature=0)
+        time.sleep(0.01)
+        ended = engine.submit("x", max_tokens=20, temperature=0)
+        single = engine.submit("int", max_tokens=1, temperature=0)
+        results = [f.result(timeout=30) for f in (running, ended, single)]
+    finally:
+        engine.shutdown()
+
+    assert results[1]["completion_tokens"] == 0 and results[1]["finish_reason"] == "stop"
+    assert results[2]["completion_tokens"] == 1
+    assert all(r["completion_tokens"] <= 20 for r in results)
+
+
+def test_shutdown_resolves_queued_requests():
+    engine = ContinuousBatchingEngine(_model(), _CharTokenizer(), max_batch_size=1)
+    futures = [engine.submit("class Solution {", max_tokens=50, temperature=0) for _ in range(4)]
+    engine.shutdown()
+    assert all(f.done() for f in futures)
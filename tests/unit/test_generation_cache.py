@@ -0,0 +1,102 @@
+import asyncio
+import os
+import time
+
+from src.core.code_generator import CodeGenerator, GenerationRequest
+from src.core.generation_cache import GenerationCache
+from src.utils.disk_cache import DiskCache
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_code(self, prompt, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return f"class A {{ /* {prompt} */ }}"
+
+
+def _req(prompt="p", seed=1):
+    return GenerationRequest(prompt=prompt, strategy="basic", problem_id="x", model_name="m", seed=seed)
+
+
+def test_repeat_run_hits_cache(tmp_path):
+    model = CountingModel()
+    cache = GenerationCache(str(tmp_path))
+
+    first = asyncio.run(CodeGenerator({"m": model}, cache=cache).batch_generate([_req()]))
+    second = asyncio.run(CodeGenerator({"m": model}, cache=cache).batch_generate([_req()]))
+
+    assert model.calls == 1
+    assert not first[0].cached and second[0].cached
+    assert second[0].generated_code == first[0].generated_code
+    assert second[0].execution_time == first[0].execution_time
+
+
+def test_identical_inflight_requests_coalesce(tmp_path):
+    model = CountingModel()
+    gen = CodeGenerator({"m": model}, cache=GenerationCache(str(tmp_path)))
+
+    results = asyncio.run(gen.batch_generate([_req(), _req(), _req(seed=2)]))
+
+    assert model.calls == 2
+    assert [r.cached for r in results] == [False, True, False]
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    store = DiskCache(str(tmp_path), max_entries=2, evict_every=1)
+    store.set("aa1", {"v": 1})
+    store.set("bb2", {"v": 2})
+    now = time.time()
+    os.utime(store._path("aa1"), (now - 20, now - 20))
+    os.utime(store._path("bb2"), (now - 10, now - 10))
+    store.get("aa1")
+    store.set("cc3", {"v": 3})
+    store._sweep.join()
+
+    assert store.get("bb2") is None
+    assert store.get("aa1") == {"v": 1}
+    assert store.get("cc3") == {"v": 3}
+
+
+def test_disk_cache_age_counts_from_write_not_last_read(tmp_path):
+    store = DiskCache(str(tmp_path), max_age_days=1)
+    store.set("aa1", {"v": 1})
+    written = time.time() - 0.9 * 86400
+    os.utime(store._path("aa1"), (written, written))
+
+    assert store.get("aa1") == {"v": 1}
+    # the read is recorded as an access without making the entry younger
+    assert store._path("aa1").stat().st_mtime == written
+    assert store._path("aa1").stat().st_atime > written
+
+
+def test_budget_changes_reuse_entries_valid_for_the_new_budget(tmp_path):
+    class BudgetModel:
+        def __init__(self):
+            self.budgets = []
+
+        async def generate_code(self, prompt, max_tokens, **kwargs):
+            self.budgets.append(max_tokens)
+            used = min(max_tokens, 300)
+            return {"code": "x " * used, "output_tokens": used,
+                    "finish_reason": "length" if used >= max_tokens else "stop"}
+
+    model = BudgetModel()
+    cache = GenerationCache(str(tmp_path))
+
+    def run(max_tokens):
+        req = GenerationRequest(prompt="p", strategy="basic", problem_id="x", model_name="m",
+                                seed=1, max_tokens=max_tokens)
+        return asyncio.run(CodeGenerator({"m": model}, cache=cache).batch_generate([req]))[0]
+
+    assert not run(1000).cached  # stops on its own at 300
+    assert run(500).cached       # 300 tokens fit the smaller budget too
+    short = run(100)             # the 300-token sample would not fit
+    assert not short.cached and short.finish_reason == "length"
+    assert run(100).cached       # same budget as the cut-off sample
+    assert not run(150).cached   # a cut-off sample is only valid for its own budget
+    assert not run(400).cached
+    assert run(350).cached
+    assert model.budgets == [1000, 100, 150, 400]
@@ -0,0 +1,51 @@
+import time
+from datetime import datetime
+
+import torch
+from transformers import GPT2Config, GPT2LMHeadModel, StoppingCriteriaList
+
+from src.core.code_generator import CodeGenerator, GenerationRequest
+from src.models.generation_utils import FirstTokenTimer, count_tokens, timing_breakdown
+
+
+def test_phases_add_up_to_the_generate_call():
+    torch.manual_seed(0)
+    model = GPT2LMHeadModel(GPT2Config(vocab_size=32, n_positions=64, n_embd=16, n_layer=1, n_head=2)).eval()
+    timer = FirstTokenTimer()
+    start = time.perf_counter()
+    with torch.no_grad():
+        model.generate(
+            torch.tensor([[1, 2, 3]]), max_new_tokens=5, do_sample=False, pad_token_id=0,
+            stopping_criteria=StoppingCriteriaList([timer]),
+        )
+    end = time.perf_counter()
+
+    assert start < timer.first_token_at <= end
+    timing = timing_breakdown(0.5, 0.01, start, end, timer, 0.02)
+    assert abs(timing["time_to_first_token"] + timing["decode"] - (end - start)) < 1e-9
+    assert timing["load"] == 0.5 and timing["postprocess"] == 0.02
+
+
+def test_token_counts_exclude_padding_and_eos():
+    # left padding (0) before the prompt's new tokens, EOS (2) and pad after
+    row = torch.tensor([0, 0, 5, 6, 7, 2, 0])
+    assert count_tokens(row, pad_token_id=0, eos_token_id=2) == 3
+    # decoder-only models reuse EOS as padding
+    assert count_tokens(torch.tensor([5, 6, 2, 2]), pad_token_id=2, eos_token_id=2) == 2
+
+
+def test_result_latency_excludes_lazy_load_time():
+    request = GenerationRequest(prompt="p", strategy="cot", problem_id="x", model_name="m")
+    resp = {
+        "code": "class A {}",
+        "token_count": 4,
+        "input_tokens": 7,
+        "output_tokens": 4,
+        "finish_reason": "stop",
+        "timing": {"load": 2.0, "tokenize": 0.1, "time_to_first_token": 0.4, "decode": 0.4, "postprocess": 0.1},
+    }
+    result = CodeGenerator._to_result(request, resp, execution_time=3.0, sample_index=0)
+
+    assert abs(result.execution_time - 1.0) < 1e-9
+    assert (result.input_tokens, result.output_tokens) == (7, 4)
+    assert result.timing.load == 2.0 and isinstance(result.timestamp, datetime)
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import threading
+import time
+
+from src.core.inference_executor import InferenceExecutor, ReplicaPool, run_inference, split_cores
+
+
+class BlockingModel:
+    def __init__(self, settings=None):
+        self.settings = settings
+        self.executor = None
+
+    def _sync_generate_batch(self, prompts):
+        time.sleep(0.2)
+        return [threading.current_thread().name for _ in prompts]
+
+
+def test_blocking_inference_does_not_stall_loop():
+    ex = InferenceExecutor()
+    model = ex.bind("slow", BlockingModel())
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        t = asyncio.ensure_future(ticker())
+        out = await run_inference(model, "_sync_generate_batch", ["a"])
+        t.cancel()
+        return out, ticks
+
+    try:
+        out, ticks = asyncio.run(main())
+    finally:
+        ex.shutdown()
+
+    assert out[0].startswith("infer-slow")
+    assert ticks > 5
+
+
+def test_core_groups_are_disjoint_when_cores_allow():
+    available = len(os.sched_getaffinity(0))
+    groups = split_cores(min(2, available))
+    flat = [c for g in groups for c in g]
+    assert len(flat) == len(set(flat))
+    assert len(split_cores(available + 1)) == available + 1
+
+
+def test_replica_pool_spreads_calls_over_replicas():
+    pool = ReplicaPool(split_cores(2))
+    try:
+        pids = {f.result() for f in pool.broadcast(os.getpid)}
+        assert len(pids) == 2
+
+        futures = [pool.submit(time.sleep, 0.2) for _ in range(2)]
+        assert pool._inflight == [1, 1]
+        for f in futures:
+            f.result()
+    finally:
+        pool.shutdown()
@@ -0,0 +1,29 @@
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.core.inference_server import InferenceServer, ServedModel
+
+
+class EchoModel:
+    async def generate_code(self, prompt, max_tokens, temperature, seed=None):
+        return {"code": prompt[:max_tokens], "output_tokens": min(len(prompt), max_tokens)}
+
+    async def close(self):
+        pass
+
+
+def test_malformed_parameters_are_client_errors():
+    async def main():
+        server = InferenceServer({"echo": ServedModel("echo", EchoModel())})
+        async with TestClient(TestServer(server.app)) as client:
+            statuses = []
+            for extra in ({"n": "two"}, {"n": 0}, {"max_tokens": "lots"}, {"max_tokens": 1.5}, {"seed": "x"}):
+                resp = await client.post("/v1/completions", json={"model": "echo", "prompt": "abc", **extra})
+                statuses.append(resp.status)
+            ok = await client.post("/v1/completions", json={"model": "echo", "prompt": "abc", "n": 2, "max_tokens": 2})
+            return statuses, ok.status, await ok.json()
+
+    statuses, status, body = asyncio.run(main())
+    assert statuses == [400] * 5
+    assert status == 200 and [c["text"] for c in body["choices"]] == ["ab", "ab"]
@@ -0,0 +1,38 @@
+import shutil
+
+import pytest
+
+from src.analysis.java_analyzer import JavaAnalyzer
+from src.analysis.java_test_runner import JavaTestRunner, as_test_cases, build_test_source
+
+
+def test_harness_wraps_each_test_in_its_own_method():
+    cases = as_test_cases(["assertEquals(3, new Solution().add(1, 2));", {"name": "neg", "code": "assertTrue(true);"}])
+    assert [c.name for c in cases] == ["test_0", "neg"]
+    source = build_test_source("package demo;\npublic class Solution { int add(int a, int b) { return a + b; } }", cases)
+    assert "package demo;" not in source
+    assert source.startswith("import java.util.*;")
+    assert "static void test0()" in source and "static void test1()" in source
+
+
+@pytest.mark.skipif(shutil.which("javac") is None or shutil.which("java") is None, reason="needs a JDK")
+def test_reports_pass_fail_and_timeout_per_test():
+    runner = JavaTestRunner(workers=2, test_timeout_s=1.0)
+    code = "public class Solution { int add(int a, int b) { return a + b; } }"
+    try:
+        [outcomes] = runner.run_many([(code, [
+            "assertEquals(3, new Solution().add(1, 2));",
+            "assertEquals(4, new Solution().add(1, 2));",
+            "while (true) {}",
+        ])])
+    finally:
+        runner.close()
+    assert [o.status for o in outcomes] == ["pass", "fail", "timeout"]
+
+
+def test_analyzer_closes_the_runner_it_started():
+    analyzer = JavaAnalyzer(javac="/nonexistent/javac", compile_server=False)
+    runner = analyzer.test_runner
+    scratch = runner._scratch
+    analyzer.close()
+    assert not scratch.exists() and runner._pool._shutdown
@@ -0,0 +1,23 @@
+import pytest
+
+from src.core.model_registry import LazyModelClients
+
+
+def test_clients_built_only_on_first_access():
+    created = []
+    clients = LazyModelClients(["local-stub"], on_create=lambda name, c: created.append(name))
+
+    assert list(clients) == ["local-stub"]
+    assert created == []
+
+    stub = clients["local-stub"]
+    assert clients["local-stub"] is stub
+    assert created == ["local-stub"]
+
+    with pytest.raises(KeyError):
+        clients["starcoder-1b"]
+
+
+def test_unknown_model_rejected_up_front():
+    with pytest.raises(ValueError):
+        LazyModelClients(["no-such-model"])
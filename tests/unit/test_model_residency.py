@@ -0,0 +1,62 @@
+import asyncio
+
+from src.core.model_residency import ResidencyManager
+
+
+class FakeModel:
+    def __init__(self):
+        self.model = None
+        self.loads = 0
+        self.executor = None
+
+    def _load_model(self):
+        if self.model is None:
+            self.model = object()
+            self.loads += 1
+
+    async def close(self):
+        self.model = None
+
+
+def test_lru_model_is_unloaded_and_reloaded_on_demand():
+    clients = {"a": FakeModel(), "b": FakeModel()}
+    mgr = ResidencyManager(clients, budget_mb=1000, footprints_mb={"a": 600, "b": 600})
+
+    async def main():
+        async with mgr.hold("a"):
+            pass
+        async with mgr.hold("b"):
+            assert not mgr.is_resident("a")
+            assert clients["a"].model is None
+        async with mgr.hold("a"):
+            pass
+
+    asyncio.run(main())
+    assert clients["a"].loads == 2
+    assert clients["b"].loads == 1
+    assert mgr.is_resident("a") and not mgr.is_resident("b")
+
+
+class WorkerModel(FakeModel):
+    """Weights held by the executor's workers; close() alone would free nothing."""
+
+    def __init__(self):
+        super().__init__()
+        self.unloads = 0
+
+    def unload(self):
+        self.unloads += 1
+
+
+def test_eviction_unloads_in_the_executor_workers():
+    clients = {"a": WorkerModel(), "b": WorkerModel()}
+    mgr = ResidencyManager(clients, budget_mb=1000, footprints_mb={"a": 600, "b": 600})
+
+    async def main():
+        async with mgr.hold("a"):
+            pass
+        async with mgr.hold("b"):
+            pass
+
+    asyncio.run(main())
+    assert clients["a"].unloads == 1 and clients["b"].unloads == 0
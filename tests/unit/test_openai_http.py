@@ -0,0 +1,69 @@
+import asyncio
+
+from aiohttp import web
+
+from src.models.local_stub import LocalStub
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v1"
+
+
+def test_retries_rate_limit_and_runs_requests_concurrently():
+    state = {"calls": 0, "in_flight": 0, "peak": 0}
+
+    async def handler(request):
+        state["calls"] += 1
+        if state["calls"] == 1:
+            return web.json_response({"error": "slow down"}, status=429, headers={"Retry-After": "0"})
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.1)
+        state["in_flight"] -= 1
+        body = await request.json()
+        return web.json_response({
+            "choices": [{"message": {"content": "class A {}"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 7, "completion_tokens": 3},
+            "model": body["model"],
+        })
+
+    async def main():
+        runner, base = await _serve(handler)
+        stub = LocalStub({"use_api": True, "api_base": base, "backoff_base": 0.01})
+        try:
+            return await asyncio.gather(*[stub.generate_code(f"p{i}") for i in range(8)])
+        finally:
+            await stub.close()
+            await runner.cleanup()
+
+    results = asyncio.run(main())
+    assert all(r["code"] == "class A {}" and r["output_tokens"] == 3 for r in results)
+    assert state["calls"] == 9
+    assert state["peak"] > 1
+
+
+def test_client_errors_are_not_retried():
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        return web.json_response({"error": "bad key"}, status=401)
+
+    async def main():
+        runner, base = await _serve(handler)
+        stub = LocalStub({"use_api": True, "api_base": base})
+        try:
+            return await stub.generate_code("p")
+        finally:
+            await stub.close()
+            await runner.cleanup()
+
+    assert asyncio.run(main()) == "// API Error: 401"
+    assert len(calls) == 1
@@ -0,0 +1,57 @@
+import asyncio
+import math
+from math import comb
+
+from src.analysis.pass_at_k import group_by_request, pass_at_k, pass_at_k_for, success_rate
+from src.core.code_generator import CodeGenerator, GenerationRequest
+
+
+class FakeSamplingModel:
+    def __init__(self):
+        self.calls = []
+
+    async def generate_batch(self, prompts, num_samples=1, **kwargs):
+        self.calls.append((list(prompts), num_samples))
+        return [[f"{p} sample {j}" for j in range(num_samples)] for p in prompts]
+
+    async def generate_code(self, prompt, num_samples=1, **kwargs):
+        return (await self.generate_batch([prompt], num_samples=num_samples, **kwargs))[0]
+
+
+def test_pass_at_k_matches_closed_form():
+    for n, c, k in [(10, 3, 1), (10, 3, 5), (5, 0, 2), (4, 4, 2)]:
+        expected = 1.0 - comb(n - c, k) / comb(n, k)
+        assert abs(pass_at_k(n, c, k) - expected) < 1e-12
+
+
+def test_samples_come_from_one_call_and_group_per_request():
+    model = FakeSamplingModel()
+    gen = CodeGenerator({"fake": model})
+    reqs = [
+        GenerationRequest(prompt=p, strategy="basic", problem_id="x", model_name="fake", num_samples=3)
+        for p in ("a", "b")
+    ]
+    results = asyncio.run(gen.batch_generate(reqs))
+
+    assert model.calls == [(["a", "b"], 3)]
+    assert [(r.request.prompt, r.sample_index) for r in results] == [
+        ("a", 0), ("a", 1), ("a", 2), ("b", 0), ("b", 1), ("b", 2),
+    ]
+    groups = group_by_request(results)
+    assert [len(g) for g in groups] == [3, 3]
+    # generated but never executed: no pass@k, only a success rate
+    assert math.isnan(pass_at_k_for(groups[0], 1)) and success_rate(groups[0]) == 1.0
+    for result, passed in zip(groups[0], (True, False, False)):
+        result.passed = passed
+    assert abs(pass_at_k_for(groups[0], 1) - 1 / 3) < 1e-12
+    assert pass_at_k_for(groups[0], 3) == 1.0
+
+
+def test_unbatched_requests_still_sample_in_one_call():
+    model = FakeSamplingModel()
+    gen = CodeGenerator({"fake": model}, batching={"enabled": False})
+    req = GenerationRequest(prompt="a", strategy="basic", problem_id="x", model_name="fake", num_samples=4)
+    results = asyncio.run(gen.batch_generate([req]))
+
+    assert model.calls == [(["a"], 4)]
+    assert [r.generated_code for r in results] == [f"a sample {j}" for j in range(4)]
@@ -0,0 +1,70 @@
+import torch
+from transformers import GPT2Config, GPT2LMHeadModel
+
+from src.models.prefix_cache import PrefixKVCache, generate_with_prefix
+
+
+def _model():
+    torch.manual_seed(0)
+    config = GPT2Config(vocab_size=64, n_positions=128, n_embd=16, n_layer=2, n_head=2)
+    return GPT2LMHeadModel(config).eval()
+
+
+def test_shared_prefix_is_reused_without_changing_output():
+    model = _model()
+    cache = PrefixKVCache(block_size=8, max_entries=2)
+    shared = list(range(1, 21))
+    kwargs = dict(max_new_tokens=4, do_sample=False, pad_token_id=0)
+
+    def run(ids):
+        ids = torch.tensor([ids])
+        inputs = {"input_ids": ids, "attention_mask": torch.ones_like(ids)}
+        return generate_with_prefix(model, inputs, cache, **kwargs)
+
+    run(shared + [30, 31])
+    with_cache = run(shared + [40, 41, 42])
+    assert cache.hits == 1 and cache.reused_tokens == 16
+
+    ids = torch.tensor([shared + [40, 41, 42]])
+    plain = model.generate(input_ids=ids, attention_mask=torch.ones_like(ids), **kwargs)
+    assert torch.equal(with_cache, plain)
+
+
+def test_lru_eviction_drops_index_entries():
+    model = _model()
+    cache = PrefixKVCache(block_size=4, max_entries=1)
+    for start in (1, 20):
+        ids = torch.tensor([list(range(start, start + 9))])
+        generate_with_prefix(
+            model, {"input_ids": ids, "attention_mask": torch.ones_like(ids)}, cache,
+            max_new_tokens=1, do_sample=False, pad_token_id=0,
+        )
+    past, reused = cache.lookup(list(range(1, 10)))
+    assert past is None and reused == 0
+    past, reused = cache.lookup(list(range(20, 29)))
+    assert reused == 8
+
+
+def test_batched_rows_and_samples_share_the_cached_prefix():
+    model = _model()
+    cache = PrefixKVCache(block_size=8, max_entries=2)
+    shared = list(range(1, 21))
+    kwargs = dict(max_new_tokens=4, do_sample=False, pad_token_id=0)
+
+    def left_padded(rows):
+        width = max(len(r) for r in rows)
+        ids = torch.tensor([[0] * (width - len(r)) + r for r in rows])
+        mask = torch.tensor([[0] * (width - len(r)) + [1] * len(r) for r in rows])
+        return {"input_ids": ids, "attention_mask": mask}
+
+    generate_with_prefix(model, left_padded([shared + [30, 31]]), cache, **kwargs)
+    rows = [shared + [40, 41, 42], shared + [50], shared + [33, 34, 35, 36]]
+    inputs = left_padded(rows)
+    out = generate_with_prefix(model, inputs, cache, num_return_sequences=2, **kwargs)
+    assert cache.hits == 1 and cache.reused_tokens == 16
+
+    # greedy generate() refuses num_return_sequences, so repeat rows by hand
+    plain = model.generate(**{k: v.repeat_interleave(2, dim=0) for k, v in inputs.items()}, **kwargs)
+    width = inputs["input_ids"].shape[1]
+    assert out.shape == plain.shape
+    assert torch.equal(out[:, width:], plain[:, width:])
@@ -0,0 +1,49 @@
+import subprocess
+import sys
+
+import pytest
+
+from src.analysis.python_test_runner import PythonTestRunner, build_program
+from src.utils.sandbox import sandbox_command
+
+HUMANEVAL = {
+    "id": "HumanEval/0",
+    "description": "def add(a, b):\n    \"\"\"Sum of a and b.\"\"\"\n",
+    "test_cases": "def check(candidate):\n    assert candidate(1, 2) == 3\n",
+    "entry_point": "add",
+}
+MBPP = {"id": "MBPP_1", "description": "Add two numbers.", "test_cases": ["assert add(1, 2) == 3"]}
+
+
+def test_build_program_for_humaneval_and_mbpp():
+    # a bare function body gets the prompt prepended, a full definition does not
+    body = build_program(HUMANEVAL, "    return a + b\n")
+    assert body.startswith(HUMANEVAL["description"]) and body.endswith("check(add)\n")
+    full = build_program(HUMANEVAL, "```python\ndef add(a, b):\n    return a + b\n```")
+    assert full.startswith("def add(a, b):")
+
+    assert build_program(MBPP, "def add(a, b): return a + b").endswith("assert add(1, 2) == 3\n")
+    assert build_program({"id": "x", "description": ""}, "pass") is None
+
+
+def test_reports_pass_fail_and_timeout():
+    runner = PythonTestRunner(workers=2, timeout_s=1.0)
+    try:
+        outcomes = runner.run_many([
+            build_program(MBPP, "def add(a, b): return a + b"),
+            build_program(MBPP, "def add(a, b): return a - b"),
+            build_program(MBPP, "def add(a, b):\n    while True: pass"),
+            build_program(MBPP, "import os\nos.system('true')\ndef add(a, b): return a + b"),
+        ])
+    finally:
+        runner.close()
+    assert [o.status for o in outcomes] == ["passed", "failed", "timeout", "failed"]
+    assert outcomes[0].passed and not outcomes[1].passed
+
+
+def test_sandbox_launcher_applies_limits_then_execs():
+    probe = "import resource; print(resource.getrlimit(resource.RLIMIT_FSIZE)[0])"
+    out = subprocess.run(sandbox_command([sys.executable, "-c", probe], file_size_mb=2), capture_output=True, text=True)
+    assert out.stdout.strip() == str(2 * 2**20)
+    with pytest.raises(FileNotFoundError):
+        sandbox_command(["/nonexistent/java", "-version"])
@@ -0,0 +1,19 @@
+from src.core.code_generator import GenerationRequest
+from src.core.request_planner import plan_requests
+
+
+def _req(prompt, model):
+    return GenerationRequest(prompt=prompt, strategy="basic", problem_id="x", model_name=model)
+
+
+def test_plan_groups_by_model_then_prompt_and_keeps_indices():
+    grid = [
+        _req("Example preamble B", "starcoder-1b"),
+        _req("Example preamble B", "local-stub"),
+        _req("Example preamble A", "starcoder-1b"),
+        _req("Example preamble A", "local-stub"),
+    ]
+    plan = plan_requests(grid, ["local-stub", "starcoder-1b"])
+
+    assert [i for i, _ in plan] == [3, 1, 2, 0]
+    assert all(grid[i] is r for i, r in plan)
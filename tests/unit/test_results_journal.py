@@ -0,0 +1,57 @@
+import json
+from datetime import datetime
+
+from src.core.code_generator import GenerationRequest, GenerationResult, GenerationTiming
+from src.core.results_journal import ResultsJournal, request_key
+
+
+def _result(i):
+    req = GenerationRequest(prompt=f"p{i}", strategy="cot", problem_id="two_sum", model_name="local-stub")
+    return GenerationResult(
+        request=req, generated_code=f"code{i}", execution_time=0.1, token_count=3,
+        timestamp=datetime(2025, 1, 1), success=True,
+        timing=GenerationTiming(load=0.5, time_to_first_token=0.02, decode=0.08),
+        output_tokens=3,
+    )
+
+
+def test_journal_roundtrip_and_export(tmp_path):
+    journal = ResultsJournal(tmp_path / "run.jsonl")
+    for i in range(3):
+        journal.append(_result(i))
+    journal.close()
+
+    loaded = list(journal.load_results())
+    assert [r.request.prompt for r in loaded] == ["p0", "p1", "p2"]
+    assert loaded[0].timestamp == datetime(2025, 1, 1)
+    assert loaded[0].timing.time_to_first_token == 0.02
+
+    journal.export_json(tmp_path / "run.json")
+    exported = json.loads((tmp_path / "run.json").read_text())
+    assert len(exported) == 3
+    assert exported[0]["generated_code"] == "code0"
+    assert exported[0]["timing"]["decode"] == 0.08
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    journal = ResultsJournal(tmp_path / "run.jsonl")
+    journal.append(_result(0))
+    journal.close()
+    with open(journal.path, "a") as f:
+        f.write('{"request": {"prompt": "p1"')
+
+    assert len(list(journal.load_results())) == 1
+
+
+def test_resume_skips_completed_and_keeps_latest_retry(tmp_path):
+    journal = ResultsJournal(tmp_path / "run.jsonl")
+    failed = _result(1)
+    failed.success = False
+    journal.append(_result(0))
+    journal.append(failed)
+    journal.append(_result(1))
+    journal.close()
+
+    assert journal.completed_keys() == {request_key(_result(0).request), request_key(_result(1).request)}
+    loaded = list(journal.load_results())
+    assert len(loaded) == 2 and all(r.success for r in loaded)
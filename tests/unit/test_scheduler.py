@@ -0,0 +1,40 @@
+import asyncio
+
+from src.core.scheduler import FairScheduler
+
+
+def test_model_budget_is_respected():
+    sched = FairScheduler(max_concurrent=10, model_limits={"slow": 1})
+    peak = {"slow": 0, "fast": 0}
+    active = {"slow": 0, "fast": 0}
+
+    async def job(model):
+        async with sched.slot(model):
+            active[model] += 1
+            peak[model] = max(peak[model], active[model])
+            await asyncio.sleep(0.01)
+            active[model] -= 1
+
+    async def main():
+        await asyncio.gather(*[job("slow") for _ in range(4)], *[job("fast") for _ in range(8)])
+
+    asyncio.run(main())
+    assert peak == {"slow": 1, "fast": 8}
+
+
+def test_backlogged_models_share_global_budget():
+    sched = FairScheduler(max_concurrent=1)
+    order = []
+
+    async def job(model):
+        async with sched.slot(model):
+            order.append(model)
+            await asyncio.sleep(0)
+
+    async def main():
+        # "a" queues its whole backlog first; "b" must still be interleaved
+        await asyncio.gather(*[job("a") for _ in range(4)], *[job("b") for _ in range(4)])
+
+    asyncio.run(main())
+    assert order[:4].count("b") >= 1
+    assert order.count("a") == order.count("b") == 4
@@ -0,0 +1,32 @@
+import pytest
+import torch
+from transformers import AutoModelForCausalLM, GPT2Config, GPT2LMHeadModel
+
+from src.models.shared_weights import load_mmap_model, load_weights, memory_report
+
+
+def test_mmap_model_matches_from_pretrained(tmp_path):
+    torch.manual_seed(0)
+    GPT2LMHeadModel(GPT2Config(vocab_size=64, n_positions=32, n_embd=16, n_layer=1, n_head=2)).save_pretrained(tmp_path)
+
+    mapped = load_mmap_model(AutoModelForCausalLM, str(tmp_path))
+    reference = AutoModelForCausalLM.from_pretrained(str(tmp_path)).eval()
+    ids = torch.tensor([[1, 2, 3, 4]])
+    with torch.no_grad():
+        assert torch.allclose(mapped(ids).logits, reference(ids).logits)
+    # tied output head still points at the mapped embeddings
+    assert mapped.lm_head.weight.data_ptr() == mapped.get_input_embeddings().weight.data_ptr()
+    assert memory_report()["rss"] > 0
+
+
+def test_mmap_model_honours_dtype_or_falls_back(tmp_path):
+    model = GPT2LMHeadModel(GPT2Config(vocab_size=64, n_positions=32, n_embd=16, n_layer=1, n_head=2))
+    model.half().save_pretrained(tmp_path)
+
+    mapped = load_weights(AutoModelForCausalLM, str(tmp_path), mmap_weights=True, torch_dtype=torch.float16)
+    assert {t.dtype for t in mapped.state_dict().values() if t.is_floating_point()} == {torch.float16}
+    with pytest.raises(ValueError):
+        load_mmap_model(AutoModelForCausalLM, str(tmp_path), torch_dtype=torch.float32)
+    # a private fp32 copy rather than fp16 weights under an fp32 request
+    copied = load_weights(AutoModelForCausalLM, str(tmp_path), mmap_weights=True, torch_dtype=torch.float32)
+    assert {t.dtype for t in copied.state_dict().values() if t.is_floating_point()} == {torch.float32}
@@ -0,0 +1,31 @@
+from src.models.stopping import JavaClassTracker, truncate_java
+
+
+def test_class_end_ignores_braces_in_literals_and_comments():
+    code = (
+        "import java.util.*;\n"
+        "public class Solution {\n"
+        "    // a stray } in a comment\n"
+        "    /* and { here */\n"
+        "    String s = \"}\\\"}\";\n"
+        "    char c = '}';\n"
+        "    int f() { return 1; }\n"
+        "}\n"
+        "public class Extra {}\n"
+    )
+    tracker = JavaClassTracker()
+    # feed in small chunks like token-by-token decoding
+    done = False
+    for i in range(0, len(code), 3):
+        done = tracker.feed(code[i:i + 3])
+        if done:
+            break
+    assert done
+    assert code[:tracker.end].endswith("int f() { return 1; }\n}")
+
+
+def test_non_type_blocks_and_stop_sequences():
+    code = "static int helper() { return 2; }\nclass A { }\n// Task: next"
+    assert truncate_java(code) == "static int helper() { return 2; }\nclass A { }"
+    assert truncate_java("int x = 1;\n// Task: more", ["\n// Task:"]) == "int x = 1;"
+    assert not JavaClassTracker().feed("class A { void f() {")
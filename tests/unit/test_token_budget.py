@@ -0,0 +1,41 @@
+import asyncio
+
+from src.core.code_generator import CodeGenerator, GenerationRequest
+from src.core.token_budget import TokenBudgetPlanner
+
+
+class FakeLengthModel:
+    """Needs 300 tokens; reports a cut-off below that."""
+
+    def __init__(self):
+        self.budgets = []
+
+    async def generate_code(self, prompt, max_tokens, **kwargs):
+        self.budgets.append(max_tokens)
+        used = min(max_tokens, 300)
+        return {
+            "code": "x" * used,
+            "output_tokens": used,
+            "finish_reason": "length" if used >= max_tokens else "stop",
+        }
+
+
+def test_budget_from_template_then_history():
+    planner = TokenBudgetPlanner(headroom=1.0, min_history=3, min_tokens=10)
+    assert planner.budget_for("m", "cot", 200) == 200
+    for n in (40, 50, 60):
+        planner.observe("m", "cot", n)
+    assert planner.budget_for("m", "cot", 200) == 60
+    assert planner.budget_for("m", "few_shot", 200) == 200
+
+
+def test_capped_generation_is_retried_with_larger_budget():
+    model = FakeLengthModel()
+    planner = TokenBudgetPlanner(max_tokens=1000)
+    gen = CodeGenerator({"m": model}, batching={"enabled": False}, token_budget=planner)
+    req = GenerationRequest(prompt="p", strategy="cot", problem_id="x", model_name="m", max_tokens=100)
+    [result] = asyncio.run(gen.batch_generate([req]))
+
+    assert model.budgets == [100, 200, 400]
+    assert result.finish_reason == "stop" and result.request.max_tokens == 400
+    assert planner.budget_for("m", "cot", 50) == 64  # one observation: still template-based